@@ -0,0 +1,242 @@
+"""
+alert_engine.py — Stock alerts maintained incrementally instead of recomputed per request.
+
+Every (Product_ID, Warehouse_ID) pair of the LatestStateView is evaluated once
+when Dynamic_ROP is attached (training) and then only when its own inventory
+changes: the view notifies the engine with the changed slot, the pair's alert
+states are re-evaluated and its entries in the per-type heaps are moved in
+O(log n). Each alert type keeps an indexed heap of its active pairs, so the
+top k are read from the heap's first levels without touching the rest.
+
+Thresholds are configurable and have hysteresis: an alert raises when its
+threshold is crossed but clears only once the value is back past the threshold
+by the hysteresis margin, so a level oscillating around the reorder point does
+not flap between alerting and clear.
+"""
+
+import heapq
+import threading
+import numpy as np  # type: ignore
+
+ROP_MULTIPLIER = 1.0        # low stock: Inventory_Level < Dynamic_ROP * multiplier
+OVERSTOCK_RATIO = 50.0      # overstock: Inventory_Level / max(Units_Sold, 1) > ratio
+HYSTERESIS = 0.05           # clear only 5% past the threshold
+
+LOW_STOCK = "low_stock"
+OVERSTOCK = "overstock"
+
+
+class IndexedHeap:
+    """
+    Min-heap of (key, item) with a position index, so an item's key can be
+    changed or the item removed in O(log n).
+    """
+
+    def __init__(self, entries: list[tuple] | None = None):
+        self._heap: list[tuple] = list(entries or ())
+        heapq.heapify(self._heap)
+        self._pos = {item: i for i, (_, item) in enumerate(self._heap)}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, item) -> bool:
+        return item in self._pos
+
+    def items(self) -> list:
+        return list(self._pos)
+
+    def key(self, item):
+        """`item`'s current key, or None if it isn't in the heap."""
+        i = self._pos.get(item)
+        return None if i is None else self._heap[i][0]
+
+    def set(self, item, key) -> None:
+        """Inserts `item` or moves it to `key`."""
+        i = self._pos.get(item)
+        if i is None:
+            self._heap.append((key, item))
+            self._pos[item] = len(self._heap) - 1
+            self._sift_up(len(self._heap) - 1)
+            return
+        old = self._heap[i][0]
+        self._heap[i] = (key, item)
+        if key < old:
+            self._sift_up(i)
+        else:
+            self._sift_down(i)
+
+    def remove(self, item) -> None:
+        i = self._pos.pop(item, None)
+        if i is None:
+            return
+        last = self._heap.pop()
+        if i < len(self._heap):
+            self._heap[i] = last
+            self._pos[last[1]] = i
+            self._sift_up(i)
+            self._sift_down(self._pos[last[1]])
+
+    def smallest(self, k: int) -> list:
+        """The k items with the smallest keys, in order: O(k log k), independent of the heap size."""
+        heap = self._heap
+        out = []
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier and len(out) < k:
+            (_, item), i = heapq.heappop(frontier)
+            out.append(item)
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return out
+
+    def _sift_up(self, i: int) -> None:
+        heap, pos = self._heap, self._pos
+        entry = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if heap[parent] <= entry:
+                break
+            heap[i] = heap[parent]
+            pos[heap[i][1]] = i
+            i = parent
+        heap[i] = entry
+        pos[entry[1]] = i
+
+    def _sift_down(self, i: int) -> None:
+        heap, pos = self._heap, self._pos
+        n = len(heap)
+        entry = heap[i]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and heap[child + 1] < heap[child]:
+                child += 1
+            if entry <= heap[child]:
+                break
+            heap[i] = heap[child]
+            pos[heap[i][1]] = i
+            i = child
+        heap[i] = entry
+        pos[entry[1]] = i
+
+
+class AlertEngine:
+    """
+    Low-stock and overstock alerts over a LatestStateView, kept current through
+    the view's change notifications. `on_transition(slot, alert, active)` is
+    called whenever a pair's alert raises or clears.
+
+    Low stock ranks by Inventory_Level (lowest first), overstock by
+    Overstock_Ratio (highest first); ties go to the earlier pair.
+    """
+
+    def __init__(self, view, rop_multiplier: float = ROP_MULTIPLIER, overstock_ratio: float = OVERSTOCK_RATIO,
+                 hysteresis: float = HYSTERESIS, on_transition=None):
+        self._view = view
+        self.rop_multiplier = rop_multiplier
+        self.overstock_ratio = overstock_ratio
+        self.hysteresis = hysteresis
+        self.on_transition = on_transition
+        self._lock = threading.Lock()
+        self._heaps = {LOW_STOCK: IndexedHeap(), OVERSTOCK: IndexedHeap()}
+        self.ready = False  # False until Dynamic_ROP is attached
+        self.version = 0
+        self.rebuild()
+        view.add_listener(self._changed)
+
+    # ------------------------------------------
+    # Configuration
+    # ------------------------------------------
+    def thresholds(self) -> dict:
+        return {"rop_multiplier": self.rop_multiplier, "overstock_ratio": self.overstock_ratio,
+                "hysteresis": self.hysteresis}
+
+    def configure(self, rop_multiplier: float | None = None, overstock_ratio: float | None = None,
+                  hysteresis: float | None = None) -> dict:
+        """
+        Changes thresholds and re-evaluates every pair (current alerts keep
+        their hysteresis). Raises ValueError on out-of-range values.
+        """
+        rop_multiplier = self.rop_multiplier if rop_multiplier is None else float(rop_multiplier)
+        overstock_ratio = self.overstock_ratio if overstock_ratio is None else float(overstock_ratio)
+        hysteresis = self.hysteresis if hysteresis is None else float(hysteresis)
+        if rop_multiplier <= 0 or overstock_ratio <= 0 or not 0 <= hysteresis < 1:
+            raise ValueError("rop_multiplier and overstock_ratio must be > 0, hysteresis in [0, 1)")
+        self.rop_multiplier, self.overstock_ratio, self.hysteresis = rop_multiplier, overstock_ratio, hysteresis
+        self.rebuild()
+        return self.thresholds()
+
+    # ------------------------------------------
+    # Evaluation
+    # ------------------------------------------
+    def _states(self, level, rop, ratio, low_active, over_active):
+        """Alert states after hysteresis (works on scalars and arrays alike)."""
+        low_limit = rop * self.rop_multiplier
+        low = np.where(low_active, level < low_limit * (1 + self.hysteresis), level < low_limit)
+        over = np.where(over_active, ratio > self.overstock_ratio * (1 - self.hysteresis),
+                        ratio > self.overstock_ratio)
+        return low, over
+
+    def rebuild(self) -> None:
+        """Evaluates every pair (training attached Dynamic_ROP, or thresholds changed): O(n)."""
+        view = self._view
+        with self._lock:
+            if not view.has_dynamic_rop:
+                self.ready = False
+                return
+            slots = np.arange(len(view))
+            level = view.values(slots, 'Inventory_Level').astype(np.float64)
+            rop = view.values(slots, 'Dynamic_ROP')
+            ratio = view.values(slots, 'Overstock_Ratio')
+            low_active = np.isin(slots, self._heaps[LOW_STOCK].items())
+            over_active = np.isin(slots, self._heaps[OVERSTOCK].items())
+            low, over = self._states(level, rop, ratio, low_active, over_active)  # NaN ROP never alerts
+            self._heaps[LOW_STOCK] = IndexedHeap([((level[s], s), s) for s in np.flatnonzero(low).tolist()])
+            self._heaps[OVERSTOCK] = IndexedHeap([((-ratio[s], s), s) for s in np.flatnonzero(over).tolist()])
+            self.ready = True
+            self.version += 1
+
+    def _changed(self, slot: int | None) -> None:
+        """View listener: one pair changed (O(log n)), or all of them (None)."""
+        if slot is None:
+            self.rebuild()
+            return
+        if not self.ready:
+            return  # nothing to rank until training attaches Dynamic_ROP
+        view = self._view
+        transitions = []
+        with self._lock:
+            level = float(view.value(slot, 'Inventory_Level'))
+            rop = view.value(slot, 'Dynamic_ROP')
+            ratio = view.value(slot, 'Overstock_Ratio')
+            low_heap, over_heap = self._heaps[LOW_STOCK], self._heaps[OVERSTOCK]
+            was_low, was_over = slot in low_heap, slot in over_heap
+            low, over = self._states(level, rop, ratio, was_low, was_over)
+            for alert, heap, active, was, key in ((LOW_STOCK, low_heap, bool(low), was_low, (level, slot)),
+                                                  (OVERSTOCK, over_heap, bool(over), was_over, (-ratio, slot))):
+                if active:
+                    heap.set(slot, key)
+                elif was:
+                    heap.remove(slot)
+                if active != was:
+                    transitions.append((alert, active))
+            self.version += 1
+        if self.on_transition is not None:
+            for alert, active in transitions:
+                self.on_transition(slot, alert, active)
+
+    # ------------------------------------------
+    # Reads
+    # ------------------------------------------
+    def count(self, alert: str) -> int:
+        return len(self._heaps[alert])
+
+    def top(self, alert: str, k: int) -> list[int]:
+        """View slots of the k highest-priority active alerts of one type."""
+        with self._lock:
+            return self._heaps[alert].smallest(k)
+
+    def active(self, alert: str, slot: int) -> bool:
+        return slot in self._heaps[alert]
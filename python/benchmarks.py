@@ -0,0 +1,252 @@
+"""
+benchmarks.py — Micro-benchmarks for the API's data structures.
+Synthetic datasets are built by tiling inventory_control_tower_master.csv, with
+Product_IDs suffixed per tile so cardinality grows with the row count.
+
+Usage:  python benchmarks.py {index,records,rolling,serialization,all} [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import os
+import time
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+from inventory_store import InventoryStore  # type: ignore
+from rolling import DEFAULT_WINDOWS, rolling_demand_features  # type: ignore
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), "inventory_control_tower_master.csv")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+_base_frame = None
+
+
+def synthetic_frame(n_rows: int) -> pd.DataFrame:
+    global _base_frame
+    if _base_frame is None:
+        _base_frame = pd.read_csv(CSV_PATH)
+    tiles = -(-n_rows // len(_base_frame))
+    parts = []
+    for t in range(tiles):
+        part = _base_frame.copy()
+        if t:
+            part['Product_ID'] = part['Product_ID'] + f"-T{t}"
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True).iloc[:n_rows]
+
+
+def timed(fn, repeat: int = 1) -> float:
+    """Best-of-`repeat` wall time in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _report(title: str, rows: list[tuple]) -> None:
+    print(f"\n{title}")
+    for row in rows:
+        print("  " + " | ".join(str(c) for c in row))
+
+
+# ==========================================
+# INDEX LOOKUPS (POST /api/inventory/scan, /api/scan-item)
+# ==========================================
+def bench_index(sizes: list[int]) -> None:
+    rows = [("rows", "index build", "index lookup", "column-mask lookup", "row-walk lookup")]
+    for n in sizes:
+        store = InventoryStore.from_frame(synthetic_frame(n))
+        build = timed(lambda: store.index, repeat=1)
+        keys = list(store.categories('Product_ID')[-50:]) + ['sku_9', 'missing-id']
+
+        def lookup_all():
+            for k in keys:
+                store.index.first(k)
+
+        def mask_all():
+            for k in keys[:5]:
+                needle = k.strip().lower()
+                mask = store.category_mask('Product_ID', lambda v: v.strip().lower() == needle)
+                mask |= store.category_mask('SKU_ID', lambda v: v.strip().lower() == needle)
+                np.flatnonzero(mask)[:1]
+
+        def walk_one():
+            # What the endpoints did before the store: stringify/lower/strip per row
+            needle = keys[0].lower()
+            for pid, sid in zip(store.column('Product_ID'), store.column('SKU_ID')):
+                if str(pid).strip().lower() == needle or str(sid).strip().lower() == needle:
+                    break
+
+        per_lookup = timed(lookup_all, repeat=5) / len(keys)
+        per_mask = timed(mask_all, repeat=3) / 5
+        per_walk = timed(walk_one, repeat=1)
+        rows.append((f"{n:>9,}", f"{build * 1e3:8.1f} ms", f"{per_lookup * 1e6:7.2f} µs",
+                     f"{per_mask * 1e3:8.2f} ms", f"{per_walk * 1e3:9.1f} ms"))
+    _report("ID index lookup latency", rows)
+
+
+# ==========================================
+# ROLLING FEATURES (ml_model.train_model)
+# ==========================================
+def bench_rolling(sizes: list[int]) -> None:
+    rows = [("rows", "pairs", "groupby lambda (w=7)", "kernel (w=7)", f"kernel (w={'/'.join(map(str, DEFAULT_WINDOWS))})", "max |diff|")]
+    keys = ['Product_ID', 'Warehouse_ID']
+    for n in sizes:
+        df = synthetic_frame(n)
+        df['Date'] = pd.to_datetime(df['Date'], format='%d-%m-%Y')
+        df = df.sort_values(keys + ['Date'], ignore_index=True)
+        grouped = df.groupby(keys)['Units_Sold']
+        result = {}
+
+        def legacy():
+            result['mean'] = grouped.transform(lambda x: x.rolling(7, min_periods=1).mean())
+            result['std'] = grouped.transform(lambda x: x.rolling(7, min_periods=1).std()).fillna(0)
+
+        legacy_t = timed(legacy)
+        kernel_t = timed(lambda: result.update(new=rolling_demand_features(df, keys, windows=(7,))), repeat=3)
+        all_t = timed(lambda: rolling_demand_features(df, keys), repeat=3)
+        diff = max(np.abs(result['mean'].to_numpy() - result['new']['Rolling_7_Demand']).max(),
+                   np.abs(result['std'].to_numpy() - result['new']['Demand_Std_7']).max())
+        rows.append((f"{n:>9,}", grouped.ngroups, f"{legacy_t * 1e3:9.1f} ms", f"{kernel_t * 1e3:7.1f} ms",
+                     f"{all_t * 1e3:7.1f} ms", f"{diff:.1e}"))
+    _report("Grouped rolling mean/std", rows)
+
+
+# ==========================================
+# RESPONSE SERIALIZATION (serialization.dumps vs jsonable_encoder + json)
+# ==========================================
+def bench_serialization(sizes: list[int]) -> None:
+    import main  # type: ignore
+    from fastapi.encoders import jsonable_encoder  # type: ignore
+    from fastapi.responses import JSONResponse  # type: ignore
+    from serialization import Records, dumps  # type: ignore
+
+    def legacy(payload) -> bytes:
+        return JSONResponse(jsonable_encoder(payload)).body
+
+    rows = [("rows", "payload", "jsonable_encoder + json", "bytes", "serialization", "bytes", "speedup")]
+    for n in sizes:
+        store = InventoryStore.from_frame(synthetic_frame(n))
+        main._store, main._latest_view, main._journal = store, None, None
+        page = np.arange(min(1000, n))
+        export = np.arange(min(n, 100_000))  # the legacy path needs ~2.5 GB for 1M rows
+        cases = [
+            ("/api/inventory (1000 rows)", lambda: {"data": store.records(page)},
+             lambda: dumps({"data": Records(store.record_columns(page))})),
+            (f"export {len(export):,} rows, JSON", lambda: {"data": store.records(export)},
+             lambda: dumps({"data": Records(store.record_columns(export))})),
+            (f"export {len(export):,} rows, NDJSON", None,
+             lambda: b"".join(Records(store.record_columns(export)).ndjson())),
+        ]
+        hits, _, _, _ = store.search_index.search("sku_5")
+        cases.append(("/api/inventory/search (100 rows)", lambda: {"data": store.records(hits)},
+                      lambda: dumps({"data": Records(store.record_columns(hits))})))
+        # Small aggregate payloads: plain dicts either way
+        payload = main._dashboard_kpis()
+        cases.append(("/api/kpis", lambda: payload, lambda: dumps(payload)))
+        for name, build_legacy, encode in cases:
+            new_t = timed(encode, repeat=3)
+            new_bytes = len(encode())
+            if build_legacy is None:
+                rows.append((f"{n:>9,}", name, "-", "-", f"{new_t * 1e3:8.1f} ms", f"{new_bytes:,}", "-"))
+                continue
+            old_t = timed(lambda: legacy(build_legacy()), repeat=1)
+            old_bytes = len(legacy(build_legacy()))
+            rows.append((f"{n:>9,}", name, f"{old_t * 1e3:8.1f} ms", f"{old_bytes:,}",
+                         f"{new_t * 1e3:8.1f} ms", f"{new_bytes:,}", f"{old_t / new_t:5.1f}x"))
+    _report("Response encoding (orjson)", rows)
+
+
+# ==========================================
+# RECORD BUILDING (dashboard aggregates: iterrows vs build_records)
+# ==========================================
+def _iterrows_records(frame: pd.DataFrame, spec: dict) -> list[dict]:
+    """The per-row loop the endpoints used: a Series per row, int()/float()/round() per cell."""
+    from serialization import Field  # type: ignore
+    fields = {k: f if isinstance(f, Field) else Field(f) for k, f in spec.items()}
+    computed = {k: f.source(frame) for k, f in fields.items() if callable(f.source)}  # not charged per row
+    computed = {k: v if np.ndim(v) == 0 else np.asarray(v) for k, v in computed.items()}
+    out = []
+    for i, (_, row) in enumerate(frame.iterrows()):
+        record = {}
+        for key, f in fields.items():
+            if key in computed:
+                value = computed[key] if np.ndim(computed[key]) == 0 else computed[key][i]
+            else:
+                value = row[f.source]
+            if f.cast is int:
+                value = int(value)
+            elif f.cast is str:
+                value = str(value)
+            elif f.cast is float:
+                value = float(value)
+            record[key] = round(value, f.decimals) if f.decimals is not None else value
+        out.append(record)
+    return out
+
+
+def bench_records(sizes: list[int]) -> None:
+    import tempfile
+    import main  # type: ignore
+    import ml_model  # type: ignore
+    import serialization  # type: ignore
+    from model_registry import ModelRegistry  # type: ignore
+
+    endpoints = {
+        "/api/inventory/warehouse-stats": main.get_warehouse_stats,
+        "/api/alerts": main._alerts,
+        "/api/inventory/chart-data": main._chart_data,
+        "/api/ml/top-risk": lambda: ml_model.get_risk_rankings(top_n=10),
+        "/api/ml/selling-insights": ml_model.get_selling_insights,
+    }
+    captured: list[tuple] = []
+
+    def capturing(frame, spec):
+        captured.append((frame, spec))
+        return serialization.build_records(frame, spec)
+
+    rows = [("rows", "endpoint", "records", "iterrows loops", "build_records", "endpoint total")]
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in sizes:
+            # Serve a synthetic CSV of n rows with a model trained on it
+            path = os.path.join(workdir, f"inventory_{n}.csv")
+            synthetic_frame(n).to_csv(path, index=False)
+            main.CSV_PATH = ml_model.CSV_PATH = path
+            ml_model.TRAINING_CACHE_DIR = os.path.join(workdir, f"training_{n}")
+            ml_model._registry = ModelRegistry(os.path.join(workdir, "models"))
+            main._store = main._journal = main._latest_view = None
+            ml_model.train_model(latest=main.get_latest_view())
+
+            for name, endpoint in endpoints.items():
+                captured.clear()
+                main.build_records = ml_model.build_records = capturing
+                try:
+                    endpoint()
+                finally:
+                    main.build_records = ml_model.build_records = serialization.build_records
+                total = timed(endpoint, repeat=5)
+                calls = list(captured)
+                before = timed(lambda: [_iterrows_records(f, s) for f, s in calls], repeat=5)
+                after = timed(lambda: [serialization.build_records(f, s) for f, s in calls], repeat=5)
+                for f, s in calls:
+                    assert serialization.build_records(f, s) == _iterrows_records(f, s), name
+                rows.append((f"{n:>9,}", name, sum(len(f) for f, _ in calls), f"{before * 1e3:7.2f} ms",
+                             f"{after * 1e3:7.2f} ms", f"{total * 1e3:7.2f} ms"))
+    _report("Record building per endpoint (outputs asserted equal)", rows)
+
+
+BENCHMARKS = {
+    "index": bench_index,
+    "rolling": bench_rolling,
+    "serialization": bench_serialization,
+    "records": bench_records,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS) + ["all"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    args = parser.parse_args()
+    for name in (sorted(BENCHMARKS) if args.benchmark == "all" else [args.benchmark]):
+        BENCHMARKS[name](args.sizes)
@@ -0,0 +1,94 @@
+"""
+change_feed.py — Compact change events from the API's mutation points, streamed to dashboards.
+
+Mutations (inventory scans, alert threshold crossings, vision scans, returns,
+model retraining, engine online/offline) `publish` small dicts into one
+SequencedLog. Each SSE connection reads what it has not seen yet and sends it
+as a single batch; while a connection is busy sending (slow client) or inside
+its batching window, new events pile up in the log and are coalesced on the
+next read — repeated changes to the same pair collapse to the latest level
+with the summed delta — so a burst costs a slow client one message, not one
+per change. A client that falls further behind than the log holds is told to
+resync (refetch) instead of being sent a partial history.
+"""
+
+import asyncio
+import time
+from event_log import SSE_KEEPALIVE, SequencedLog, sse_message  # type: ignore
+from serialization import dumps  # type: ignore
+
+FEED_CAPACITY = 4_096
+BATCH_WINDOW = 0.1          # seconds between batches on one connection (sub-second freshness)
+KEEPALIVE_SECONDS = 15.0
+MAX_BATCH_EVENTS = 500      # uncoalesced events (scans / returns) per message
+
+# Event types whose newer values replace older ones, keyed by these fields
+COALESCE_KEYS = {
+    "inventory": ("product_id", "warehouse_id"),
+    "alert": ("product_id", "warehouse_id", "alert"),
+    "model": (),
+    "alert_config": (),
+    "engine": (),
+}
+
+
+def coalesce(events: list[dict]) -> list[dict]:
+    """
+    Collapses keyed events to their latest value (inventory deltas are summed),
+    keeping scans / returns in order. The result is ordered by each key's last
+    sequence id.
+    """
+    latest: dict[tuple, dict] = {}
+    for event in events:
+        kind = event["type"]
+        if kind not in COALESCE_KEYS:
+            latest[("seq", event["seq"])] = event
+            continue
+        key = (kind, *(event.get(k) for k in COALESCE_KEYS[kind]))
+        previous = latest.pop(key, None)  # re-inserted: moves to the end
+        if previous is not None and kind == "inventory":
+            event = {**event, "delta": previous.get("delta", 0) + event.get("delta", 0),
+                     "previous_level": previous.get("previous_level")}
+        latest[key] = event
+    return list(latest.values())
+
+
+class ChangeFeed:
+    """The API's change events, in publish order, with per-connection coalesced delivery."""
+
+    def __init__(self, capacity: int = FEED_CAPACITY):
+        self._log = SequencedLog(capacity)
+
+    @property
+    def last_seq(self) -> int:
+        return self._log.last_seq
+
+    def publish(self, kind: str, **fields) -> int:
+        """Appends one event (thread-safe; called from sync and async endpoints)."""
+        return self._log.append({"type": kind, "ts": round(time.time(), 3), **fields})
+
+    async def stream(self, since: int, types: set[str] | None = None,
+                     batch_window: float = BATCH_WINDOW):
+        """
+        SSE messages for one connection: `event: changes` with
+        {"seq": last id, "changes": [...]} per batch, `event: resync` when
+        events were lost, and a comment line as keep-alive when idle.
+        """
+        seq = since
+        while True:
+            if not await self._log.wait(seq, KEEPALIVE_SECONDS):
+                yield SSE_KEEPALIVE
+                continue
+            entries, truncated = self._log.since(seq, limit=MAX_BATCH_EVENTS)
+            if not entries:
+                continue
+            if truncated:
+                seq = self._log.last_seq  # the client refetches current state, then follows from here
+                yield sse_message(dumps({"seq": seq}), event_id=seq, event="resync")
+                continue
+            seq = entries[-1]["seq"]
+            changes = coalesce([e for e in entries if types is None or e["type"] in types])
+            if changes:
+                yield sse_message(dumps({"seq": seq, "changes": changes}), event_id=seq, event="changes")
+            # Batching window: whatever arrives meanwhile goes out coalesced in the next message
+            await asyncio.sleep(batch_window)
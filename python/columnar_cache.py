@@ -0,0 +1,131 @@
+"""
+columnar_cache.py — Compact on-disk column store (one raw .bin file per column
+plus a JSON manifest), written chunk by chunk and read back as memory-mapped
+NumPy arrays. Used to spill ingested/engineered data so it never has to be held
+in memory as a full DataFrame, and so restarts can skip re-parsing the CSV.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+MANIFEST = "manifest.json"
+
+
+def source_fingerprint(path: str) -> dict:
+    """Cheap identity of a source file: size + mtime (nanoseconds)."""
+    st = os.stat(path)
+    return {"path": os.path.basename(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+class ColumnarWriter:
+    """
+    Appends column chunks to a private `<directory>.tmp-*/` and atomically renames
+    the directory into place on `close()`, so readers never see a half-written
+    cache and concurrent writers (e.g. several workers starting at once) never
+    share a staging directory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        self._tmp = tempfile.mkdtemp(prefix=os.path.basename(directory) + ".tmp-", dir=parent)
+        self._files: dict[str, object] = {}
+        self._dtypes: dict[str, str] = {}
+        self.rows = 0
+
+    def append(self, columns: dict[str, np.ndarray]) -> None:
+        lengths = {len(v) for v in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError(f"Ragged chunk: column lengths {sorted(lengths)}")
+        for name, values in columns.items():
+            values = np.ascontiguousarray(values)
+            if name not in self._files:
+                if self.rows:
+                    raise ValueError(f"Column {name} first appeared after {self.rows} rows")
+                self._files[name] = open(os.path.join(self._tmp, f"{name}.bin"), 'wb')
+                self._dtypes[name] = values.dtype.str
+            elif values.dtype.str != self._dtypes[name]:
+                values = values.astype(self._dtypes[name])
+            values.tofile(self._files[name])
+        self.rows += lengths.pop()
+
+    def close(self, categories: dict[str, list] | None = None, meta: dict | None = None) -> None:
+        for f in self._files.values():
+            f.close()
+        manifest = {
+            "rows": self.rows,
+            "columns": self._dtypes,
+            "categories": {k: list(map(str, v)) for k, v in (categories or {}).items()},
+            "meta": meta or {},
+        }
+        with open(os.path.join(self._tmp, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        retired = None
+        if os.path.exists(self.directory):
+            retired = f"{self._tmp}.old"
+            try:
+                os.replace(self.directory, retired)
+            except OSError:
+                retired = None
+        try:
+            os.replace(self._tmp, self.directory)
+        except OSError:
+            # A concurrent writer published first; its copy is built from the same input
+            shutil.rmtree(self._tmp, ignore_errors=True)
+        if retired is not None:
+            shutil.rmtree(retired, ignore_errors=True)
+
+    def abort(self) -> None:
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+
+class ColumnarCache:
+    """Read side: memory-mapped columns plus categorical labels and metadata."""
+
+    def __init__(self, directory: str, mode: str = 'r'):
+        with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.directory = directory
+        self.rows: int = manifest["rows"]
+        self.meta: dict = manifest["meta"]
+        self.categories = {k: np.array(v, dtype=object) for k, v in manifest["categories"].items()}
+        self.columns: dict[str, np.ndarray] = {}
+        for name, dtype in manifest["columns"].items():
+            path = os.path.join(directory, f"{name}.bin")
+            if self.rows == 0:
+                self.columns[name] = np.empty(0, dtype=dtype)
+            else:
+                # mode 'c' = copy-on-write: callers may mutate without touching the file
+                self.columns[name] = np.memmap(path, dtype=dtype, mode=mode, shape=(self.rows,))
+
+    @classmethod
+    def open(cls, directory: str, meta_match: dict | None = None, mode: str = 'r'):
+        """Returns the cache, or None if it is missing or its meta doesn't match."""
+        if not os.path.exists(os.path.join(directory, MANIFEST)):
+            return None
+        try:
+            cache = cls(directory, mode=mode)
+        except (OSError, ValueError, KeyError, json.JSONDecodeError):
+            return None
+        for key, value in (meta_match or {}).items():
+            if cache.meta.get(key) != value:
+                return None
+        return cache
+
+    def to_frame(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """DataFrame over the mapped columns; categoricals rebuilt from codes."""
+        data = {}
+        for name in columns or list(self.columns):
+            values = self.columns[name]
+            if name in self.categories:
+                data[name] = pd.Categorical.from_codes(values, self.categories[name])
+            else:
+                data[name] = values
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,11 @@
+"""
+conftest.py — pytest setup for the backend: modules import each other flat
+(`from journal import ...`), so this directory goes on sys.path.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+collect_ignore = ["test_predict.py"]  # manual script (UTF-16), not a pytest module
@@ -1,205 +1,515 @@
+"""
+engine.py — Unified vision engine: barcode / QR scanning over one or more cameras.
+
+Runs as a pipeline so that no stage can stall another:
+
+  capture threads (one per source) ──► FrameRing (shared memory, bounded)
+        │ slot numbers                      ▲ slots released
+        ▼                                   │
+  decode pool (multiprocessing, N workers) ─┘
+        │ decoded codes per frame
+        ▼
+  scan state (in frame order per source) ─┬─► scan publisher thread ──► FastAPI
+                                          └─► ScanDatabase (debounced log) ──► database.json
+
+Capture never waits on decoding or HTTP: when every slot is in flight a live
+frame is dropped (and counted) instead of queued. Decoding scales with the
+number of worker processes. Scans and preview frames go out on the publisher's
+keep-alive session (scan_publisher.py), batched and coalesced. Workers decode candidate regions
+rather than whole frames (barcode_roi.py); the pipeline tracks those regions per
+source and adapts the enhancement-pass order from the hit rates.
+
+Usage:
+  python engine.py [SOURCE ...] [--workers N] [--api URL] [--no-display]
+  python engine.py --benchmark [--replicas 4] [--worker-counts 1 2 4]
+  python engine.py --compare-decoders
+SOURCE is a video file or a camera index (default: demo_scan.mp4).
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import threading
+import time
 import cv2  # type: ignore
 import numpy as np  # type: ignore
-from pyzbar.pyzbar import decode  # type: ignore
-import json
-from time import time as get_time
-import requests  # type: ignore
-
-# 1. Initialize Camera (Using Pre-recorded Demo Video)
-cap = cv2.VideoCapture('demo_scan.mp4')
-# Not setting fixed width/height so it respects the video's original resolution
-
-# 2. State Management
-current_scanned_part = None
-current_scanned_location = "UNASSIGNED"
-inventory_database: dict[str, dict[str, str]] = {}
-scanned_codes: set[str] = set()  # Once scanned, never re-scanned
-
-FASTAPI_URL = "http://127.0.0.1:8000/api/scan-item" 
-FRAME_POST_URL = "http://127.0.0.1:8000/api/video-frame"
-posted_parts: set[str] = set()  # Parts already sent to API
-
-# 3. Virtual Box Scanner (for Demo Video)
+from barcode_roi import PassStats, RegionTracker, RoiDecoder, compare  # type: ignore
+from frame_ring import FrameRing  # type: ignore
+from scan_database import ScanDatabase  # type: ignore
+from scan_publisher import API_URL, ScanPublisher  # type: ignore
+
+DEMO_VIDEO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "demo_scan.mp4")
+DATABASE_PATH = "database.json"
+
+# Virtual box scanner (demo video): these trigger at 25% / 50% / 75% of the file
 VIRTUAL_BARCODES = ["CHE-WH_4-SKU_45", "ELE-WH_1-SKU_3", "SKC-WH_1-SKU_1"]
-virtual_scan_display_time = 0
-last_virtual_id = ""
+VIRTUAL_DISPLAY_SECONDS = 1.5
 
-print("VISION ENGINE STARTED. Awaiting scans...")
+MAX_SIDE = 1280                        # frames are downscaled to fit (4K phone video)
+SLOT_BYTES = MAX_SIDE * MAX_SIDE * 3   # one BGR frame at the max size
+PREVIEW_FPS = 25                       # annotated frames streamed to the dashboard
+JPEG_QUALITY = 70
+
+
+# ==========================================
+# DECODE (runs in the worker processes)
+# ==========================================
+_worker_ring: FrameRing | None = None
+_worker_decoder: RoiDecoder | None = None
+
+
+def _init_worker(name: str, slots: int, slot_bytes: int) -> None:
+    global _worker_ring, _worker_decoder
+    _worker_ring = FrameRing.attach(name, slots, slot_bytes)
+    _worker_decoder = RoiDecoder()
+
+
+def decode_task(task: dict) -> dict:
+    """
+    Decodes the frame in the task's ring slot: the candidate regions (plus the
+    tracked `rois`, minus `skip`), escalating through `passes`, with a
+    full-frame sweep when `full_sweep`. Returns the task plus its codes.
+    """
+    started = time.process_time()
+    frame = _worker_ring.view(task["slot"], task["shape"])
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    result = _worker_decoder.decode(gray, task["rois"], task["skip"], task["passes"], task["full_sweep"])
+    return {**task, **result, "cpu": time.process_time() - started}
 
-import time
 
-while True:
-    ret, frame = cap.read()
-    
-    # If the video ended, loop it back to frame 0
-    if not ret:
-        print("--- DEMO VIDEO LOOPING ---")
-        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-        # Clear the scan caches so it can re-scan the codes in the video!
-        scanned_codes.clear()
-        posted_parts.clear()
-        continue
-        
-    # Slow the video processing to natural 25-30 fps
-    time.sleep(0.04)
-    
-    # Keep the original frame for scanning
-    scannable_frame = frame.copy()
-    
-    # Let's resize it slightly if it's a massive 4K phone video so it fits on screen nicely
-    height, width, _ = frame.shape
-    if width > 1280 or height > 1280:
-        scale = 1280 / max(width, height)
-        scannable_frame = cv2.resize(scannable_frame, (0,0), fx=scale, fy=scale)
-        frame = cv2.resize(frame, (0,0), fx=scale, fy=scale)
-        
-    # We DO NOT flip the frame for a pre-recorded video since phone cameras record normally
-    # frame = cv2.flip(frame, 1)
-    
-    height, width, _ = frame.shape
-
-    # ==========================================
-    # BARCODE / QR SCANNER
-    # ==========================================
-    gray_frame = cv2.cvtColor(scannable_frame, cv2.COLOR_BGR2GRAY)
-    
-    # Multi-pass decoding for better detection
-    detected_codes = decode(gray_frame)
-    
-    if not detected_codes:
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(gray_frame)
-        detected_codes = decode(enhanced)
-    
-    if not detected_codes:
-        _, thresh = cv2.threshold(gray_frame, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        detected_codes = decode(thresh)
-
-    for code in detected_codes:
-        data = code.data.decode('utf-8')
-        code_type = code.type
-
-        # Build unique ID
-        raw_id = data if data.startswith(("LOC-", "PART-")) else f"{code_type}-{data}"
-
-        # Skip if already scanned (permanent — no rescan)
-        if raw_id in scanned_codes:
-            continue
-        scanned_codes.add(raw_id)
-        
-        # Draw on the frame (no flipping needed since we didn't mirror it)
-        pts = np.array([code.polygon], np.int32)
-        cv2.polylines(frame, [pts], True, (0, 255, 0), 3)
-        
-        text_x = width - code.rect.left - code.rect.width
-        
-        if data.startswith("LOC-"):
-            current_scanned_location = data
-            cv2.putText(frame, f"SET LOC: {data}", (text_x, code.rect.top - 10), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-        else:
+# ==========================================
+# CAPTURE (one thread per source)
+# ==========================================
+class CaptureThread(threading.Thread):
+    """
+    Reads one source into the ring and submits each frame for decoding.
+    Video files are paced to their own frame rate when `realtime` and looped
+    when `loop`; with `lossless` the thread waits for a free slot instead of
+    dropping the frame.
+    """
+
+    def __init__(self, source_id: int, source, pipeline: "VisionPipeline", realtime: bool = True,
+                 loop: bool = True, lossless: bool = False):
+        super().__init__(name=f"capture-{source_id}", daemon=True)
+        self.source_id = source_id
+        self.source = source
+        self.pipeline = pipeline
+        self.realtime = realtime
+        self.loop = loop
+        self.lossless = lossless
+        self.captured = 0
+        self.dropped = 0
+
+    def run(self) -> None:
+        cap = cv2.VideoCapture(self.source)
+        is_file = not isinstance(self.source, int)
+        interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 25.0) if is_file and self.realtime else 0.0
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if is_file else 0
+        triggers = {int(total_frames * f): part for f, part in zip((0.25, 0.50, 0.75), VIRTUAL_BARCODES)} \
+            if total_frames > 0 else {}
+        next_preview = 0.0
+        next_frame = time.perf_counter()
+        try:
+            while not self.pipeline.stopping.is_set():
+                ok, frame = cap.read()
+                if not ok:
+                    if not (is_file and self.loop):
+                        break
+                    print(f"--- SOURCE {self.source_id} LOOPING ---")
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    self.pipeline.submit_marker(self.source_id, "loop")
+                    continue
+                if interval:
+                    # Natural playback speed for files; cameras deliver at their own rate
+                    next_frame += interval
+                    delay = next_frame - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        next_frame = time.perf_counter()
+                self.captured += 1
+                # Looked up before a slot is taken: a trigger must reach the scan state even
+                # when its frame would otherwise be dropped
+                virtual = triggers.get(int(cap.get(cv2.CAP_PROP_POS_FRAMES)))
+
+                height, width = frame.shape[:2]
+                if width > MAX_SIDE or height > MAX_SIDE:
+                    scale = MAX_SIDE / max(width, height)
+                    frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale)
+                slot = self.pipeline.ring.acquire()
+                # Lossless sources, and frames carrying a virtual scan, wait for a slot
+                while slot is None and (self.lossless or virtual) and not self.pipeline.stopping.is_set():
+                    slot = self.pipeline.ring.acquire(block=True, timeout=0.5)
+                if slot is None:
+                    self.dropped += 1  # every slot busy: skip this frame rather than stall the camera
+                    continue
+                now = time.perf_counter()
+                preview = self.source_id == 0 and self.pipeline.preview_enabled and now >= next_preview
+                if preview:
+                    next_preview = now + 1.0 / PREVIEW_FPS
+                self.pipeline.submit_frame(self.source_id, slot, self.pipeline.ring.write(slot, frame),
+                                           preview=preview, virtual=virtual)
+        finally:
+            cap.release()
+
+
+# ==========================================
+# SCAN STATE (frame order per source)
+# ==========================================
+class _SourceState:
+    __slots__ = ("next_seq", "pending", "location", "part", "scanned", "posted",
+                 "virtual_shown_at", "virtual_id")
+
+    def __init__(self):
+        self.next_seq = 0
+        self.pending: dict[int, dict] = {}
+        self.location = "UNASSIGNED"
+        self.part: str | None = None
+        self.scanned: set[str] = set()   # once scanned, never re-scanned (until the video loops)
+        self.posted: set[str] = set()    # parts already sent to the API
+        self.virtual_shown_at = 0.0
+        self.virtual_id = ""
+
+
+class ScanState(threading.Thread):
+    """
+    Applies decode results to the scan state in capture order (results come
+    back from the pool out of order): location / part assignment, the shared
+    inventory database and the virtual scanner. Annotates preview frames,
+    then releases their slots, and hands everything outbound to the publisher.
+    """
+
+    def __init__(self, pipeline: "VisionPipeline", publisher: ScanPublisher, database: ScanDatabase):
+        super().__init__(name="scan-state", daemon=True)
+        self.pipeline = pipeline
+        self.publisher = publisher
+        self.database = database
+        self.results: queue.Queue[dict | None] = queue.Queue()
+        self._sources: dict[int, _SourceState] = {}
+        self.processed = 0
+
+    def run(self) -> None:
+        while True:
+            result = self.results.get()
+            if result is None:
+                return
+            state = self._sources.setdefault(result["source"], _SourceState())
+            state.pending[result["seq"]] = result
+            while state.next_seq in state.pending:
+                self._apply(state, state.pending.pop(state.next_seq))
+                state.next_seq += 1
+
+    def _apply(self, state: _SourceState, result: dict) -> None:
+        if result.get("marker") == "loop":
+            # Clear the scan caches so the looped video can re-scan its codes
+            state.scanned.clear()
+            state.posted.clear()
+            return
+        self.processed += 1
+        frame = (self.pipeline.ring.view(result["slot"], result["shape"])
+                 if result.get("preview") and "slot" in result else None)
+        for code in result.get("codes", ()):
+            data, code_type = code["data"], code["type"]
+            raw_id = data if data.startswith(("LOC-", "PART-")) else f"{code_type}-{data}"
+            if raw_id in state.scanned:
+                continue
+            state.scanned.add(raw_id)
+            if frame is not None:
+                left, top, width, _ = code["rect"]
+                cv2.polylines(frame, [np.array([code["polygon"]], np.int32)], True, (0, 255, 0), 3)
+                text_x = frame.shape[1] - left - width
+            if data.startswith("LOC-"):
+                state.location = data
+                if frame is not None:
+                    cv2.putText(frame, f"SET LOC: {data}", (text_x, top - 10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+                continue
             part_id = data if data.startswith("PART-") else f"{code_type}-{data}"
-            current_scanned_part = part_id
-            
+            state.part = part_id
             print(f"[SCAN] New item: {part_id} (Type: {code_type})")
-            
-            cv2.putText(frame, f"SCANNED: {part_id}", (text_x, code.rect.top - 10), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 255), 2)
-                                        
-            if current_scanned_part is not None:
-                assert isinstance(current_scanned_part, str)
-                
-                if current_scanned_part not in inventory_database:
-                    inventory_database[current_scanned_part] = {
-                        "assigned_location": current_scanned_location,
-                        "physical_location": "SCANNED",
-                        "status": "LOGGED",
-                        "detected_shape": "N/A"
-                    }
-
-    # ==========================================
-    # VIRTUAL BOX SCANNER (Triggers by Video Frame %)
-    # ==========================================
-    # Read current frame position
-    frame_index = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    
-    if total_frames > 0:
-        # Trigger the 3 barcodes at roughly 25%, 50%, and 75% through the video
-        trigger_frames = [
-            int(total_frames * 0.25),
-            int(total_frames * 0.50),
-            int(total_frames * 0.75)
-        ]
-        
-        if frame_index in trigger_frames:
-            part_id = VIRTUAL_BARCODES[trigger_frames.index(frame_index)]
-            raw_id = f"VIRTUAL-{part_id}"
-            
-            if raw_id not in scanned_codes:
-                scanned_codes.add(raw_id)
-                current_scanned_part = part_id
-                print(f"[VIRTUAL SCAN] Box passing! Assigned: {part_id}")
-                
-                virtual_scan_display_time = time.time()
-                last_virtual_id = part_id
-                
-                if current_scanned_part not in inventory_database:
-                    inventory_database[current_scanned_part] = {
-                        "assigned_location": current_scanned_location,
-                        "physical_location": "SCANNED",
-                        "status": "LOGGED",
-                        "detected_shape": "BOX"
-                    }
-                    
-    # Draw the virtual barcode box for 1.5 seconds after a trigger
-    if time.time() - virtual_scan_display_time < 1.5 and last_virtual_id:
-        cx, cy = width // 2, height // 2
-        cv2.rectangle(frame, (cx-90, cy-90), (cx+90, cy+90), (0, 255, 0), 4)
-        cv2.putText(frame, f"SCANNED: {last_virtual_id}", (cx-90, cy-100), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
-
-
-    # ==========================================
-    # POST SCAN TO FASTAPI (once per part, permanently)
-    # ==========================================
-    if current_scanned_part is not None and current_scanned_part in inventory_database:
-        if current_scanned_part not in posted_parts:
-            now = get_time()
-            part_data_to_post: dict[str, str] = inventory_database[current_scanned_part] # type: ignore
-            try:
-                payload = {
-                    "part_id": current_scanned_part,
-                    "assigned_location": part_data_to_post.get("assigned_location", "UNASSIGNED"),
-                    "physical_location": part_data_to_post.get("physical_location", "SCANNED"),
-                    "status": part_data_to_post.get("status", "LOGGED"),
-                    "detected_shape": "N/A"
-                }
-                requests.post(FASTAPI_URL, json=payload, timeout=0.5)
-                posted_parts.add(current_scanned_part)
-            except Exception:
-                pass
-
-    # Save to database.json
-    try:
-        with open('database.json', 'w') as f:
-            json.dump(inventory_database, f, indent=4)
-    except Exception:
-        pass
+            if frame is not None:
+                cv2.putText(frame, f"SCANNED: {part_id}", (text_x, top - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 255), 2)
+            self._log_part(state, part_id, "N/A")
+
+        part_id = result.get("virtual")
+        if part_id and f"VIRTUAL-{part_id}" not in state.scanned:
+            state.scanned.add(f"VIRTUAL-{part_id}")
+            state.part = part_id
+            print(f"[VIRTUAL SCAN] Box passing! Assigned: {part_id}")
+            state.virtual_shown_at, state.virtual_id = time.time(), part_id
+            self._log_part(state, part_id, "BOX")
+
+        # Post the current part to FastAPI (once per part, until the source loops)
+        if state.part is not None and state.part in self.database and state.part not in state.posted:
+            state.posted.add(state.part)
+            record = self.database.get(state.part)
+            self.publisher.post_scan({
+                "part_id": state.part,
+                "assigned_location": record.get("assigned_location", "UNASSIGNED"),
+                "physical_location": record.get("physical_location", "SCANNED"),
+                "status": record.get("status", "LOGGED"),
+                "detected_shape": "N/A",
+            })
+
+        if frame is not None:
+            # Draw the virtual barcode box for a moment after a trigger
+            if time.time() - state.virtual_shown_at < VIRTUAL_DISPLAY_SECONDS and state.virtual_id:
+                cx, cy = frame.shape[1] // 2, frame.shape[0] // 2
+                cv2.rectangle(frame, (cx - 90, cy - 90), (cx + 90, cy + 90), (0, 255, 0), 4)
+                cv2.putText(frame, f"SCANNED: {state.virtual_id}", (cx - 90, cy - 100),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
+            ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+            self.pipeline.ring.release(result["slot"])
+            if ok:
+                self.publisher.post_frame(jpeg.tobytes())
+
+    def _log_part(self, state: _SourceState, part_id: str, shape: str) -> bool:
+        """Adds a first-seen part (in memory; ScanDatabase persists it in the background)."""
+        if part_id in self.database:
+            return False
+        return self.database.put(part_id, {
+            "assigned_location": state.location,
+            "physical_location": "SCANNED",
+            "status": "LOGGED",
+            "detected_shape": shape,
+        })
+
+
+# ==========================================
+# PIPELINE
+# ==========================================
+class VisionPipeline:
+    """Wires the ring, decode pool, capture threads, scan state and publisher together."""
+
+    def __init__(self, sources: list, workers: int | None = None, realtime: bool = True, loop: bool = True,
+                 lossless: bool = False, publish: bool = True, preview: bool = True, api_url: str = API_URL,
+                 database_path: str = DATABASE_PATH):
+        self.sources = sources
+        self.workers = workers or max(os.cpu_count() or 1, 1)
+        self.preview_enabled = preview
+        # Two slots per worker keeps every worker busy while results drain
+        self.ring = FrameRing(slots=2 * self.workers + len(sources), slot_bytes=SLOT_BYTES)
+        self.stopping = threading.Event()
+        self.pool = multiprocessing.get_context("spawn").Pool(
+            self.workers, initializer=_init_worker, initargs=(self.ring.name, self.ring.slots, self.ring.slot_bytes))
+        self.publisher = ScanPublisher(api_url, enabled=publish)
+        self.database = ScanDatabase(database_path if publish else None)
+        self.state = ScanState(self, self.publisher, self.database)
+        self.captures = [CaptureThread(i, src, self, realtime=realtime, loop=loop, lossless=lossless)
+                         for i, src in enumerate(sources)]
+        self._seq = [0] * len(sources)
+        self.trackers = [RegionTracker() for _ in sources]
+        self.pass_stats = PassStats()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.decoded = 0
+        self.decode_cpu = 0.0
+        self.errors = 0
+
+    def _next_seq(self, source_id: int) -> int:
+        with self._lock:
+            seq = self._seq[source_id]
+            self._seq[source_id] += 1
+            return seq
+
+    def submit_frame(self, source_id: int, slot: int, shape, preview: bool = False, virtual: str | None = None):
+        seq = self._next_seq(source_id)
+        with self._lock:
+            rois, skip = self.trackers[source_id].hints(seq)
+            passes = self.pass_stats.order_for(seq)
+            self._in_flight += 1
+        task = {"source": source_id, "seq": seq, "slot": slot, "shape": shape, "preview": preview,
+                "virtual": virtual, "rois": rois, "skip": skip, "passes": passes,
+                "full_sweep": RegionTracker.full_sweep(seq)}
+        self.pool.apply_async(decode_task, (task,), callback=self._done,
+                              error_callback=lambda exc, task=task: self._failed(task, exc))
+
+    def submit_marker(self, source_id: int, marker: str) -> None:
+        self.state.results.put({"source": source_id, "seq": self._next_seq(source_id), "marker": marker})
+
+    def _done(self, result: dict) -> None:
+        # Runs on the pool's result thread: keep it short
+        if not result["preview"]:
+            self.ring.release(result["slot"])
+        with self._lock:
+            self._in_flight -= 1
+            self.decoded += 1
+            self.decode_cpu += result["cpu"]
+            self.trackers[result["source"]].update(result["seq"], result["regions"])
+            self.pass_stats.merge(result["attempts"])
+        self.state.results.put(result)
+
+    def _failed(self, task: dict, exc: BaseException) -> None:
+        print(f"⚠️ Decode failed for source {task['source']} frame {task['seq']}: {exc}")
+        self.ring.release(task["slot"])
+        with self._lock:
+            self._in_flight -= 1
+            self.errors += 1
+        self.state.results.put({**task, "preview": False, "codes": []})  # keep the sequence gap-free
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def start(self) -> None:
+        restored = self.database.open()
+        if restored:
+            print(f"📂 Restored {restored} parts from {self.database.path}")
+        self.publisher.start()
+        self.state.start()
+        for capture in self.captures:
+            capture.start()
+
+    def run(self, display: bool = False, duration: float | None = None) -> None:
+        """Runs until 'q' (display), Ctrl-C, `duration` seconds, or every source has ended."""
+        self.start()
+        deadline = None if duration is None else time.perf_counter() + duration
+        try:
+            while any(c.is_alive() for c in self.captures) or self.in_flight:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                if display:
+                    cv2.waitKey(1)
+                time.sleep(0.05)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        self.stopping.set()
+        for capture in self.captures:
+            capture.join()
+        self.pool.close()
+        self.pool.join()
+        self.state.results.put(None)
+        self.state.join()
+        self.publisher.close()
+        self.database.close()
+        self.publisher.join()
+        self.ring.close()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "captured": sum(c.captured for c in self.captures),
+            "dropped": sum(c.dropped for c in self.captures),
+            "decoded": self.decoded,
+            "decode_cpu_seconds": round(self.decode_cpu, 3),
+            "errors": self.errors,
+            "passes": self.pass_stats.report(),
+            "publisher": self.publisher.stats(),
+        }
+
+
+# ==========================================
+# BENCHMARK
+# ==========================================
+def benchmark(replicas: int, worker_counts: list[int], video: str = DEMO_VIDEO) -> None:
+    """
+    Decodes `replicas` copies of the demo video (one pass each, as fast as
+    possible, no frame dropped, no network) and reports frames/sec overall,
+    per worker process and per decode-CPU-second.
+    """
+    print(f"\nDecode throughput: {replicas} x {os.path.basename(video)}, {os.cpu_count()} CPUs")
+    print("  workers | frames | wall s | fps | fps / worker | frames / CPU s")
+    for workers in worker_counts:
+        pipeline = VisionPipeline([video] * replicas, workers=workers, realtime=False, loop=False,
+                                  lossless=True, publish=False, preview=False)
+        started = time.perf_counter()
+        pipeline.run()
+        wall = time.perf_counter() - started
+        s = pipeline.stats()
+        fps = s["decoded"] / wall if wall else 0.0
+        per_cpu = s["decoded"] / s["decode_cpu_seconds"] if s["decode_cpu_seconds"] else 0.0
+        print(f"  {workers:7d} | {s['decoded']:6d} | {wall:6.1f} | {fps:6.1f} | {fps / workers:12.1f} | {per_cpu:14.1f}")
+
+
+def compare_decoders(video: str = DEMO_VIDEO) -> None:
+    """
+    One process, every frame of `video`: the original full-frame multi-pass
+    decode against the ROI decoder with tracking. Reports fps for each and the
+    ROI decoder's recall of the distinct codes the full-frame decoder found.
+    """
+    frames = []
+    cap = cv2.VideoCapture(video)
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        height, width = frame.shape[:2]
+        if width > MAX_SIDE or height > MAX_SIDE:
+            scale = MAX_SIDE / max(width, height)
+            frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale)
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    cap.release()
+
+    result = compare(frames)
+    print(f"\nDecoder comparison: {result['frames']} frames of {os.path.basename(video)}")
+    print(f"  full-frame: {result['full_fps']:7.1f} fps, {len(result['baseline'])} distinct codes")
+    print(f"  ROI:        {result['roi_fps']:7.1f} fps, {len(result['found'])} distinct codes "
+          f"({result['speedup']:.1f}x, recall {result['recall']:.0%})")
+    for name, row in result['passes'].items():
+        print(f"  {name}: {row}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="*", help="video files or camera indexes")
+    parser.add_argument("--workers", type=int, default=None, help="decode processes (default: CPU count)")
+    parser.add_argument("--api", default=API_URL, help="FastAPI base URL")
+    parser.add_argument("--no-display", action="store_true", help="don't open a preview window")
+    parser.add_argument("--benchmark", action="store_true", help="measure decode throughput and exit")
+    parser.add_argument("--compare-decoders", action="store_true", help="full-frame vs ROI decoding on the demo video")
+    parser.add_argument("--replicas", type=int, default=4, help="benchmark: copies of the demo video")
+    parser.add_argument("--worker-counts", type=int, nargs="+", default=None, help="benchmark: pool sizes to try")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        cpus = os.cpu_count() or 1
+        counts = args.worker_counts or sorted({1, max(cpus // 2, 1), cpus})
+        benchmark(args.replicas, counts)
+        return
+    if args.compare_decoders:
+        compare_decoders()
+        return
+
+    sources = [int(s) if s.isdigit() else s for s in args.sources] or [DEMO_VIDEO]
+    pipeline = VisionPipeline(sources, workers=args.workers, api_url=args.api)
+    print(f"VISION ENGINE STARTED ({len(sources)} source(s), {pipeline.workers} decode workers). Awaiting scans...")
+    if args.no_display:
+        pipeline.run()
+    else:
+        _run_with_window(pipeline)
+    print(f"📊 {pipeline.stats()}")
+
+
+def _run_with_window(pipeline: VisionPipeline) -> None:
+    """Shows the annotated preview stream (from the publisher's frames) until 'q'."""
+    latest: dict[str, bytes] = {}
+    post_frame = pipeline.publisher.post_frame
+
+    def tee(jpeg: bytes) -> None:
+        latest["frame"] = jpeg
+        post_frame(jpeg)
 
-    # ==========================================
-    # STREAM FRAME TO BROWSER VIA FASTAPI
-    # ==========================================
+    pipeline.publisher.post_frame = tee
+    pipeline.start()
     try:
-        _, jpeg_buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-        requests.post(FRAME_POST_URL, data=jpeg_buf.tobytes(),
-                      headers={"Content-Type": "image/jpeg"}, timeout=0.3)
-    except Exception:
+        while any(c.is_alive() for c in pipeline.captures):
+            jpeg = latest.pop("frame", None)
+            if jpeg is not None:
+                cv2.imshow("Unified Vision Engine", cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR))
+            if cv2.waitKey(15) & 0xFF == ord('q'):
+                break
+    except KeyboardInterrupt:
         pass
+    finally:
+        pipeline.stop()
+        cv2.destroyAllWindows()
 
-    cv2.imshow("Unified Vision Engine", frame)
-    
-    if cv2.waitKey(1) & 0xFF == ord('q'): break
 
-cap.release()
-cv2.destroyAllWindows()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+event_log.py — Fixed-capacity ring of log entries with monotonically increasing sequence ids.
+
+Appending is O(1) (one slot overwritten, nothing shifted) and memory is bounded
+by the capacity. Readers remember the last sequence id they saw and ask only
+for what came after it, so an idle poll returns an empty list instead of the
+whole log; async readers can instead wait (long-poll / SSE) until something
+is appended. Appends may come from any thread — the sync endpoints run in
+FastAPI's threadpool — and wake waiters on their own event loops.
+"""
+
+import asyncio
+import threading
+
+
+# ==========================================
+# SEQUENCED LOG
+# ==========================================
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class SequencedLog:
+    """
+    The last `capacity` entries (dicts), each stamped with a "seq" field.
+    Sequence ids start at 1; `last_seq` is 0 while the log is empty.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._slots: list[dict | None] = [None] * capacity
+        self._last_seq = 0
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def __len__(self) -> int:
+        """Entries currently held (at most `capacity`)."""
+        return min(self._last_seq, self.capacity)
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    @property
+    def total(self) -> int:
+        """Entries ever appended (older ones may have been overwritten)."""
+        return self._last_seq
+
+    def append(self, entry: dict) -> int:
+        with self._lock:
+            self._last_seq += 1
+            seq = self._last_seq
+            self._slots[seq % self.capacity] = {**entry, "seq": seq}
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+        return seq
+
+    def since(self, seq: int = 0, limit: int | None = None) -> tuple[list[dict], bool]:
+        """
+        Entries with a sequence id above `seq`, oldest first (at most `limit`,
+        the oldest ones). `truncated` is True when entries after `seq` were
+        already overwritten — the reader fell more than `capacity` behind.
+        """
+        with self._lock:
+            last = self._last_seq
+            first = max(seq + 1, last - self.capacity + 1, 1)
+            truncated = first > seq + 1 and seq < last
+            if limit is not None:
+                last = min(last, first + limit - 1)
+            entries = [self._slots[s % self.capacity] for s in range(first, last + 1)]
+        return entries, truncated
+
+    def latest(self, n: int | None = None) -> list[dict]:
+        """The newest `n` entries (default: all held), newest first."""
+        with self._lock:
+            last = self._last_seq
+            n = len(self) if n is None else min(n, len(self))
+            return [self._slots[s % self.capacity] for s in range(last, last - n, -1)]
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """Waits until an entry after `seq` exists; False on timeout."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._last_seq > seq:
+                return True
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+
+
+# ==========================================
+# SERVER-SENT EVENTS
+# ==========================================
+SSE_MEDIA_TYPE = "text/event-stream"
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # no proxy buffering
+SSE_KEEPALIVE = b": keep-alive\n\n"
+
+
+def sse_message(data: bytes, event_id: int | None = None, event: str | None = None) -> bytes:
+    """One SSE message; `data` is a single line of JSON."""
+    head = b""
+    if event_id is not None:
+        head += b"id: %d\n" % event_id
+    if event is not None:
+        head += b"event: " + event.encode() + b"\n"
+    return head + b"data: " + data + b"\n\n"
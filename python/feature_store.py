@@ -0,0 +1,176 @@
+"""
+feature_store.py — Incremental rolling-demand features per (Product_ID, Warehouse_ID).
+Keeps a ring buffer of the last max(windows) daily Units_Sold values plus running
+sum and sum of squares per window for each pair, so appending a day (or adding
+units to the current day) updates every Rolling_<w>_Demand / Demand_Std_<w> in O(1).
+"""
+
+import math
+import threading
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+from rolling import DEFAULT_WINDOWS, feature_names, rolling_demand_features  # type: ignore
+
+
+class _PairState:
+    __slots__ = ("ring", "pos", "count", "totals", "totals_sq", "last_date")
+
+    def __init__(self, capacity: int, n_windows: int):
+        self.ring = [0.0] * capacity
+        self.pos = 0          # slot the next value goes into
+        self.count = 0        # values seen, capped at capacity
+        self.totals = [0.0] * n_windows
+        self.totals_sq = [0.0] * n_windows
+        self.last_date = None
+
+
+class RollingFeatureStore:
+    """
+    Rolling mean / sample std over the last `w` rows of each pair for every
+    window in `windows`, matching `groupby(...).rolling(w, min_periods=1)` with
+    std NaN -> 0.
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.windows = tuple(windows)
+        self.capacity = max(self.windows)
+        self._names = [feature_names(w) for w in self.windows]
+        self._pairs: dict[tuple[str, str], _PairState] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self._pairs
+
+    def _state(self, key: tuple[str, str]) -> _PairState:
+        state = self._pairs.get(key)
+        if state is None:
+            state = self._pairs[key] = _PairState(self.capacity, len(self.windows))
+        return state
+
+    # ------------------------------------------
+    # O(1) updates (per window)
+    # ------------------------------------------
+    def _push(self, state: _PairState, value: float) -> None:
+        for i, w in enumerate(self.windows):
+            if state.count >= w:
+                old = state.ring[(state.pos - w) % self.capacity]
+                state.totals[i] -= old
+                state.totals_sq[i] -= old * old
+            state.totals[i] += value
+            state.totals_sq[i] += value * value
+        state.ring[state.pos] = value
+        state.pos = (state.pos + 1) % self.capacity
+        state.count = min(state.count + 1, self.capacity)
+
+    def _bump_latest(self, state: _PairState, units: float) -> None:
+        slot = (state.pos - 1) % self.capacity
+        old = state.ring[slot]
+        new = old + units
+        state.ring[slot] = new
+        for i in range(len(self.windows)):
+            state.totals[i] += new - old
+            state.totals_sq[i] += new * new - old * old
+
+    def _stats(self, state: _PairState) -> dict[str, float]:
+        out = {}
+        for i, w in enumerate(self.windows):
+            mean_name, std_name = self._names[i]
+            n = min(state.count, w)
+            if n == 0:
+                out[mean_name], out[std_name] = 0.0, 0.0
+                continue
+            total = state.totals[i]
+            out[mean_name] = total / n
+            var = (state.totals_sq[i] - total * total / n) / (n - 1) if n > 1 else 0.0
+            out[std_name] = math.sqrt(var) if var > 0 else 0.0
+        return out
+
+    def append(self, product_id: str, warehouse_id: str, units: float, date=None) -> dict[str, float]:
+        """Adds a new daily observation for the pair; returns its updated features."""
+        with self._lock:
+            state = self._state((product_id, warehouse_id))
+            self._push(state, float(units))
+            state.last_date = date
+            return self._stats(state)
+
+    def add_units(self, product_id: str, warehouse_id: str, units: float, date) -> dict[str, float]:
+        """
+        Adds units sold on `date`: folded into the newest slot when it is the same
+        day, otherwise opens a new day in the window.
+        """
+        with self._lock:
+            state = self._state((product_id, warehouse_id))
+            if state.count and state.last_date == date:
+                self._bump_latest(state, float(units))
+            else:
+                self._push(state, float(units))
+                state.last_date = date
+            return self._stats(state)
+
+    def features(self, product_id: str, warehouse_id: str) -> dict[str, float] | None:
+        """Current rolling features for the pair, or None if unseen."""
+        with self._lock:
+            state = self._pairs.get((product_id, warehouse_id))
+            return None if state is None else self._stats(state)
+
+    def features_many(self, keys: list[tuple[str, str]]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Rolling features for many pairs under one lock: an (n, 2 * len(windows))
+        matrix in feature_names() order per window, and a mask of pairs found.
+        """
+        out = np.zeros((len(keys), 2 * len(self.windows)))
+        found = np.zeros(len(keys), dtype=bool)
+        with self._lock:
+            for i, key in enumerate(keys):
+                state = self._pairs.get(key)
+                if state is None:
+                    continue
+                stats = self._stats(state)
+                out[i] = [stats[name] for pair in self._names for name in pair]
+                found[i] = True
+        return out, found
+
+    # ------------------------------------------
+    # Bulk ingestion
+    # ------------------------------------------
+    def ingest(self, df: pd.DataFrame, value_col: str = 'Units_Sold') -> dict[str, np.ndarray]:
+        """
+        Computes per-row features for a frame sorted by Product_ID, Warehouse_ID,
+        Date with the vectorized kernels, then seeds the window state from it.
+        """
+        features = rolling_demand_features(df, ['Product_ID', 'Warehouse_ID'], value_col, self.windows)
+        self.seed(df, value_col)
+        return features
+
+    def seed(self, df: pd.DataFrame, value_col: str = 'Units_Sold') -> None:
+        """
+        (Re)builds each pair's window state from the last rows of a frame sorted by
+        Product_ID, Warehouse_ID, Date — a per-pair step, not per-row.
+        """
+        if df.empty:
+            return
+        keys = ['Product_ID', 'Warehouse_ID']
+        tail = df.groupby(keys, sort=False, observed=True).tail(self.capacity)
+        groups = tail.groupby(keys, sort=False, observed=True).ngroup().to_numpy()
+        bounds = np.flatnonzero(np.diff(groups)) + 1
+        products = tail['Product_ID'].to_numpy()
+        warehouses = tail['Warehouse_ID'].to_numpy()
+        dates = tail['Date'].to_numpy().astype('datetime64[D]') if 'Date' in tail else None
+        values = tail[value_col].to_numpy(dtype=np.float64)
+        with self._lock:
+            for start, end in zip(np.append(0, bounds), np.append(bounds, len(tail))):
+                state = _PairState(self.capacity, len(self.windows))
+                window_values = values[start:end].tolist()
+                k = len(window_values)
+                state.ring[:k] = window_values
+                state.pos, state.count = k % self.capacity, k
+                for i, w in enumerate(self.windows):
+                    seg = window_values[-w:]
+                    state.totals[i] = sum(seg)
+                    state.totals_sq[i] = sum(v * v for v in seg)
+                if dates is not None:
+                    state.last_date = dates[end - 1]
+                self._pairs[(products[start], warehouses[start])] = state
@@ -0,0 +1,102 @@
+"""
+forecast_table.py — Precomputed daily demand forecasts per (Product_ID, Warehouse_ID).
+
+Generated once per training run: every known pair is scored for each day of the
+horizon in a single forest pass, with that day's real Month / DayOfWeek. The
+result is a (pairs x days) float32 matrix plus its per-row prefix sums, so any
+day range of any pair (or of all pairs at once) is answered from the arrays
+without touching the model at request time.
+"""
+
+import numpy as np  # type: ignore
+
+DEFAULT_HORIZON_DAYS = 30
+
+
+class ForecastTable:
+    """
+    Daily forecasts for `horizon` days starting at `start` (day 0). Ranges are
+    half-open day offsets [first, first + days) clipped to the horizon.
+    `lead_time` is the supplier lead time each pair was forecast with.
+    """
+
+    def __init__(self, products: np.ndarray, warehouses: np.ndarray, start: np.datetime64,
+                 demand: np.ndarray, lead_time: np.ndarray | None = None, fingerprint: str | None = None):
+        self.products = np.asarray(products, dtype=object)
+        self.warehouses = np.asarray(warehouses, dtype=object)
+        self.start = np.datetime64(start, 'D')
+        self.demand = np.asarray(demand, dtype=np.float32)
+        self.lead_time = (np.zeros(len(self.demand)) if lead_time is None
+                          else np.asarray(lead_time, dtype=np.float64))
+        self.fingerprint = fingerprint
+        self._cumulative = np.zeros((len(self.demand), self.horizon + 1))
+        np.cumsum(self.demand, axis=1, out=self._cumulative[:, 1:])
+        self._slots = {(str(p), str(w)): i for i, (p, w) in enumerate(zip(self.products, self.warehouses))}
+
+    def __len__(self) -> int:
+        return len(self.demand)
+
+    @property
+    def horizon(self) -> int:
+        return self.demand.shape[1]
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self.start + np.arange(self.horizon)
+
+    def slot(self, product_id: str, warehouse_id: str) -> int | None:
+        return self._slots.get((product_id, warehouse_id))
+
+    def _bounds(self, first: int, days: int | np.ndarray):
+        first = min(max(int(first), 0), self.horizon)
+        return first, np.clip(first + np.asarray(days), first, self.horizon)
+
+    # ------------------------------------------
+    # Range queries
+    # ------------------------------------------
+    def daily(self, slot: int, first: int = 0, days: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Dates and per-day forecasts of one pair over the range."""
+        first, end = self._bounds(first, self.horizon if days is None else days)
+        return self.dates[first:end], self.demand[slot, first:end]
+
+    def totals(self, days: int | np.ndarray, first: int = 0, slots: np.ndarray | None = None) -> np.ndarray:
+        """
+        Forecast demand summed over the range for each pair (all pairs when
+        `slots` is None). `days` may be one value or one per pair.
+        """
+        cumulative = self._cumulative if slots is None else self._cumulative[slots]
+        first, end = self._bounds(first, days)
+        end = np.broadcast_to(end, (len(cumulative),))
+        rows = np.arange(len(cumulative))
+        return cumulative[rows, end] - cumulative[:, first]
+
+    def totals_extended(self, days: int | np.ndarray, slots: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Forecast demand over days [0, days) like `totals`, but a range running
+        past the horizon is extended at each pair's last forecast day's rate
+        instead of clipped. Returns (totals, extrapolated) where `extrapolated`
+        marks the pairs whose range needed the extension.
+        """
+        days = np.broadcast_to(np.asarray(days), (len(self) if slots is None else len(slots),))
+        last_rate = (self.demand[:, -1] if slots is None else self.demand[slots, -1]).astype(np.float64)
+        beyond = np.maximum(days - self.horizon, 0)
+        return self.totals(days, slots=slots) + beyond * last_rate, beyond > 0
+
+    def top(self, days: int, limit: int, first: int = 0) -> tuple[np.ndarray, np.ndarray]:
+        """Slots of the `limit` pairs with the highest demand over the range, and those totals."""
+        totals = self.totals(days, first)
+        limit = min(max(limit, 0), len(totals))
+        if limit == 0:
+            return np.empty(0, dtype=np.int64), totals[:0]
+        candidates = np.argpartition(-totals, limit - 1)[:limit]
+        ranked = candidates[np.argsort(-totals[candidates], kind='stable')]
+        return ranked, totals[ranked]
+
+    def days_of_cover(self, stock: np.ndarray, slots: np.ndarray | None = None) -> np.ndarray:
+        """
+        Whole days each pair's `stock` lasts against its forecast (the first day
+        cumulative demand exceeds it); `horizon` when it outlasts the table.
+        """
+        cumulative = (self._cumulative if slots is None else self._cumulative[slots])[:, 1:]
+        exceeded = cumulative > np.asarray(stock, dtype=np.float64)[:, None]
+        return np.where(exceeded.any(axis=1), exceeded.argmax(axis=1), self.horizon)
@@ -0,0 +1,96 @@
+"""
+frame_broadcast.py — One-to-many fan-out of the engine's preview frames to MJPEG viewers.
+
+The engine posts each JPEG once; `publish` wraps it in its multipart part once
+and wakes every viewer through one asyncio.Condition. Viewers then all send
+that same bytes object (no per-viewer copy) and only ever see frames they have
+not sent yet — an idle feed costs nothing, and no frame is sent twice. A viewer
+whose socket is slower than the engine simply skips to the newest frame when it
+is ready again; the frames it missed are counted as its lag.
+"""
+
+import asyncio
+import itertools
+import time
+
+MULTIPART_BOUNDARY = "frame"
+MEDIA_TYPE = f"multipart/x-mixed-replace; boundary={MULTIPART_BOUNDARY}"
+
+
+class Subscriber:
+    """Delivery counters for one connected viewer."""
+
+    __slots__ = ("id", "connected_at", "last_seq", "delivered", "skipped", "lag_ms", "max_lag_ms")
+
+    def __init__(self, subscriber_id: int):
+        self.id = subscriber_id
+        self.connected_at = time.time()
+        self.last_seq = 0
+        self.delivered = 0
+        self.skipped = 0       # frames published while this viewer was still sending an older one
+        self.lag_ms = 0.0      # publish -> handed to the socket, for the last frame
+        self.max_lag_ms = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "connected_seconds": round(time.time() - self.connected_at, 1),
+            "delivered": self.delivered,
+            "skipped": self.skipped,
+            "lag_ms": round(self.lag_ms, 1),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+        }
+
+
+class FrameBroadcaster:
+    """Latest-frame hub: `publish` from the ingest endpoint, `stream` per viewer."""
+
+    def __init__(self):
+        self._cond = asyncio.Condition()
+        self._part = b""
+        self._seq = 0
+        self._published_at = 0.0
+        self._ids = itertools.count(1)
+        self._subscribers: dict[int, Subscriber] = {}
+        self.published = 0
+
+    @property
+    def has_frame(self) -> bool:
+        return self._seq > 0
+
+    async def publish(self, jpeg: bytes) -> None:
+        part = (b"--" + MULTIPART_BOUNDARY.encode() + b"\r\n"
+                b"Content-Type: image/jpeg\r\n\r\n" + jpeg + b"\r\n")  # built once, shared by every viewer
+        async with self._cond:
+            self._part, self._published_at = part, time.perf_counter()
+            self._seq += 1
+            self.published += 1
+            self._cond.notify_all()
+
+    async def stream(self):
+        """Multipart chunks for one viewer: the current frame, then each newer one as it arrives."""
+        sub = Subscriber(next(self._ids))
+        self._subscribers[sub.id] = sub
+        try:
+            while True:
+                async with self._cond:
+                    await self._cond.wait_for(lambda: self._seq > sub.last_seq)
+                    part, seq, published_at = self._part, self._seq, self._published_at
+                if sub.last_seq:
+                    sub.skipped += seq - sub.last_seq - 1
+                sub.last_seq = seq
+                sub.lag_ms = (time.perf_counter() - published_at) * 1000
+                sub.max_lag_ms = max(sub.max_lag_ms, sub.lag_ms)
+                sub.delivered += 1
+                yield part  # returns once the server has taken the chunk; newer frames replace, never queue
+        finally:
+            self._subscribers.pop(sub.id, None)
+
+    def stats(self) -> dict:
+        subscribers = [s.to_dict() for s in self._subscribers.values()]
+        return {
+            "published": self.published,
+            "subscribers": len(subscribers),
+            "max_lag_ms": max((s["lag_ms"] for s in subscribers), default=0.0),
+            "viewers": subscribers,
+        }
@@ -0,0 +1,81 @@
+"""
+frame_ring.py — Bounded ring of frame slots in one shared-memory block.
+
+Capture threads copy each frame into a free slot and hand only the slot number
+to the decode processes, which map the same block and read the pixels in place —
+no frame is pickled or piped between processes. The number of slots bounds the
+frames in flight; when none is free the producer either drops the frame (live
+cameras) or waits (benchmarks / lossless runs).
+"""
+
+import queue
+import threading
+from multiprocessing import shared_memory
+import numpy as np  # type: ignore
+
+
+class FrameRing:
+    """
+    `slots` fixed-size slots of `slot_bytes` each. Slot bookkeeping (the free
+    list) lives in the owning process; workers only `attach` and `view`.
+    """
+
+    def __init__(self, slots: int, slot_bytes: int, name: str | None = None):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._owner = name is None
+        self._shm = (shared_memory.SharedMemory(create=True, size=slots * slot_bytes) if self._owner
+                     else shared_memory.SharedMemory(name=name))
+        self._free: queue.Queue[int] = queue.Queue()
+        if self._owner:
+            for slot in range(slots):
+                self._free.put(slot)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    @classmethod
+    def attach(cls, name: str, slots: int, slot_bytes: int) -> "FrameRing":
+        """Maps an existing ring (in a worker process)."""
+        return cls(slots, slot_bytes, name=name)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def in_use(self) -> int:
+        return self.slots - self._free.qsize()
+
+    # ------------------------------------------
+    # Producer side (owning process)
+    # ------------------------------------------
+    def acquire(self, block: bool = False, timeout: float | None = None) -> int | None:
+        """A free slot, or None (counted as a dropped frame) when the ring is full."""
+        try:
+            return self._free.get(block=block, timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self.dropped += 1
+            return None
+
+    def release(self, slot: int) -> None:
+        self._free.put(slot)
+
+    def write(self, slot: int, frame: np.ndarray) -> tuple[int, ...]:
+        """Copies `frame` into `slot`; returns the shape to view it with."""
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {frame.nbytes} bytes exceeds slot size {self.slot_bytes}")
+        np.copyto(self.view(slot, frame.shape), frame)
+        return frame.shape
+
+    # ------------------------------------------
+    # Both sides
+    # ------------------------------------------
+    def view(self, slot: int, shape: tuple[int, ...]) -> np.ndarray:
+        """The slot's pixels as a uint8 array of `shape` (no copy)."""
+        return np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+
+    def close(self) -> None:
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
@@ -0,0 +1,151 @@
+"""
+ingest.py — Chunked, bounded-memory ingestion for ml_model training.
+
+Starts from the InventoryStore snapshot (the CSV already streamed in fixed-size
+typed batches and spilled to a memory-mapped columnar file), sorts by
+(Product_ID, Warehouse_ID, Date) using only the compact key columns, then
+computes rolling-demand features chunk by chunk with the window context carried
+over from the previous chunk. The result is a memory-mapped cache of the full
+history that the model trains from — no row subsampling.
+"""
+
+import os
+import sys
+import time
+import numpy as np  # type: ignore
+from columnar_cache import ColumnarCache, ColumnarWriter  # type: ignore
+from inventory_store import CHUNK_ROWS, InventoryStore  # type: ignore
+from rolling import DEFAULT_WINDOWS, GroupedRolling, feature_names  # type: ignore
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+CACHE_VERSION = 2
+KEYS = ['Product_ID', 'Warehouse_ID']
+TRAINING_COLUMNS = [
+    'Date', 'Product_ID', 'Warehouse_ID', 'Units_Sold', 'Inventory_Level', 'Reorder_Point',
+    'Unit_Cost', 'Promotion_Flag', 'Stockout_Flag', 'Supplier_Lead_Time_Days',
+]
+
+
+# ==========================================
+# MEMORY ACCOUNTING
+# ==========================================
+def rss_mb() -> float | None:
+    """Current resident set size, where /proc is available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb() -> float | None:
+    """Process peak RSS so far (ru_maxrss is KB on Linux, bytes on macOS)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+
+class StageLog:
+    """Wall time plus current/peak RSS at the end of each pipeline stage."""
+
+    def __init__(self):
+        self.stages: list[dict] = []
+        self._start = time.perf_counter()
+
+    def mark(self, stage: str, **extra) -> None:
+        now = time.perf_counter()
+        rss, peak = rss_mb(), peak_rss_mb()
+        entry = {
+            "stage": stage,
+            "seconds": round(now - self._start, 3),
+            "rss_mb": None if rss is None else round(rss, 1),
+            "peak_rss_mb": None if peak is None else round(peak, 1),
+            **extra,
+        }
+        self.stages.append(entry)
+        self._start = now
+        print(f"📊 {stage}: {entry['seconds']}s | RSS {entry['rss_mb']} MB | peak {entry['peak_rss_mb']} MB")
+
+
+# ==========================================
+# PIPELINE
+# ==========================================
+def _sorted_codes(labels: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Lexically sorted labels, and old code -> new code lookup."""
+    order = np.argsort(labels, kind='stable')
+    remap = np.empty(len(labels), dtype=np.int32)
+    remap[order] = np.arange(len(labels), dtype=np.int32)
+    return labels[order], remap
+
+
+def calendar_features(dates: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Month (1-12) and DayOfWeek (Monday = 0) as the model was trained on them."""
+    days = dates.astype('datetime64[D]').astype(np.int64)
+    month = (dates.astype('datetime64[M]').astype(np.int64) % 12 + 1).astype(np.int8)
+    weekday = ((days + 3) % 7).astype(np.int8)  # 1970-01-01 was a Thursday; Monday = 0
+    return month, weekday
+
+
+def build_training_cache(store: InventoryStore, cache_dir: str, windows=DEFAULT_WINDOWS,
+                         chunksize: int = CHUNK_ROWS) -> ColumnarCache:
+    """
+    Returns the training cache for a snapshot-backed store, rebuilding it only
+    when the source CSV (size/mtime), the window set or the cache format changed.
+    """
+    meta = {"source": store.source, "windows": list(windows), "version": CACHE_VERSION}
+    cached = ColumnarCache.open(cache_dir, meta_match=meta) if store.source is not None else None
+    if cached is not None:
+        return cached
+
+    log = StageLog()
+
+    # 1. Sort on the compact key columns only (the store's columns are typed,
+    #    downcast and memory-mapped already, so there is nothing left to parse)
+    labels, remaps = {}, {}
+    for name in KEYS:
+        labels[name], remaps[name] = _sorted_codes(store.categories(name))
+    product = remaps['Product_ID'][store.codes('Product_ID')]
+    warehouse = remaps['Warehouse_ID'][store.codes('Warehouse_ID')]
+    order = np.lexsort((store.codes('Date'), warehouse, product))
+    pair = product.astype(np.int64) * len(labels['Warehouse_ID']) + warehouse
+    del product, warehouse
+    log.mark("sort", rows=len(store))
+
+    # 2. Features per chunk, carrying the previous chunk's tail as window context
+    context = max(windows) - 1
+    carry_units = np.empty(0, dtype=np.int64)
+    carry_pair = np.empty(0, dtype=np.int64)
+    writer = ColumnarWriter(cache_dir)
+    try:
+        for start in range(0, len(store), chunksize):
+            idx = order[start:start + chunksize]
+            chunk = {name: np.asarray(store.codes(name)[idx]) for name in TRAINING_COLUMNS}
+            for name in KEYS:
+                codes = remaps[name][chunk[name]]
+                chunk[name] = codes.astype(np.int16 if len(labels[name]) < 2 ** 15 else np.int32)
+            chunk['Month'], chunk['DayOfWeek'] = calendar_features(chunk['Date'])
+
+            units = np.concatenate([carry_units, chunk['Units_Sold']])
+            groups = np.concatenate([carry_pair, pair[idx]])
+            roller = GroupedRolling(units, groups)
+            skip = len(carry_units)
+            for w in windows:
+                mean_name, std_name = feature_names(w)
+                chunk[mean_name] = roller.mean(w)[skip:].astype(np.float32)
+                chunk[std_name] = np.nan_to_num(roller.std(w)[skip:], nan=0.0).astype(np.float32)
+            carry_units, carry_pair = units[len(units) - context:], groups[len(groups) - context:]
+
+            writer.append(chunk)
+    except Exception:
+        writer.abort()
+        raise
+    log.mark("features")
+
+    meta["stages"] = log.stages
+    writer.close(categories=labels, meta=meta)
+    return ColumnarCache(cache_dir)
@@ -0,0 +1,102 @@
+"""
+inventory_index.py — Case-insensitive hash indexes over the inventory store.
+Maps normalised Product_ID / SKU_ID / Product_Name values (and Product_ID ×
+Warehouse_ID pairs) to the row positions holding them, so the scan endpoints
+resolve an ID with one dict lookup instead of walking every row.
+"""
+
+import numpy as np  # type: ignore
+
+KEYED_FIELDS = ('Product_ID', 'SKU_ID', 'Product_Name')
+
+
+def normalize(value) -> str:
+    return str(value).strip().lower()
+
+
+def _group_rows(codes: np.ndarray, n_groups: int) -> list[np.ndarray]:
+    """Row positions per code, each ascending (one stable argsort, no Python row loop)."""
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(n_groups + 1))
+    return [order[bounds[i]:bounds[i + 1]] for i in range(n_groups)]
+
+
+class InventoryIndex:
+    """
+    Secondary indexes over an InventoryStore.
+
+    Postings hold row positions, not values, so in-place mutations of
+    non-key columns (Inventory_Level etc.) never invalidate them. Key columns
+    are categorical and immutable in place; appended rows are folded in
+    with `extend`.
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self._by_field: dict[str, dict[str, np.ndarray]] = {}
+        self._by_pair: dict[tuple[str, str], np.ndarray] = {}
+        self._indexed_rows = 0
+        self.extend()
+
+    def __len__(self) -> int:
+        return self._indexed_rows
+
+    def extend(self) -> None:
+        """Indexes any rows appended to the store since the last build."""
+        start = self._indexed_rows
+        if start >= len(self._store):
+            return
+        for field in KEYED_FIELDS:
+            if field in self._store:
+                self._merge(self._by_field.setdefault(field, {}), self._postings(field, start))
+        if 'Product_ID' in self._store and 'Warehouse_ID' in self._store:
+            self._merge(self._by_pair, self._pair_postings(start))
+        self._indexed_rows = len(self._store)
+
+    @staticmethod
+    def _merge(target: dict, postings: dict) -> None:
+        for key, rows in postings.items():
+            existing = target.get(key)
+            target[key] = rows if existing is None else np.concatenate([existing, rows])
+
+    def _postings(self, field: str, start: int) -> dict[str, np.ndarray]:
+        labels = self._store.categories(field)
+        codes = self._store.codes(field)[start:]
+        postings: dict[str, list[np.ndarray]] = {}
+        for code, rows in enumerate(_group_rows(codes, len(labels))):
+            if len(rows):
+                # Distinct labels can collapse to the same key ("SKU_5" / "sku_5 ")
+                postings.setdefault(normalize(labels[code]), []).append(rows + start)
+        return {k: (v[0] if len(v) == 1 else np.sort(np.concatenate(v))) for k, v in postings.items()}
+
+    def _pair_postings(self, start: int) -> dict[tuple[str, str], np.ndarray]:
+        products = self._store.categories('Product_ID')
+        warehouses = self._store.categories('Warehouse_ID')
+        pair_codes = (self._store.codes('Product_ID')[start:].astype(np.int64) * len(warehouses)
+                      + self._store.codes('Warehouse_ID')[start:])
+        uniques, inverse = np.unique(pair_codes, return_inverse=True)
+        postings: dict[tuple[str, str], list[np.ndarray]] = {}
+        for i, rows in enumerate(_group_rows(inverse, len(uniques))):
+            p, w = divmod(int(uniques[i]), len(warehouses))
+            postings.setdefault((normalize(products[p]), normalize(warehouses[w])), []).append(rows + start)
+        return {k: (v[0] if len(v) == 1 else np.sort(np.concatenate(v))) for k, v in postings.items()}
+
+    # ------------------------------------------
+    # Lookups
+    # ------------------------------------------
+    def rows(self, field: str, value) -> np.ndarray:
+        """All row positions (ascending) whose `field` matches value case-insensitively."""
+        return self._by_field.get(field, {}).get(normalize(value), np.empty(0, dtype=np.intp))
+
+    def pair_rows(self, product_id, warehouse_id) -> np.ndarray:
+        return self._by_pair.get((normalize(product_id), normalize(warehouse_id)), np.empty(0, dtype=np.intp))
+
+    def first(self, value, fields: tuple[str, ...] = KEYED_FIELDS):
+        """Lowest row position matching value in any of `fields`, or None."""
+        key = normalize(value)
+        best = None
+        for field in fields:
+            rows = self._by_field.get(field, {}).get(key)
+            if rows is not None and len(rows) and (best is None or rows[0] < best):
+                best = int(rows[0])
+        return best
@@ -0,0 +1,131 @@
+"""
+inventory_query.py — Filtered, projected, cursor-paged reads over the inventory store.
+
+Filters are evaluated block by block against the columnar arrays, starting at the
+cursor, and stop as soon as a page is full — so a request touches only the rows
+it needs to reach its page, and renders only the columns it asked for. Pages are
+produced as JSON chunks that the API streams out as they are rendered.
+"""
+
+import datetime
+import numpy as np  # type: ignore
+from inventory_index import normalize  # type: ignore
+from serialization import Records, dumps  # type: ignore
+
+SCAN_BLOCK = 65_536   # rows evaluated per filter step
+MAX_PAGE = 1_000
+
+
+def parse_date(text: str) -> np.datetime64:
+    """YYYY-MM-DD (ISO) or DD-MM-YYYY (the CSV's own format)."""
+    for fmt in ('%Y-%m-%d', '%d-%m-%Y'):
+        try:
+            return np.datetime64(datetime.datetime.strptime(text.strip(), fmt).date(), 'D')
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date: {text!r} (expected YYYY-MM-DD or DD-MM-YYYY)")
+
+
+def _split(values: str | None) -> list[str]:
+    return [v for v in (normalize(v) for v in (values or '').split(',')) if v]
+
+
+class InventoryQuery:
+    """
+    One validated request: row filters, output columns and page bounds. Raises
+    ValueError on unknown fields, bad dates, a malformed cursor or a limit
+    outside 0..MAX_PAGE.
+    """
+
+    def __init__(self, store, fields: str | None = None, warehouse: str | None = None,
+                 region: str | None = None, below_rop: bool = False, date_from: str | None = None,
+                 date_to: str | None = None, cursor: str | None = None, limit: int = 50):
+        self._store = store
+        self.columns = [f.strip() for f in (fields or '').split(',') if f.strip()] or list(store.columns)
+        unknown = [c for c in self.columns if c not in store]
+        if unknown:
+            raise ValueError(f"Unknown fields: {unknown}")
+        self.limit = int(limit)
+        if not 0 <= self.limit <= MAX_PAGE:
+            raise ValueError(f"limit must be between 0 and {MAX_PAGE}")
+        try:
+            self.start = int(cursor) if cursor else 0
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor!r}") from None
+        if not 0 <= self.start <= len(store):
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+
+        # Categorical filters resolve to a per-category hit table once; rows then
+        # test with one gather instead of comparing strings
+        self._category_hits = {}
+        for name, wanted in (('Warehouse_ID', _split(warehouse)), ('Region', _split(region))):
+            if wanted and name in store:
+                labels = store.categories(name)
+                self._category_hits[name] = np.fromiter((normalize(v) in wanted for v in labels),
+                                                        dtype=bool, count=len(labels))
+        self.below_rop = below_rop
+        self.date_from = parse_date(date_from) if date_from else None
+        self.date_to = parse_date(date_to) if date_to else None
+        self.next_cursor: str | None = None
+
+    def _mask(self, start: int, end: int) -> np.ndarray | None:
+        """Rows [start, end) passing every filter; None when nothing is filtered."""
+        store = self._store
+        mask = None
+
+        def narrow(condition):
+            nonlocal mask
+            mask = condition if mask is None else mask & condition
+
+        for name, hits in self._category_hits.items():
+            narrow(hits[store.codes(name)[start:end]])
+        if self.below_rop:
+            narrow(store.codes('Inventory_Level')[start:end] < store.codes('Reorder_Point')[start:end])
+        if self.date_from is not None:
+            narrow(store.codes('Date')[start:end] >= self.date_from)
+        if self.date_to is not None:
+            narrow(store.codes('Date')[start:end] <= self.date_to)
+        return mask
+
+    @property
+    def filtered(self) -> bool:
+        return bool(self._category_hits) or self.below_rop or self.date_from is not None or self.date_to is not None
+
+    def pages(self):
+        """
+        Yields row-position blocks in store order until `limit` rows are found,
+        then sets `next_cursor` (None once the store is exhausted).
+        """
+        n, found, pos = len(self._store), 0, self.start
+        while found < self.limit and pos < n:
+            end = min(pos + (SCAN_BLOCK if self.filtered else self.limit - found), n)
+            mask = self._mask(pos, end)
+            rows = np.arange(pos, end) if mask is None else pos + np.flatnonzero(mask)
+            if len(rows) > self.limit - found:
+                rows = rows[:self.limit - found]
+                end = int(rows[-1]) + 1
+            found += len(rows)
+            pos = end
+            if len(rows):
+                yield rows
+        self.next_cursor = str(pos) if pos < n else None
+
+    def stream(self, ndjson: bool = False):
+        """
+        The page, rendered and yielded block by block. JSON:
+        {"data": [...], "count": n, "fields": [...], "next_cursor": "..." | null}.
+        NDJSON: one row object per line, then that same trailer object (without
+        "data") as the last line.
+        """
+        if not ndjson:
+            yield b'{"data":['
+        count = 0
+        for rows in self.pages():
+            records = Records(self._store.record_columns(rows, self.columns))
+            if ndjson:
+                yield from records.ndjson()
+            else:
+                yield (b',' if count else b'') + records.to_json()[1:-1]
+            count += len(records)
+        trailer = dumps({"count": count, "fields": self.columns, "next_cursor": self.next_cursor})
+        yield trailer + b'\n' if ndjson else b'],' + trailer[1:]
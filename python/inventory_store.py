@@ -0,0 +1,430 @@
+"""
+inventory_store.py — Typed, column-oriented in-memory store for the inventory CSV.
+Replaces the list-of-dicts cache in main.py: every CSV column is held as one NumPy
+array (string columns as categorical codes + categories) under a declared schema,
+so endpoints can aggregate with vectorized column ops instead of walking rows.
+
+The parsed columns are persisted as a binary snapshot (see columnar_cache.py)
+keyed on the CSV's size/mtime; later starts memory-map it instead of re-parsing.
+"""
+
+import os
+import pandas as pd  # type: ignore
+import numpy as np  # type: ignore
+from columnar_cache import ColumnarCache, ColumnarWriter, source_fingerprint  # type: ignore
+from inventory_index import InventoryIndex  # type: ignore
+from text_index import TextSearchIndex  # type: ignore
+
+# ==========================================
+# SCHEMA (one entry per CSV column, in file order)
+# ==========================================
+# "category" -> integer codes + object array of categories
+# "date"     -> datetime64[D], rendered back as DD-MM-YYYY
+# anything else is a NumPy dtype name
+SCHEMA: dict[str, str] = {
+    "Date": "date",
+    "SKU_ID": "category",
+    "Warehouse_ID": "category",
+    "Supplier_ID": "category",
+    "Region": "category",
+    "Units_Sold": "int32",
+    "Inventory_Level": "int32",
+    "Supplier_Lead_Time_Days": "int16",
+    "Reorder_Point": "int32",
+    "Order_Quantity": "int32",
+    "Unit_Cost": "float32",
+    "Unit_Price": "float32",
+    "Promotion_Flag": "int8",
+    "Stockout_Flag": "int8",
+    "Demand_Forecast": "float32",
+    "City": "category",
+    "Product_ID": "category",
+    "On_Route_To": "category",
+    "Month": "int8",
+    "DayOfWeek": "int8",
+    "Rolling_7_Demand": "float64",
+    "Demand_Std_7": "float64",
+    "SKU_Encoded": "int16",
+    "WH_Encoded": "int16",
+    "Predicted_Demand": "float64",
+    "Dynamic_ROP": "float64",
+    "Revenue": "float32",
+    "Revenue_Potential": "float32",
+    "Stockout_Risk": "int8",
+    "Recommended_Reorder_Qty": "float64",
+    "Demand_Trend": "category",
+    "Demand_Anomaly": "category",
+    "Anomaly_Severity": "float64",
+    "Carbon_Footprint": "int32",
+    "Warehouse_Carbon": "int32",
+    "Product ID": "category",
+}
+
+# float32 columns only carry cents in the source data; round them back on output
+# so 9.77 doesn't come out as 9.770000457763672.
+OUTPUT_DECIMALS: dict[str, int] = {
+    "Unit_Cost": 2,
+    "Unit_Price": 2,
+    "Demand_Forecast": 2,
+    "Revenue": 2,
+    "Revenue_Potential": 2,
+}
+
+DATE_FORMAT = "%d-%m-%Y"
+
+# Float columns are written back the way the source CSV writes them: shortest form
+# up to 15 significant digits, so a whole-number 14 stays "14" rather than "14.0".
+CSV_FLOAT_FORMAT = "%.15g"
+
+SNAPSHOT_VERSION = 1
+
+
+def default_snapshot_dir(csv_path: str) -> str:
+    """`<csv dir>/.cache/<csv stem>` — where the binary snapshot of a CSV lives."""
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)), ".cache", stem)
+
+
+def _parse_dates(values: pd.Series) -> np.ndarray:
+    try:
+        parsed = pd.to_datetime(values, format=DATE_FORMAT)
+    except (ValueError, TypeError):
+        parsed = pd.to_datetime(values, format='mixed', dayfirst=True)
+    return parsed.to_numpy().astype('datetime64[D]')
+
+
+def _smallest_code_dtype(n_categories: int):
+    if n_categories < 2 ** 7:
+        return np.int8
+    if n_categories < 2 ** 15:
+        return np.int16
+    return np.int32
+
+
+# ==========================================
+# CHUNKED CSV READING
+# ==========================================
+CHUNK_ROWS = 100_000
+
+
+class CategoryEncoder:
+    """Label -> code mapping that stays stable across CSV chunks."""
+
+    def __init__(self):
+        self.labels: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def _code(self, label: str) -> int:
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        # Factorise within the chunk, then map each distinct label once
+        cat = values.astype(str).astype('category').cat
+        lookup = np.fromiter((self._code(label) for label in cat.categories), dtype=np.int32,
+                             count=len(cat.categories))
+        return lookup[cat.codes.to_numpy()]
+
+    def categories(self) -> np.ndarray:
+        return np.array(self.labels, dtype=object)
+
+
+def _parse_numeric(col: pd.Series, name: str, kind: str) -> np.ndarray:
+    """
+    Converts one column to its schema dtype. Float columns keep blanks as NaN;
+    anything that is not a number, and in integer columns anything blank,
+    fractional or out of range, raises ValueError naming the offending rows.
+    """
+    dtype = np.dtype(kind)
+    values = pd.to_numeric(col, errors='coerce')
+    bad = values.isna() & col.notna()
+    if dtype.kind in 'iu':
+        info = np.iinfo(dtype)
+        bad |= values.isna() | (values != np.round(values)) | (values < info.min) | (values > info.max)
+    if bad.any():
+        rows = col.index[bad.to_numpy()]
+        sample = ", ".join(f"row {r}: {col.at[r]!r}" for r in rows[:5])
+        raise ValueError(f"Column {name} ({kind}) has {len(rows)} value(s) that do not fit: {sample}")
+    return values.to_numpy().astype(dtype)
+
+
+def encode_chunk(df: pd.DataFrame, encoders: dict[str, CategoryEncoder]) -> dict[str, np.ndarray]:
+    """
+    Converts a parsed chunk to schema-typed arrays (categoricals as int32 codes).
+    Raises ValueError on values that do not fit their column's type.
+    """
+    arrays: dict[str, np.ndarray] = {}
+    for name, kind in SCHEMA.items():
+        if name not in df.columns:
+            continue
+        col = df[name]
+        if kind == "category":
+            arrays[name] = encoders.setdefault(name, CategoryEncoder()).encode(col)
+        elif kind == "date":
+            arrays[name] = _parse_dates(col)
+        else:
+            arrays[name] = _parse_numeric(col, name, kind)
+    return arrays
+
+
+def read_csv_chunks(path: str, columns: list[str] | None = None, chunksize: int = CHUNK_ROWS,
+                    encoders: dict[str, CategoryEncoder] | None = None, max_rows: int | None = None):
+    """
+    Streams the CSV in fixed-size batches of schema-typed arrays. Pass the same
+    `encoders` dict across calls to keep categorical codes consistent.
+    """
+    encoders = {} if encoders is None else encoders
+    usecols = None if columns is None else (lambda c: c in columns)
+    # Read strings as-is and let the schema decide the final dtype, so the
+    # parser's own type guessing never runs.
+    text_columns = {name: str for name, kind in SCHEMA.items() if kind in ("category", "date")}
+    reader = pd.read_csv(path, usecols=usecols, dtype=text_columns, chunksize=chunksize, nrows=max_rows)
+    for chunk in reader:
+        yield encode_chunk(chunk, encoders)
+
+
+class InventoryStore:
+    """
+    Column store over the inventory CSV.
+
+    Numeric and date columns live in `_arrays`; categorical columns keep their
+    codes in `_arrays` and their labels in `_categories`.
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray], categories: dict[str, np.ndarray]):
+        self._arrays = arrays
+        self._categories = categories
+        self.columns = [c for c in SCHEMA if c in arrays]
+        self._length = len(next(iter(arrays.values()))) if arrays else 0
+        self._index: InventoryIndex | None = None
+        self._search_index: TextSearchIndex | None = None
+        # Set when the store is backed by a snapshot: its directory and the
+        # fingerprint of the CSV it was built from
+        self.snapshot_dir: str | None = None
+        self.source: dict | None = None
+
+    # ------------------------------------------
+    # Construction
+    # ------------------------------------------
+    @classmethod
+    def from_chunks(cls, chunks, encoders: dict[str, CategoryEncoder]) -> "InventoryStore":
+        parts: dict[str, list[np.ndarray]] = {}
+        for chunk in chunks:
+            for name, values in chunk.items():
+                parts.setdefault(name, []).append(values)
+        arrays: dict[str, np.ndarray] = {}
+        categories: dict[str, np.ndarray] = {}
+        for name, values in parts.items():
+            arrays[name] = np.concatenate(values) if len(values) > 1 else values[0]
+            if name in encoders:
+                categories[name] = encoders[name].categories()
+                arrays[name] = arrays[name].astype(_smallest_code_dtype(len(categories[name])))
+        return cls(arrays, categories)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "InventoryStore":
+        encoders: dict[str, CategoryEncoder] = {}
+        return cls.from_chunks([encode_chunk(df, encoders)], encoders)
+
+    @classmethod
+    def from_csv(cls, path: str, max_rows: int | None = None, chunksize: int = CHUNK_ROWS) -> "InventoryStore":
+        """Builds the store chunk by chunk, so peak memory is one raw chunk plus the typed columns."""
+        encoders: dict[str, CategoryEncoder] = {}
+        return cls.from_chunks(read_csv_chunks(path, chunksize=chunksize, encoders=encoders, max_rows=max_rows),
+                               encoders)
+
+    @classmethod
+    def from_snapshot(cls, cache: ColumnarCache) -> "InventoryStore":
+        store = cls(dict(cache.columns), cache.categories)
+        store.snapshot_dir = cache.directory
+        store.source = cache.meta.get("source")
+        return store
+
+    @classmethod
+    def open(cls, csv_path: str, snapshot_dir: str | None = None, chunksize: int = CHUNK_ROWS) -> "InventoryStore":
+        """
+        Memory-maps the binary snapshot of `csv_path`, first (re)building it from
+        the CSV when it is missing or the CSV changed since it was written. Columns
+        are mapped copy-on-write, so in-place updates never touch the snapshot.
+        """
+        directory = snapshot_dir or default_snapshot_dir(csv_path)
+        meta = {"source": source_fingerprint(csv_path), "version": SNAPSHOT_VERSION}
+        cache = ColumnarCache.open(directory, meta_match=meta, mode='c')
+        if cache is None:
+            encoders: dict[str, CategoryEncoder] = {}
+            writer = ColumnarWriter(directory)
+            try:
+                for chunk in read_csv_chunks(csv_path, chunksize=chunksize, encoders=encoders):
+                    writer.append(chunk)
+            except Exception:
+                writer.abort()
+                raise
+            writer.close(categories={name: enc.labels for name, enc in encoders.items()}, meta=meta)
+            cache = ColumnarCache(directory, mode='c')
+        return cls.from_snapshot(cache)
+
+    def write_snapshot(self, directory: str, source: dict, overrides: dict[str, np.ndarray] | None = None,
+                       chunksize: int = CHUNK_ROWS) -> None:
+        """
+        Persists the store (with `overrides` substituted for whole columns) as the
+        snapshot of the CSV identified by `source`.
+        """
+        overrides = overrides or {}
+        writer = ColumnarWriter(directory)
+        try:
+            for start in range(0, self._length, chunksize):
+                writer.append({name: overrides.get(name, self._arrays[name])[start:start + chunksize]
+                               for name in self.columns})
+        except Exception:
+            writer.abort()
+            raise
+        writer.close(categories=self._categories, meta={"source": source, "version": SNAPSHOT_VERSION})
+
+    # ------------------------------------------
+    # Column access
+    # ------------------------------------------
+    def __len__(self) -> int:
+        return self._length
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._arrays
+
+    @property
+    def nbytes(self) -> int:
+        return (sum(a.nbytes for a in self._arrays.values())
+                + sum(sum(len(str(v)) for v in c) for c in self._categories.values()))
+
+    @property
+    def index(self) -> InventoryIndex:
+        """Hash indexes on the ID columns, built on first use."""
+        if self._index is None:
+            self._index = InventoryIndex(self)
+        return self._index
+
+    @property
+    def search_index(self) -> TextSearchIndex:
+        """N-gram substring index over the text columns, built on first use."""
+        if self._search_index is None:
+            self._search_index = TextSearchIndex(self)
+        return self._search_index
+
+    def is_categorical(self, name: str) -> bool:
+        return name in self._categories
+
+    def codes(self, name: str) -> np.ndarray:
+        """Raw array for a column (category codes for string columns)."""
+        return self._arrays[name]
+
+    def categories(self, name: str) -> np.ndarray:
+        return self._categories[name]
+
+    def column(self, name: str) -> np.ndarray:
+        """Decoded values: labels for categorical columns, raw array otherwise."""
+        if name in self._categories:
+            return self._categories[name][self._arrays[name]]
+        return self._arrays[name]
+
+    def value(self, row: int, name: str):
+        """Single decoded cell, without materialising the whole column."""
+        raw = self._arrays[name][row]
+        if name in self._categories:
+            return self._categories[name][raw]
+        return raw.item()
+
+    def category_mask(self, name: str, predicate) -> np.ndarray:
+        """Row mask for a categorical column, evaluating `predicate` once per category."""
+        labels = self._categories[name]
+        hits = np.fromiter((bool(predicate(str(v))) for v in labels), dtype=bool, count=len(labels))
+        return hits[self._arrays[name]]
+
+    def set_value(self, row: int, name: str, value) -> None:
+        if name in self._categories:
+            raise TypeError(f"Column {name} is categorical and cannot be updated in place")
+        self._arrays[name][row] = value
+
+    # ------------------------------------------
+    # Text rendering (search / output)
+    # ------------------------------------------
+    def text_values(self, name: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (distinct lowercase strings, inverse index) for a column, so string
+        predicates can be evaluated once per distinct value instead of once per row.
+        """
+        if name in self._categories:
+            labels = np.array([str(v).lower() for v in self._categories[name]], dtype=object)
+            return labels, self._arrays[name]
+        uniques, inverse = np.unique(self._arrays[name], return_inverse=True)
+        rendered = self._render(name, uniques)
+        return np.array([str(v).lower() for v in rendered], dtype=object), inverse
+
+    def _render(self, name: str, values: np.ndarray) -> list:
+        kind = SCHEMA.get(name)
+        if kind == "date":
+            return pd.DatetimeIndex(values).strftime(DATE_FORMAT).tolist()
+        if name in OUTPUT_DECIMALS:
+            return np.round(values.astype(np.float64), OUTPUT_DECIMALS[name]).tolist()
+        return values.tolist()
+
+    def render_column(self, name: str, rows=None) -> list:
+        """Python-native values for a column (optionally a row subset), ready for JSON."""
+        raw = self._arrays[name] if rows is None else self._arrays[name][rows]
+        if name in self._categories:
+            return self._categories[name][raw].tolist()
+        return self._render(name, raw)
+
+    def record_columns(self, rows=None, columns: list[str] | None = None) -> dict:
+        """
+        Rows as output-ready columns (the values `records` would hold) without
+        materialising per-row dicts: categoricals stay codes + labels, dates are
+        rendered once per distinct day. Feed to serialization.Records.
+        """
+        out = {}
+        for name in columns or self.columns:
+            raw = self._arrays[name] if rows is None else self._arrays[name][rows]
+            if name in self._categories:
+                out[name] = pd.Categorical.from_codes(raw, categories=pd.Index(self._categories[name], dtype=object),
+                                                      validate=False)
+            elif SCHEMA.get(name) == "date":
+                uniques, inverse = np.unique(raw, return_inverse=True)
+                out[name] = pd.Categorical.from_codes(inverse, categories=pd.Index(self._render(name, uniques),
+                                                                                   dtype=object), validate=False)
+            elif name in OUTPUT_DECIMALS:
+                out[name] = np.round(raw.astype(np.float64), OUTPUT_DECIMALS[name])
+            else:
+                out[name] = raw
+        return out
+
+    def records(self, rows=None, columns: list[str] | None = None) -> list[dict]:
+        """Materialises rows as dicts (same shape the old list-of-dicts cache exposed)."""
+        if rows is None:
+            rows = np.arange(self._length)
+        cols = columns or self.columns
+        rendered = [self.render_column(c, rows) for c in cols]
+        return [dict(zip(cols, values)) for values in zip(*rendered)]
+
+    def to_frame(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """Zero-parse DataFrame view with categoricals rebuilt from codes."""
+        data = {}
+        for name in columns or self.columns:
+            if name in self._categories:
+                data[name] = pd.Categorical.from_codes(self._arrays[name], self._categories[name])
+            else:
+                data[name] = self._arrays[name]
+        return pd.DataFrame(data, copy=False)
+
+    def to_csv(self, path: str, overrides: dict[str, np.ndarray] | None = None) -> None:
+        """
+        Writes the store as CSV in the source's own format (DD-MM-YYYY dates, floats
+        without a trailing ".0"), so reading it back gives the same values and dtypes.
+        `overrides` substitutes whole columns (e.g. a consistent copy).
+        """
+        overrides = overrides or {}
+        frame = pd.DataFrame({
+            name: (overrides[name].tolist() if name in overrides else self.render_column(name))
+            for name in self.columns
+        })
+        frame.to_csv(path, index=False, float_format=CSV_FLOAT_FORMAT)
+
@@ -0,0 +1,250 @@
+"""
+journal.py — Append-only mutation log with group commit, plus background
+compaction of the inventory CSV.
+
+Scans append one small JSON line instead of rewriting the whole CSV. A single
+flusher thread writes and fsyncs every pending line in one batch, so concurrent
+writers share a disk sync. A compactor periodically folds the log into an
+atomically replaced CSV snapshot (and refreshes the store's binary snapshot to
+match); startup replays whatever the log still holds.
+"""
+
+import json
+import os
+import threading
+import time
+import numpy as np  # type: ignore
+from columnar_cache import source_fingerprint  # type: ignore
+
+
+class AppendOnlyLog:
+    """
+    JSON-lines log with group commit.
+
+    `append()` enqueues a record and (by default) blocks until the batch that
+    contains it has been fsynced. `rotate()` atomically moves the current
+    segment aside so it can be compacted while new appends keep flowing.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self._fsync = fsync
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._pending: list[str] = []
+        self._enqueued = 0  # monotonic ticket counter
+        self._committed = 0
+        self._segment_start = 0
+        self._closed = False
+        self._file = open(path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._flush_loop, name=f"log-flush:{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        """Records appended to the current segment (including ones still in flight)."""
+        with self._cond:
+            return self._enqueued - self._segment_start
+
+    def append(self, record: dict, wait: bool = True) -> int:
+        line = json.dumps(record, separators=(',', ':')) + "\n"
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"Log {self.path} is closed")
+            self._pending.append(line)
+            self._enqueued += 1
+            ticket = self._enqueued
+            self._cond.notify_all()
+        if wait:
+            self.wait_for(ticket)
+        return ticket
+
+    def wait_for(self, ticket: int) -> None:
+        """Blocks until the record with `ticket` has been written and fsynced."""
+        with self._cond:
+            while self._committed < ticket and not self._closed:
+                self._cond.wait()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+                batch, self._pending = self._pending, []
+                target = self._enqueued
+            # Appenders keep queueing into the next batch while this one syncs
+            with self._io_lock:
+                self._file.write("".join(batch))
+                self._file.flush()
+                if self._fsync:
+                    os.fsync(self._file.fileno())
+            with self._cond:
+                self._committed = target
+                self._cond.notify_all()
+
+    def rotate(self, segment_path: str) -> None:
+        """Moves everything committed so far to `segment_path` and starts a fresh segment."""
+        with self._cond:
+            while self._committed < self._enqueued:
+                self._cond.wait()
+            with self._io_lock:
+                self._file.close()
+                os.replace(self.path, segment_path)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._segment_start = self._enqueued
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._file.close()
+
+
+def read_records(path: str) -> list[dict]:
+    """Reads a JSON-lines log, ignoring a torn final line from a crash mid-write."""
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return records
+
+
+def atomic_write(path: str, write_fn) -> None:
+    """Calls write_fn(tmp_path), fsyncs the result, then renames it over `path`."""
+    tmp_path = f"{path}.tmp"
+    write_fn(tmp_path)
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# ==========================================
+# INVENTORY JOURNAL
+# ==========================================
+class InventoryJournal:
+    """
+    Write-ahead journal for Inventory_Level changes on an InventoryStore.
+
+    Each record carries the applied delta and the resulting level, so replay
+    is idempotent: a segment that was folded into the snapshot just before a
+    crash can be replayed again without double-counting.
+    """
+
+    def __init__(self, store, snapshot_path: str, journal_path: str | None = None,
+                 compact_interval: float = 30.0, compact_threshold: int = 1000):
+        self.store = store
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or os.path.splitext(snapshot_path)[0] + "_journal.log"
+        self.segment_path = self.journal_path + ".compacting"
+        self.compact_interval = compact_interval
+        self.compact_threshold = compact_threshold
+        self.lock = threading.Lock()  # serialises store mutation + log append
+        self._compact_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._log: AppendOnlyLog | None = None
+        self._compactor: threading.Thread | None = None
+        self.last_compaction: float = 0
+
+    # ------------------------------------------
+    # Startup / shutdown
+    # ------------------------------------------
+    def open(self) -> int:
+        """Replays leftover log segments onto the store and starts the compactor."""
+        replayed = self._replay(read_records(self.segment_path)) + self._replay(read_records(self.journal_path))
+        self._log = AppendOnlyLog(self.journal_path)
+        self.last_compaction = time.time()
+        self._compactor = threading.Thread(target=self._compact_loop, name="journal-compactor", daemon=True)
+        self._compactor.start()
+        return replayed
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _replay(self, records: list[dict]) -> int:
+        index = self.store.index
+        products = self.store.column('Product_ID') if len(records) else None
+        for rec in records:
+            row = rec.get('row')
+            if row is None or row >= len(self.store) or str(products[row]) != rec.get('product'):
+                pair = index.pair_rows(rec.get('product', ''), rec.get('warehouse', ''))
+                if not len(pair):
+                    continue
+                row = int(pair[0])
+            self.store.set_value(row, 'Inventory_Level', rec['level'])
+        return len(records)
+
+    # ------------------------------------------
+    # Mutations
+    # ------------------------------------------
+    def record(self, row: int, delta: int, mode: str, wait: bool = True) -> tuple[int, int]:
+        """
+        Applies `delta` to Inventory_Level at `row` (floored at zero) and journals it.
+        Returns (previous level, new level) once the record is durable.
+        """
+        if self._log is None:
+            raise RuntimeError("Journal is not open")
+        with self.lock:
+            previous = int(self.store.codes('Inventory_Level')[row])
+            level = max(0, previous + delta)
+            delta = level - previous
+            self.store.set_value(row, 'Inventory_Level', level)
+            ticket = self._log.append({
+                "ts": time.time(),
+                "product": str(self.store.value(row, 'Product_ID')),
+                "warehouse": str(self.store.value(row, 'Warehouse_ID')),
+                "row": row,
+                "delta": delta,
+                "mode": mode,
+                "level": level,
+            }, wait=False)
+        if wait:
+            # Group commit: block outside the store lock so other scans can queue up
+            self._log.wait_for(ticket)
+        return previous, level
+
+    # ------------------------------------------
+    # Compaction
+    # ------------------------------------------
+    def _compact_loop(self) -> None:
+        while not self._stop.wait(1.0):
+            pending = len(self._log) if self._log is not None else 0
+            due = time.time() - self.last_compaction >= self.compact_interval
+            if pending and (due or pending >= self.compact_threshold):
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"⚠️ Journal compaction failed: {e}")
+
+    def compact(self) -> None:
+        """Folds the journal into a fresh CSV snapshot (atomic replace)."""
+        with self._compact_lock:
+            if self._log is None:
+                return
+            with self.lock:
+                if not os.path.exists(self.segment_path):
+                    self._log.rotate(self.segment_path)
+                levels = np.array(self.store.codes('Inventory_Level'), copy=True)
+            overrides = {'Inventory_Level': levels}
+            atomic_write(self.snapshot_path, lambda tmp: self.store.to_csv(tmp, overrides=overrides))
+            if self.store.snapshot_dir is not None:
+                # Re-key the binary snapshot to the new CSV so the next start maps it
+                # instead of re-parsing. If this fails, the stale key just forces a rebuild.
+                try:
+                    self.store.write_snapshot(self.store.snapshot_dir, source_fingerprint(self.snapshot_path),
+                                              overrides=overrides)
+                except OSError as e:
+                    print(f"⚠️ Binary snapshot refresh failed: {e}")
+            os.remove(self.segment_path)
+            self.last_compaction = time.time()
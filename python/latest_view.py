@@ -0,0 +1,151 @@
+"""
+latest_view.py — Materialized "latest row per (Product_ID, Warehouse_ID)" view.
+
+Built once from the inventory store (one lexsort over the history), then kept
+current in O(1) per change: scans refresh Inventory_Level of a pair's latest row
+and training attaches Dynamic_ROP. Derived columns (Risk_Gap, Overstock_Ratio)
+are maintained alongside, so the dashboard endpoints read P pair rows instead of
+re-running sort_values('Date').groupby(...).last() over the full history.
+Listeners (the alert engine) are told which pair changed.
+"""
+
+import threading
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+# Store columns carried into the view (categoricals decoded once at build time)
+VIEW_COLUMNS = ['Date', 'SKU_ID', 'Units_Sold', 'Inventory_Level', 'Reorder_Point', 'Unit_Cost',
+                'Supplier_Lead_Time_Days']
+
+
+class LatestStateView:
+    """
+    One slot per (Product_ID, Warehouse_ID) pair holding that pair's most recent
+    row (by Date; ties go to the later row in the file), plus:
+
+      Dynamic_ROP      from the trained model (NaN until attached)
+      Risk_Gap         Dynamic_ROP - Inventory_Level
+      Overstock_Ratio  Inventory_Level / max(Units_Sold, 1)
+
+    `version` increases on every change so readers can tell when it moved.
+    """
+
+    def __init__(self, store):
+        n = len(store)
+        product_codes = store.codes('Product_ID')
+        warehouse_codes = store.codes('Warehouse_ID')
+        order = np.lexsort((np.arange(n), store.codes('Date'), warehouse_codes, product_codes))
+        pair = product_codes[order].astype(np.int64) * len(store.categories('Warehouse_ID')) + warehouse_codes[order]
+        is_last = np.ones(n, dtype=bool)
+        np.not_equal(pair[1:], pair[:-1], out=is_last[:-1])
+
+        self._store = store
+        self.rows = order[is_last]  # store row position of each pair's latest row
+        self._lock = threading.Lock()
+        self.version = 0
+        self._data: dict[str, np.ndarray] = {
+            'Product_ID': store.categories('Product_ID')[product_codes[self.rows]],
+            'Warehouse_ID': store.categories('Warehouse_ID')[warehouse_codes[self.rows]],
+        }
+        for name in VIEW_COLUMNS:
+            if name in store:
+                values = store.codes(name)[self.rows]
+                self._data[name] = (store.categories(name)[values] if store.is_categorical(name)
+                                    else np.array(values))
+        self._data['Inventory_Level'] = self._data['Inventory_Level'].astype(np.int64)
+        self._data['Dynamic_ROP'] = np.full(len(self.rows), np.nan)
+        self._data['Risk_Gap'] = np.full(len(self.rows), np.nan)
+        self._data['Overstock_Ratio'] = (self._data['Inventory_Level']
+                                         / np.maximum(self._data['Units_Sold'], 1)).astype(np.float64)
+        self._listeners = []
+        self._slots = {(str(p), str(w)): i for i, (p, w) in
+                       enumerate(zip(self._data['Product_ID'], self._data['Warehouse_ID']))}
+        self._slot_of_row = {int(r): i for i, r in enumerate(self.rows)}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def has_dynamic_rop(self) -> bool:
+        return bool(len(self.rows)) and not np.isnan(self._data['Dynamic_ROP']).all()
+
+    def slot(self, product_id: str, warehouse_id: str) -> int | None:
+        return self._slots.get((product_id, warehouse_id))
+
+    def value(self, slot: int, name: str):
+        value = self._data[name][slot]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def values(self, slots: np.ndarray, name: str) -> np.ndarray:
+        with self._lock:
+            return self._data[name][slots].copy()
+
+    def latest_row(self, product_id: str, warehouse_id: str) -> int | None:
+        """Store row position holding the pair's current state."""
+        slot = self._slots.get((product_id, warehouse_id))
+        return None if slot is None else int(self.rows[slot])
+
+    # ------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------
+    def add_listener(self, listener) -> None:
+        """Calls `listener(slot)` after a pair changes, `listener(None)` after every pair may have."""
+        self._listeners.append(listener)
+
+    def _notify(self, slot: int | None) -> None:
+        for listener in self._listeners:
+            try:
+                listener(slot)
+            except Exception as e:
+                print(f"⚠️ Latest view listener failed: {e}")
+
+    def refresh(self, row: int) -> bool:
+        """
+        Re-reads Inventory_Level of store row `row` into the view; False if it
+        isn't a latest row. Reading under the view lock means concurrent scans
+        can't leave an older level behind.
+        """
+        slot = self._slot_of_row.get(row)
+        if slot is None:
+            return False
+        with self._lock:
+            data = self._data
+            level = int(self._store.codes('Inventory_Level')[row])
+            data['Inventory_Level'][slot] = level
+            data['Risk_Gap'][slot] = data['Dynamic_ROP'][slot] - level
+            data['Overstock_Ratio'][slot] = level / max(data['Units_Sold'][slot], 1)
+            self.version += 1
+        self._notify(slot)  # outside the lock: listeners read the view back
+        return True
+
+    def attach_dynamic_rop(self, df: pd.DataFrame) -> None:
+        """
+        Takes Dynamic_ROP from the last row of each pair in a frame sorted by
+        Product_ID, Warehouse_ID, Date (the training frame).
+        """
+        if df.empty:
+            return
+        groups = df.groupby(['Product_ID', 'Warehouse_ID'], sort=False, observed=True).ngroup().to_numpy()
+        ends = np.append(np.flatnonzero(np.diff(groups)), len(df) - 1)
+        products = df['Product_ID'].to_numpy()
+        warehouses = df['Warehouse_ID'].to_numpy()
+        rop = df['Dynamic_ROP'].to_numpy(dtype=np.float64)
+        with self._lock:
+            data = self._data
+            for end in ends:
+                slot = self._slots.get((str(products[end]), str(warehouses[end])))
+                if slot is not None:
+                    data['Dynamic_ROP'][slot] = rop[end]
+            data['Risk_Gap'] = data['Dynamic_ROP'] - data['Inventory_Level']
+            self.version += 1
+        self._notify(None)
+
+    # ------------------------------------------
+    # Reads (O(pairs), never O(history))
+    # ------------------------------------------
+    def frame(self, columns: list[str] | None = None, slots: list[int] | None = None) -> pd.DataFrame:
+        """Consistent copy of the view as a DataFrame, one row per pair (or per slot in `slots`, in order)."""
+        with self._lock:
+            if slots is not None:
+                return pd.DataFrame({name: self._data[name][slots] for name in columns or list(self._data)})
+            return pd.DataFrame({name: self._data[name].copy() for name in columns or list(self._data)})
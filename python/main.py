@@ -1,16 +1,26 @@
 import pandas as pd
 import numpy as np
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException, Request  # type: ignore
+from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException, Query, Request  # type: ignore
 from fastapi.middleware.cors import CORSMiddleware  # type: ignore
 from fastapi.responses import StreamingResponse, Response  # type: ignore
 from pydantic import BaseModel  # type: ignore
 from typing import Optional
 import random
-import csv
 import os
 import time
+import threading
 import asyncio
 import ml_model  # type: ignore
+from inventory_store import InventoryStore  # type: ignore
+from alert_engine import LOW_STOCK, OVERSTOCK, AlertEngine  # type: ignore
+from change_feed import ChangeFeed  # type: ignore
+from event_log import SSE_HEADERS, SSE_KEEPALIVE, SSE_MEDIA_TYPE, SequencedLog, sse_message  # type: ignore
+from frame_broadcast import MEDIA_TYPE as MJPEG_MEDIA_TYPE, FrameBroadcaster  # type: ignore
+from inventory_query import MAX_PAGE, InventoryQuery  # type: ignore
+from journal import InventoryJournal  # type: ignore
+from latest_view import LatestStateView  # type: ignore
+from response_cache import ResponseCache, data_version  # type: ignore
+from serialization import NDJSON_MEDIA_TYPE, Field, Records, build_records, dumps, json_response, text  # type: ignore
 
 app = FastAPI(title="Semicolons Inventory API v2", version="2.0")
 
@@ -27,40 +37,88 @@ app.add_middleware(
 # ==========================================
 CSV_PATH = os.path.join(os.path.dirname(__file__), "inventory_control_tower_master.csv")
 
-_data_cache: list[dict] = []
-
-def load_data() -> list[dict]:
-    global _data_cache
-    if _data_cache:
-        return _data_cache
-    with open(CSV_PATH, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        _data_cache = []
-        for i, row in enumerate(reader):
-            if i >= 10000:
-                break
-            # Convert numeric fields
-            for key in row:
-                try:
-                    if '.' in row[key]:
-                        row[key] = float(row[key])
-                    else:
-                        row[key] = int(row[key])
-                except (ValueError, TypeError):
-                    pass
-            _data_cache.append(row)
-
-    return _data_cache
+_store: Optional[InventoryStore] = None
+_journal: Optional[InventoryJournal] = None
+_latest_view: Optional[LatestStateView] = None
+_alert_engine: Optional[AlertEngine] = None
+
+# Dashboard aggregates, recomputed only when data_version moves (scans, training)
+response_cache = ResponseCache(data_version)
+# Compact change events pushed to dashboards over /api/events
+changes = ChangeFeed()
+
+def load_data() -> InventoryStore:
+    global _store
+    if _store is None:
+        _store = InventoryStore.open(CSV_PATH)
+    return _store
+
+def get_journal() -> InventoryJournal:
+    """Inventory mutation log; replays any un-compacted scans onto the store on first use."""
+    global _journal
+    if _journal is None:
+        _journal = InventoryJournal(load_data(), CSV_PATH)
+        replayed = _journal.open()
+        if replayed:
+            print(f"✅ Replayed {replayed} journaled inventory changes")
+    return _journal
+
+def get_latest_view() -> LatestStateView:
+    """Latest row per Product+Warehouse, built after the journal replay and kept current by scans."""
+    global _latest_view, _alert_engine
+    if _latest_view is None:
+        get_journal()
+        view = LatestStateView(load_data())
+        # Registered before training attaches Dynamic_ROP, so it sees every change
+        _alert_engine = AlertEngine(view, on_transition=_publish_alert)
+        _latest_view = view
+    return _latest_view
+
+def get_alert_engine() -> AlertEngine:
+    get_latest_view()
+    return _alert_engine
+
+def _publish_alert(slot: int, alert: str, active: bool) -> None:
+    """Alert engine transition -> change event (raised or cleared, after hysteresis)."""
+    view = _latest_view
+    changes.publish("alert", product_id=str(view.value(slot, 'Product_ID')),
+                    warehouse_id=str(view.value(slot, 'Warehouse_ID')), alert=alert, active=active,
+                    level=int(view.value(slot, 'Inventory_Level')))
+
+def _train_model():
+    try:
+        summary = ml_model.train_model(latest=get_latest_view())
+    except Exception as e:
+        print(f"⚠️ ML Model training failed: {e}")
+        return
+    if summary:
+        changes.publish("model", fingerprint=summary["model_fingerprint"], mae=summary["mae"], r2=summary["r2"],
+                        trained_at=summary["model_trained_at"])
 
 # Pre-load on startup
 @app.on_event("startup")
 def startup():
-    load_data()
-    print(f"✅ Loaded {len(_data_cache)} records from CSV")
-    try:
-        ml_model.train_model()
-    except Exception as e:
-        print(f"⚠️ ML Model training failed: {e}")
+    start = time.perf_counter()
+    store = load_data()
+    store.index  # build the ID and search indexes before the first request arrives
+    store.search_index
+    get_journal()
+    get_latest_view()
+    print(f"✅ Loaded {len(store)} records from snapshot ({store.nbytes / 1e6:.1f} MB columnar) "
+          f"in {time.perf_counter() - start:.2f}s")
+    # Training runs off the startup path; ML endpoints answer 503 until it finishes
+    threading.Thread(target=_train_model, name="ml-train", daemon=True).start()
+
+@app.on_event("startup")
+async def start_engine_watch():
+    asyncio.get_running_loop().create_task(_watch_engine())
+
+@app.on_event("shutdown")
+def shutdown():
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
 
 # ==========================================
 # PYDANTIC MODELS
@@ -77,6 +135,10 @@ class ScanItem(BaseModel):
     physical_location: str
     status: str
     detected_shape: Optional[str] = "UNKNOWN"
+    scan_id: Optional[str] = None  # set by engine.py so retried batches aren't logged twice
+
+class ScanBatch(BaseModel):
+    items: list[ScanItem]
 
 class DemandPredictRequest(BaseModel):
     product_id: str
@@ -84,76 +146,173 @@ class DemandPredictRequest(BaseModel):
     promotion: int = 0
     lead_time: int = 14
 
+class DemandBatchRequest(BaseModel):
+    items: Optional[list[DemandPredictRequest]] = None  # None = every known Product+Warehouse pair
+    promotion: int = 0     # defaults for the all-pairs form
+    lead_time: int = 14
+
+class AlertThresholds(BaseModel):
+    rop_multiplier: Optional[float] = None   # low stock below Dynamic_ROP x this
+    overstock_ratio: Optional[float] = None  # overstock above this x daily sales
+    hysteresis: Optional[float] = None       # fraction past the threshold needed to clear
+
 class ManualScanAction(BaseModel):
     product_id: str
     mode: str  # "add", "remove", or "return"
 
+SCAN_MODE_DELTAS = {"add": 1, "remove": -1, "return": 1}
+ALERTS_PER_TYPE = 5
+
 # ==========================================
 # VISION ENGINE STATE (in-memory)
 # ==========================================
-scan_log: list[dict] = []
-return_log: list[dict] = []  # Tracks returned products
+# Ring buffers with sequence ids: clients poll with ?since=<seq> (or wait) for new entries only
+scan_log = SequencedLog(capacity=100)
+return_log = SequencedLog(capacity=1_000)  # Tracks returned products
+LONG_POLL_MAX_SECONDS = 30.0
+SSE_KEEPALIVE_SECONDS = 15.0
+ENGINE_TIMEOUT_SECONDS = 10  # engine counts as offline without a post for this long
 last_engine_heartbeat: float = 0
-latest_frame: bytes = b""  # Latest JPEG frame from engine.py
+frame_hub = FrameBroadcaster()  # latest JPEG from engine.py, fanned out to every viewer
+_seen_scan_ids: dict[str, None] = {}  # insertion-ordered, oldest evicted first
+SEEN_SCAN_IDS = 10_000
 
 # ==========================================
 # SUPPLY CHAIN ENDPOINTS
 # ==========================================
 @app.get("/api/inventory")
-def get_inventory_status(limit: int = 50):
+def get_inventory_status(limit: int = Query(50, ge=0, le=MAX_PAGE), cursor: Optional[str] = None, fields: Optional[str] = None,
+                         warehouse: Optional[str] = None, region: Optional[str] = None,
+                         below_rop: bool = False, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                         format: str = "json"):
+    """
+    Pages through inventory rows in file order, at most MAX_PAGE (1000) per
+    page; a larger `limit` is rejected with 422. `fields` is a comma-separated
+    column list; `warehouse` / `region` take comma-separated values; `below_rop`
+    keeps rows with Inventory_Level < Reorder_Point; dates are inclusive
+    (YYYY-MM-DD or DD-MM-YYYY). Pass `next_cursor` back as `cursor` for the
+    next page. The body is streamed as rows are rendered; `format=ndjson` sends
+    one row per line followed by a {"count", "fields", "next_cursor"} line.
+    """
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'ndjson'")
     try:
-        data = load_data()[:limit]  # type: ignore
-        return {"count": len(data), "data": data}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        query = InventoryQuery(load_data(), fields=fields, warehouse=warehouse, region=region,
+                               below_rop=below_rop, date_from=date_from, date_to=date_to,
+                               cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if format == "ndjson":
+        return StreamingResponse(query.stream(ndjson=True), media_type=NDJSON_MEDIA_TYPE)
+    return StreamingResponse(query.stream(), media_type="application/json")
+
+# ==========================================
+# RECORD SPECS (DataFrame columns -> response fields)
+# ==========================================
+WAREHOUSE_ITEM_FIELDS = {
+    "id": Field('SKU_ID', str),
+    "name": Field('Product_ID', str),
+    "stock": Field('Inventory_Level', int),
+    "safetyStock": Field('Reorder_Point', int),
+}
+LOW_STOCK_ALERT_FIELDS = {
+    "id": Field(lambda f: "LS-" + text(f['Product_ID']) + "-" + text(f['Warehouse_ID'])),
+    "type": Field(lambda f: "low_stock"),
+    "severity": Field(lambda f: "critical"),
+    "title": Field(lambda f: text(f['Product_ID']) + " @ " + text(f['Warehouse_ID'])),
+    "detail": Field(lambda f: "Stock: " + text(f['Inventory_Level'].to_numpy().astype(np.int64))
+                    + " units — below reorder point (" + text(np.round(f['Dynamic_ROP'].to_numpy(np.float64), 0))
+                    + "). High demand item, reorder immediately."),
+    "tag": Field(lambda f: "Low Stock"),
+}
+HIGH_STOCK_ALERT_FIELDS = {
+    "id": Field(lambda f: "HS-" + text(f['Product_ID']) + "-" + text(f['Warehouse_ID'])),
+    "type": Field(lambda f: "high_stock"),
+    "severity": Field(lambda f: "warning"),
+    "title": LOW_STOCK_ALERT_FIELDS["title"],
+    "detail": Field(lambda f: "Stock: " + text(f['Inventory_Level'].to_numpy().astype(np.int64))
+                    + " units — " + text(np.round(f['Overstock_Ratio'].to_numpy(np.float64), 0))
+                    + "× daily sales. Capital stuck, consider promotion."),
+    "tag": Field(lambda f: "Overstock"),
+}
+INV_VS_ROP_FIELDS = {
+    "product_id": 'Product_ID',
+    "inventory": Field('Inventory_Level', int),
+    "reorder_point": Field('Dynamic_ROP', decimals=0),
+}
+TIME_SERIES_FIELDS = {
+    "date": 'date',
+    "sold": Field('total_sold', int),
+    "avg_inv": Field('avg_inventory', decimals=0),
+}
+REVENUE_FIELDS = {
+    "product_id": 'Product_ID',
+    "revenue": Field('Revenue', decimals=2),
+    "units": Field('Units_Sold', int),
+}
+WAREHOUSE_COMPARISON_FIELDS = {
+    "warehouse": 'Warehouse_ID',
+    "avg_inventory": Field('avg_inv', decimals=0),
+    "total_sold": Field('total_sold', int),
+    "revenue": Field('total_revenue', decimals=0),
+    "stockouts": Field('stockouts', int),
+    "avg_lead_time": Field('avg_lead', decimals=1),
+    "fill_rate": Field('fill_rate', decimals=1),
+}
+HEATMAP_FIELDS = {
+    "product_id": 'Product_ID',
+    "warehouse": 'Warehouse_ID',
+    "level": Field('Units_Sold', decimals=0),
+}
+
+
+def _top_per_group(frame: pd.DataFrame, group: str, by: str, n: int) -> pd.DataFrame:
+    """The n largest `by` rows of each `group` (groups ascending, ties in frame order)."""
+    ordered = frame.sort_values([group, by], ascending=[True, False], kind='stable')
+    return ordered.groupby(group, sort=False, observed=True).head(n)
 
 @app.get("/api/inventory/warehouse-stats")
 def get_warehouse_stats():
     """Returns top products per warehouse from the real CSV data."""
     try:
-        df = pd.DataFrame(load_data())
-        # Get the latest entry per SKU+Warehouse combo
-        latest = df.sort_values('Date').drop_duplicates(subset=['SKU_ID', 'Warehouse_ID'], keep='last')
+        # Latest entry per Product+Warehouse combo (maintained view)
+        latest = get_latest_view().frame(['SKU_ID', 'Warehouse_ID', 'Product_ID',
+                                          'Units_Sold', 'Inventory_Level', 'Reorder_Point'])
         
+        # Top 3 products by Units_Sold (most active) in each warehouse
+        top = _top_per_group(latest, 'Warehouse_ID', 'Units_Sold', 3)
+        items = build_records(top, WAREHOUSE_ITEM_FIELDS)
         result = {}
-        for wh_id, group in latest.groupby('Warehouse_ID'):
-            # Top 3 products by Units_Sold (most active) in this warehouse
-            top = group.nlargest(3, 'Units_Sold')
-            items = []
-            for _, row in top.iterrows():
-                items.append({
-                    "id": str(row.get('SKU_ID', '')),
-                    "name": str(row.get('Product_ID', row.get('SKU_ID', ''))),
-                    "stock": int(row.get('Inventory_Level', 0)),
-                    "safetyStock": int(row.get('Reorder_Point', 0)),
-                })
+        for wh_id, item in zip(top['Warehouse_ID'].tolist(), items):
             # Map WH_1 -> "WH 1" for the frontend zone keys
-            zone_key = str(wh_id).replace('_', ' ')
-            result[zone_key] = items
-        
+            result.setdefault(str(wh_id).replace('_', ' '), []).append(item)
+
         return {"warehouses": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/kpis")
-def get_dashboard_kpis():
+def get_dashboard_kpis(request: Request):
     """KPIs computed from CSV data"""
+    return response_cache.respond(request, "kpis", _dashboard_kpis)
+
+def _dashboard_kpis():
     try:
-        data = load_data()
-        total_records = len(data)
+        store = load_data()
+        total_records = len(store)
         
         # Count stockout events
-        stockout_count = sum(1 for row in data if row.get("Stockout_Flag") == 1)
+        stockout_count = int((store.codes("Stockout_Flag") == 1).sum())
         
         # Average Inventory Level
-        inv_levels = [row.get("Inventory_Level", 0) for row in data if isinstance(row.get("Inventory_Level"), (int, float))]
-        avg_inv = round(sum(inv_levels) / len(inv_levels), 2) if inv_levels else 0  # type: ignore
+        inv_levels = store.codes("Inventory_Level")
+        avg_inv = round(float(inv_levels.mean()), 2) if total_records else 0
 
         return {
             "total_items_tracked": total_records,
             "stockout_events": stockout_count,
             "average_inventory_level": avg_inv,
-            "returns_today": len(return_log)
+            "returns_today": return_log.total
         }
     except Exception as e:
          raise HTTPException(status_code=500, detail=str(e))
@@ -186,145 +345,207 @@ def predict_stockout_risk(features: SupplyChainFeatures):
         }
     }
 
+SEARCH_LIMIT = 100
+
 @app.get("/api/inventory/search")
 def search_inventory(q: str = ""):
-    """Fuzzy search across all inventory columns."""
+    """
+    Case-insensitive substring search, via the n-gram index, over seven fields:
+    Product_ID, SKU_ID, City, Region, Warehouse_ID, Supplier_ID and On_Route_To
+    (the full-row scan it replaced matched every column, numbers and dates
+    included). Best matches first, capped at SEARCH_LIMIT rows in `data`;
+    `count` is the number of matching rows, `has_more` whether `data` left some
+    out, and `matched_value_count` how many distinct field values matched.
+    """
     if not q.strip():
-        return {"count": 0, "data": []}
-    query = q.strip().lower()
-    data = load_data()
-    results = []
-    for row in data:
-        for val in row.values():
-            if query in str(val).lower():
-                results.append(row)
-                break
-    return {"count": len(results), "data": results[:100]}
+        return {"count": 0, "matched_value_count": 0, "has_more": False, "data": []}
+    store = load_data()
+    rows, count, matched_value_count, has_more = store.search_index.search(q, limit=SEARCH_LIMIT)
+    return json_response({"count": count, "matched_value_count": matched_value_count, "has_more": has_more,
+                          "data": Records(store.record_columns(rows))})
 
 @app.post("/api/inventory/scan")
 def update_inventory_csv(action: ManualScanAction):
-    """Updates the inventory level in the cache and pushes back to CSV."""
-    global _data_cache
-    updated = False
-    
-    # Reload to ensure we have data
-    if not _data_cache:
-        load_data()
-
-    for row in _data_cache:
-        # Match by product_id, SKU_ID, or Product_ID — case-insensitive
-        pid = action.product_id.strip()
-        if (str(row.get('Product_ID', '')).strip().lower() == pid.lower() or
-            str(row.get('SKU_ID', '')).strip().lower() == pid.lower() or
-            str(row.get('Product_Name', '')).strip().lower() == pid.lower()):
-            current_inv = int(row.get('Inventory_Level', 0))
-            if action.mode == 'add':
-                row['Inventory_Level'] = current_inv + 1
-            elif action.mode == 'remove':
-                row['Inventory_Level'] = max(0, current_inv - 1)
-            elif action.mode == 'return':
-                row['Inventory_Level'] = current_inv + 1
-                # Log the return
-                return_log.append({
-                    "product_id": str(row.get('Product_ID', '')),
-                    "sku_id": str(row.get('SKU_ID', '')),
-                    "warehouse_id": str(row.get('Warehouse_ID', 'WH_1')),
-                    "timestamp": pd.Timestamp.now().isoformat(),
-                    "previous_level": current_inv,
-                    "new_level": current_inv + 1
-                })
-            updated = True
-            
-            # Write entire cache back to CSV
-            try:
-                with open(CSV_PATH, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.DictWriter(f, fieldnames=_data_cache[0].keys())
-                    writer.writeheader()
-                    writer.writerows(_data_cache)
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Failed to write CSV: {str(e)}")
-            
-            status_msg = "returned" if action.mode == "return" else "success"
-            return {
-                "status": status_msg, 
-                "new_level": row['Inventory_Level'],
-                "warehouse_id": str(row.get('Warehouse_ID', 'WH_1')),
-                "product_name": str(row.get('Product_ID', 'Unknown'))
-            }
-            
-    if not updated:
+    """Updates the inventory level in the cache and journals the change (compacted into the CSV later)."""
+    store = load_data()
+
+    # Match by product_id, SKU_ID, or Product_ID — case-insensitive
+    row = store.index.first(action.product_id, ('Product_ID', 'SKU_ID', 'Product_Name'))
+    if row is None:
         raise HTTPException(status_code=404, detail="Product ID not found in dataset.")
 
+    product_id = str(store.value(row, 'Product_ID'))
+    sku_id = str(store.value(row, 'SKU_ID'))
+    warehouse_id = str(store.value(row, 'Warehouse_ID'))
+    # Stock moves apply to the pair's current (most recent) row
+    view = get_latest_view()
+    latest_row = view.latest_row(product_id, warehouse_id)
+    if latest_row is not None:
+        row = latest_row
+    current_inv = new_level = int(store.value(row, 'Inventory_Level'))
+    delta = SCAN_MODE_DELTAS.get(action.mode, 0)
+    if delta:
+        try:
+            current_inv, new_level = get_journal().record(row, delta, action.mode)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to journal inventory change: {str(e)}")
+        changes.publish("inventory", product_id=product_id, warehouse_id=warehouse_id, level=new_level,
+                        previous_level=current_inv, delta=new_level - current_inv, mode=action.mode)
+        view.refresh(row)  # the alert engine re-evaluates this pair (and publishes any alert transition)
+
+    if action.mode == 'remove' and new_level < current_inv:
+        # A unit leaving the shelf is demand: keep the rolling features fresh
+        ml_model.record_sale(product_id, warehouse_id, units=current_inv - new_level)
+
+    if action.mode == 'return':
+        # Log the return
+        return_log.append({
+            "product_id": product_id,
+            "sku_id": sku_id,
+            "warehouse_id": warehouse_id,
+            "timestamp": pd.Timestamp.now().isoformat(),
+            "previous_level": current_inv,
+            "new_level": new_level
+        })
+        changes.publish("return", product_id=product_id, warehouse_id=warehouse_id, level=new_level)
+
+    if delta:
+        data_version.bump()
+
+    status_msg = "returned" if action.mode == "return" else "success"
+    return {
+        "status": status_msg, 
+        "new_level": new_level,
+        "warehouse_id": warehouse_id,
+        "product_name": product_id
+    }
+
 @app.get("/api/returns")
-def get_returns():
-    """Returns the return log with count and recent entries."""
-    return {"count": len(return_log), "data": return_log[-50:]}
+async def get_returns(since: Optional[int] = None, wait: float = 0):
+    """
+    Returns the return log with count and recent entries (oldest first). With
+    `since`, only returns logged after that seq; `wait` long-polls up to that
+    many seconds for one.
+    """
+    if since is None:
+        entries, _ = return_log.since(max(return_log.last_seq - 50, 0))
+        return {"count": return_log.total, "seq": return_log.last_seq, "data": entries}
+    return await _log_delta(return_log, since, wait, "data")
 
 @app.get("/api/alerts")
-def get_alerts():
+def get_alerts(request: Request):
     """Returns stock alerts (low stock / high stock) from the ML dataset."""
-    alerts = []
-    try:
-        if ml_model._df is not None:
-            df = ml_model._df
-            # Get latest row per SKU+Warehouse
-            latest = df.sort_values('Date').groupby(['Product_ID', 'Warehouse_ID']).last().reset_index()
-
-            # Low stock alerts: inventory below dynamic reorder point
-            low_stock = latest[latest['Inventory_Level'] < latest['Dynamic_ROP']].sort_values('Inventory_Level')
-            for _, row in low_stock.head(5).iterrows():
-                alerts.append({
-                    "id": f"LS-{row['Product_ID']}-{row['Warehouse_ID']}",
-                    "type": "low_stock",
-                    "severity": "critical",
-                    "title": f"{row['Product_ID']} @ {row['Warehouse_ID']}",
-                    "detail": f"Stock: {int(row['Inventory_Level'])} units — below reorder point ({round(float(row['Dynamic_ROP']), 0)}). High demand item, reorder immediately.",
-                    "tag": "Low Stock",
-                })
-
-            # High stock alerts: inventory way above demand (overstock)
-            latest['Overstock_Ratio'] = latest['Inventory_Level'] / (latest['Units_Sold'].clip(lower=1))
-            high_stock = latest[latest['Overstock_Ratio'] > 50].sort_values('Overstock_Ratio', ascending=False)
-            for _, row in high_stock.head(5).iterrows():
-                alerts.append({
-                    "id": f"HS-{row['Product_ID']}-{row['Warehouse_ID']}",
-                    "type": "high_stock",
-                    "severity": "warning",
-                    "title": f"{row['Product_ID']} @ {row['Warehouse_ID']}",
-                    "detail": f"Stock: {int(row['Inventory_Level'])} units — {round(float(row['Overstock_Ratio']), 0)}× daily sales. Capital stuck, consider promotion.",
-                    "tag": "Overstock",
-                })
-    except Exception as e:
-        print(f"Alert generation error: {e}")
+    return response_cache.respond(request, "alerts", _alerts)
 
+def _alerts():
+    # No try/except here: a failure must surface as a 500, not as an empty list
+    # that respond() would cache until the next data change.
+    alerts = []
+    view = get_latest_view()
+    engine = get_alert_engine()
+    if engine.ready:
+        # Top alerts come straight off the engine's heaps (maintained on every scan)
+        for alert, fields in ((LOW_STOCK, LOW_STOCK_ALERT_FIELDS), (OVERSTOCK, HIGH_STOCK_ALERT_FIELDS)):
+            slots = engine.top(alert, ALERTS_PER_TYPE)
+            if slots:
+                alerts += build_records(view.frame(slots=slots), fields)
     return {"alerts": alerts}
 
+@app.get("/api/alerts/config")
+def get_alert_config():
+    """Alert thresholds and how many pairs currently alert per type."""
+    engine = get_alert_engine()
+    return {**engine.thresholds(), "active": {LOW_STOCK: engine.count(LOW_STOCK), OVERSTOCK: engine.count(OVERSTOCK)}}
+
+@app.put("/api/alerts/config")
+def set_alert_config(thresholds: AlertThresholds):
+    """Changes alert thresholds (omitted fields keep their value) and re-evaluates every pair."""
+    try:
+        config = get_alert_engine().configure(**thresholds.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    data_version.bump()
+    changes.publish("alert_config", **config)
+    return get_alert_config()
+
 @app.get("/api/ml/selling-insights")
-def get_selling_insights():
+def get_selling_insights(request: Request):
+    return response_cache.respond(request, "selling-insights", _selling_insights)
+
+def _selling_insights():
     result = ml_model.get_selling_insights() if hasattr(ml_model, 'get_selling_insights') else {"fast_movers": [], "slow_movers": []}
     return result
 
+async def _log_delta(log: SequencedLog, since: int, wait: float, key: str) -> dict:
+    """Entries after `since` (long-polling up to `wait` seconds when there are none yet)."""
+    if wait > 0:
+        await log.wait(since, min(wait, LONG_POLL_MAX_SECONDS))
+    entries, truncated = log.since(since)
+    return {"count": log.total, "seq": log.last_seq, "truncated": truncated, key: entries}
+
+def _resume_seq(request: Request, since: Optional[int], current: int) -> int:
+    """Where an SSE stream starts: `since`, else after the browser's Last-Event-ID (reconnect), else now."""
+    last_event_id = request.headers.get("last-event-id", "")
+    return since if since is not None else int(last_event_id) if last_event_id.isdigit() else current
+
+def _sse_log(log: SequencedLog, request: Request, since: Optional[int]):
+    """
+    SSE stream of a SequencedLog: every entry after `since` (default: after
+    the browser's Last-Event-ID on reconnect, else only new ones), then each
+    new entry as it is appended.
+    """
+    start = _resume_seq(request, since, log.last_seq)
+
+    async def events():
+        seq = start
+        while True:
+            if not await log.wait(seq, SSE_KEEPALIVE_SECONDS):
+                yield SSE_KEEPALIVE
+                continue
+            entries, _ = log.since(seq)
+            for entry in entries:
+                yield sse_message(dumps(entry), event_id=entry["seq"])
+            seq = entries[-1]["seq"] if entries else log.last_seq
+    return StreamingResponse(events(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
 @app.get("/api/scan-log")
-def get_scan_log():
-    global scan_log
-    return {"log": scan_log}
+async def get_scan_log(since: Optional[int] = None, wait: float = 0):
+    """
+    Scanned items for the frontend Vision page, newest first. With `since`,
+    only entries logged after that seq (empty when idle); `wait` long-polls up
+    to that many seconds for one. `truncated` means entries were missed.
+    """
+    if since is None:
+        return {"count": scan_log.total, "seq": scan_log.last_seq, "log": scan_log.latest()}
+    delta = await _log_delta(scan_log, since, wait, "log")
+    delta["log"].reverse()
+    return delta
+
+@app.get("/api/scan-log/stream")
+def stream_scan_log(request: Request, since: Optional[int] = None):
+    """SSE: one `data:` JSON entry per scan, with the entry's seq as the event id."""
+    return _sse_log(scan_log, request, since)
+
+@app.get("/api/returns/stream")
+def stream_returns(request: Request, since: Optional[int] = None):
+    """SSE form of /api/returns."""
+    return _sse_log(return_log, request, since)
 
 
 @app.get("/api/inventory/chart-data")
-def get_chart_data():
+def get_chart_data(request: Request):
     """Pre-aggregated data for all 6 inventory charts."""
+    return response_cache.respond(request, "chart-data", _chart_data)
+
+def _chart_data():
     if ml_model._df is None:
         raise HTTPException(status_code=503, detail="ML model not trained yet")
     df = ml_model._df
 
     # 1. Inventory Level vs Reorder Point (latest per SKU, top 10 by demand)
-    latest = df.sort_values('Date').groupby('Product_ID').last().reset_index()
+    latest = get_latest_view().frame()
     top_products = latest.sort_values('Units_Sold', ascending=False).head(10)
-    inv_vs_rop = [
-        {"product_id": row['Product_ID'], "inventory": int(row['Inventory_Level']),
-         "reorder_point": round(float(row['Dynamic_ROP']), 0)}
-        for _, row in top_products.iterrows()
-    ]
+    inv_vs_rop = build_records(top_products, INV_VS_ROP_FIELDS)
 
     # 2. Units Sold over time (daily aggregate)
     daily = df.groupby(df['Date'].dt.strftime('%Y-%m-%d')).agg(
@@ -332,11 +553,7 @@ def get_chart_data():
         avg_inventory=('Inventory_Level', 'mean'),
     ).reset_index().rename(columns={'Date': 'date'})
     daily = daily.tail(30)  # last 30 days
-    time_series = [
-        {"date": row['date'], "sold": int(row['total_sold']),
-         "avg_inv": round(float(row['avg_inventory']), 0)}
-        for _, row in daily.iterrows()
-    ]
+    time_series = build_records(daily, TIME_SERIES_FIELDS)
 
     # 3. Stock Health Donut
     low = int((latest['Inventory_Level'] < latest['Dynamic_ROP']).sum())
@@ -354,15 +571,11 @@ def get_chart_data():
     # 4. Top 10 Revenue SKUs
     latest['Revenue'] = latest['Units_Sold'] * latest['Unit_Cost']
     top_rev = latest.sort_values('Revenue', ascending=False).head(10)
-    revenue = [
-        {"product_id": row['Product_ID'], "revenue": round(float(row['Revenue']), 2),
-         "units": int(row['Units_Sold'])}
-        for _, row in top_rev.iterrows()
-    ]
+    revenue = build_records(top_rev, REVENUE_FIELDS)
 
     # 5. Warehouse Comparison (with revenue)
     df['_Revenue'] = df['Units_Sold'] * df['Unit_Cost']
-    wh_stats = df.groupby('Warehouse_ID').agg(
+    wh_stats = df.groupby('Warehouse_ID', observed=True).agg(
         avg_inv=('Inventory_Level', 'mean'),
         total_sold=('Units_Sold', 'sum'),
         total_revenue=('_Revenue', 'sum'),
@@ -370,27 +583,10 @@ def get_chart_data():
         avg_lead=('Supplier_Lead_Time_Days', 'mean'),
         fill_rate=('Inventory_Level', lambda x: (x > 0).mean() * 100),
     ).reset_index()
-    warehouse = [
-        {"warehouse": row['Warehouse_ID'],
-         "avg_inventory": round(float(row['avg_inv']), 0),
-         "total_sold": int(row['total_sold']),
-         "revenue": round(float(row['total_revenue']), 0),
-         "stockouts": int(row['stockouts']),
-         "avg_lead_time": round(float(row['avg_lead']), 1),
-         "fill_rate": round(float(row['fill_rate']), 1)}
-        for _, row in wh_stats.iterrows()
-    ]
+    warehouse = build_records(wh_stats, WAREHOUSE_COMPARISON_FIELDS)
 
     # 6. Heatmap — top products PER warehouse so every warehouse always has data
-    heatmap = []
-    for wh_id, wh_group in latest.groupby('Warehouse_ID'):
-        top_in_wh = wh_group.sort_values('Units_Sold', ascending=False).head(10)
-        for _, row in top_in_wh.iterrows():
-            heatmap.append({
-                "product_id": row['Product_ID'],
-                "warehouse": row['Warehouse_ID'],
-                "level": round(float(row.get('Units_Sold', row.get('Inventory_Level', 0))), 0)
-            })
+    heatmap = build_records(_top_per_group(latest, 'Warehouse_ID', 'Units_Sold', 10), HEATMAP_FIELDS)
 
     return {
         "inv_vs_rop": inv_vs_rop,
@@ -405,21 +601,21 @@ def get_chart_data():
 # ==========================================
 # VISION ENGINE ENDPOINTS
 # ==========================================
-@app.post("/api/scan-item")
-def receive_scan(item: ScanItem):
-    """Receives a scanned part from engine.py and logs it."""
-    global last_engine_heartbeat
-    last_engine_heartbeat = time.time()
-    
+def _log_scan(item: ScanItem, store: InventoryStore) -> bool:
+    """Adds one scan to the log; False if its scan_id was already logged (a retried batch)."""
+    if item.scan_id is not None:
+        if item.scan_id in _seen_scan_ids:
+            return False
+        _seen_scan_ids[item.scan_id] = None
+        if len(_seen_scan_ids) > SEEN_SCAN_IDS:
+            del _seen_scan_ids[next(iter(_seen_scan_ids))]
+
     # Try to find the actual Product Name from our dataset
     product_name_display = item.part_id
-    for row in _data_cache:
-        pid = str(row.get('Product_ID', '')).strip().lower()
-        sid = str(row.get('SKU_ID', '')).strip().lower()
-        if item.part_id.lower() in [pid, sid]:
-            name = str(row.get('Product_Name', ''))
-            product_name_display = f"{name} ({item.part_id})"
-            break
+    row = store.index.first(item.part_id, ('Product_ID', 'SKU_ID'))
+    if row is not None:
+        name = str(store.value(row, 'Product_Name')) if 'Product_Name' in store else ''
+        product_name_display = f"{name} ({item.part_id})"
 
     entry = {
         "item": product_name_display,
@@ -430,58 +626,102 @@ def receive_scan(item: ScanItem):
         "detected_shape": item.detected_shape,
         "timestamp": time.strftime("%H:%M:%S"),
     }
-    scan_log.insert(0, entry)  # newest first
+    seq = scan_log.append(entry)  # the ring keeps the newest 100
+    changes.publish("scan", scan_seq=seq, part_id=item.part_id, item=product_name_display,
+                    location=item.assigned_location, status=item.status)
+    return True
 
-    # Keep log capped at 100 entries
-    if len(scan_log) > 100:
-        scan_log.pop()
+@app.post("/api/scan-item")
+def receive_scan(item: ScanItem):
+    """Receives a scanned part from engine.py and logs it."""
+    global last_engine_heartbeat
+    last_engine_heartbeat = time.time()
+    _log_scan(item, load_data())
+    return {"status": "ok", "total_scans": scan_log.total}
 
-    return {"status": "ok", "total_scans": len(scan_log)}
+MAX_SCAN_BATCH = 1_000
 
-@app.get("/api/scan-log")
-def get_scan_log():
-    """Returns all scanned items for the frontend Vision page."""
-    return {"count": len(scan_log), "data": scan_log}
+@app.post("/api/scan-items")
+def receive_scans(batch: ScanBatch):
+    """
+    Bulk form of /api/scan-item: engine.py sends the scans gathered since its
+    last post in one request, oldest first. Items whose scan_id was already
+    logged (the engine retrying after a lost response) are skipped.
+    """
+    global last_engine_heartbeat
+    if len(batch.items) > MAX_SCAN_BATCH:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_SCAN_BATCH} items)")
+    last_engine_heartbeat = time.time()
+    store = load_data()
+    accepted = sum(_log_scan(item, store) for item in batch.items)
+    return {"status": "ok", "accepted": accepted, "duplicates": len(batch.items) - accepted,
+            "total_scans": scan_log.total}
 
 @app.get("/api/engine-status")
 def get_engine_status():
     """Returns whether the vision engine has posted recently."""
     now = time.time()
-    is_online = (now - last_engine_heartbeat) < 10  # consider online if heartbeat within 10s
+    is_online = (now - last_engine_heartbeat) < ENGINE_TIMEOUT_SECONDS
     return {
         "online": is_online,
-        "total_scans": len(scan_log),
+        "total_scans": scan_log.total,
         "last_heartbeat": last_engine_heartbeat
     }
 
+async def _watch_engine():
+    """Publishes engine online / offline transitions, so dashboards need not poll /api/engine-status."""
+    online = False
+    while True:
+        now_online = time.time() - last_engine_heartbeat < ENGINE_TIMEOUT_SECONDS
+        if now_online != online:
+            online = now_online
+            changes.publish("engine", online=online, total_scans=scan_log.total)
+        await asyncio.sleep(1.0)
+
+@app.get("/api/events")
+def stream_events(request: Request, since: Optional[int] = None, types: Optional[str] = None):
+    """
+    SSE change stream for dashboards: `event: changes` messages carrying
+    {"seq", "changes": [...]} with compact diffs — inventory (per
+    Product/Warehouse level and delta), alert (threshold crossed / cleared),
+    scan, return, model (retrained), engine (online / offline). Bursts are
+    coalesced per connection; `event: resync` means events were missed and
+    state should be refetched. `types` filters (comma-separated).
+    """
+    start = _resume_seq(request, since, changes.last_seq)
+    wanted = {t.strip() for t in types.split(',') if t.strip()} if types else None
+    return StreamingResponse(changes.stream(start, wanted), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
 # ==========================================
 # VIDEO STREAMING ENDPOINTS
 # ==========================================
 @app.post("/api/video-frame")
 async def receive_frame(request: Request):
-    """Receives a JPEG frame from engine.py."""
-    global latest_frame, last_engine_heartbeat
-    latest_frame = await request.body()
+    """Receives a JPEG frame from engine.py and hands it to every connected viewer."""
+    global last_engine_heartbeat
+    await frame_hub.publish(await request.body())
     last_engine_heartbeat = time.time()
     return {"status": "ok"}
 
 @app.get("/api/video-feed")
 async def video_feed():
-    """Serves an MJPEG stream for the browser."""
-    async def frame_generator():
-        while True:
-            if latest_frame:
-                yield (b"--frame\r\n"
-                       b"Content-Type: image/jpeg\r\n\r\n" + latest_frame + b"\r\n")
-            await asyncio.sleep(0.05)  # ~20 FPS
-    return StreamingResponse(frame_generator(), media_type="multipart/x-mixed-replace; boundary=frame")
+    """Serves an MJPEG stream for the browser: each new frame once, skipping frames it fell behind on."""
+    return StreamingResponse(frame_hub.stream(), media_type=MJPEG_MEDIA_TYPE)
+
+@app.get("/api/video-feed/stats")
+def get_video_feed_stats():
+    """Connected viewers with per-viewer delivered / skipped frames and lag."""
+    return frame_hub.stats()
 
 # ==========================================
 # ML MODEL ENDPOINTS
 # ==========================================
 @app.get("/api/ml/summary")
-def get_ml_summary():
+def get_ml_summary(request: Request):
     """Returns model accuracy, cost comparison, and feature importance."""
+    return response_cache.respond(request, "ml-summary", _ml_summary)
+
+def _ml_summary():
     if ml_model._summary is None:
         raise HTTPException(status_code=503, detail="ML model not trained yet")
     return ml_model._summary
@@ -499,10 +739,73 @@ def predict_demand(req: DemandPredictRequest):
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
+MAX_PREDICT_BATCH = 50_000
+
+@app.post("/api/ml/predict-demand/batch")
+def predict_demand_batch(req: DemandBatchRequest):
+    """
+    Predicts demand for many Product + Warehouse combos in one call (one model
+    pass). Omit `items` to score every known pair. Per-item failures are
+    reported inline with an "error" field instead of failing the batch.
+    """
+    if ml_model._model is None:
+        raise HTTPException(status_code=503, detail="ML model not trained yet")
+    if req.items is None:
+        view = get_latest_view()
+        pairs = view.frame(['Product_ID', 'Warehouse_ID'])
+        items = [{"product_id": p, "warehouse_id": w, "promotion": req.promotion, "lead_time": req.lead_time}
+                 for p, w in zip(pairs['Product_ID'], pairs['Warehouse_ID'])]
+    else:
+        if len(req.items) > MAX_PREDICT_BATCH:
+            raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_PREDICT_BATCH} items)")
+        items = [item.model_dump() for item in req.items]
+    results = ml_model.predict_demand_batch(items)
+    errors = sum(1 for r in results if "error" in r)
+    return {"count": len(results), "errors": errors, "results": results}
+
 @app.get("/api/ml/top-risk")
-def get_top_risk(limit: int = 10):
-    """Returns top N SKU+Warehouse combos most at risk of stockout."""
-    return {"data": ml_model.get_risk_rankings(top_n=limit)}
+def get_top_risk(limit: int = 10, since_version: Optional[int] = None):
+    """
+    Returns top N SKU+Warehouse combos most at risk of stockout and the ranking
+    version. With `since_version` (a version from an earlier response) it also
+    reports each combo's previous rank and the combos that left the top N.
+    """
+    return ml_model.get_risk_changes(top_n=limit, since_version=since_version)
+
+@app.get("/api/ml/forecast")
+def get_forecast(product_id: str, warehouse_id: str, days: int = 7, start: int = 0):
+    """
+    Precomputed daily demand forecast for one Product + Warehouse. `start` and
+    `days` are offsets into the forecast table, whose day 0 is the training day
+    (`forecast_start` in the response), not today. An O(1) table slice, so it
+    is not response-cached.
+    """
+    if ml_model._forecast is None:
+        raise HTTPException(status_code=503, detail="ML model not trained yet")
+    result = ml_model.get_forecast(product_id, warehouse_id, days=days, start=start)
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+@app.get("/api/ml/forecast/top-demand")
+def get_forecast_top_demand(request: Request, days: int = 7, limit: int = 10):
+    """Highest forecast demand over the first `days` days of the forecast table (from the training day)."""
+    return response_cache.respond(request, "forecast-top-demand",
+                                  lambda: {"days": days, "data": ml_model.get_forecast_rankings(days=days, top_n=limit)},
+                                  params=(days, limit))
+
+@app.get("/api/ml/reorder-plan")
+def get_reorder_plan(request: Request, review_days: int = 14, limit: int = 20):
+    """Forecast-driven reorder quantities and stockout-before-arrival alerts."""
+    return response_cache.respond(request, "reorder-plan",
+                                  lambda: {"review_days": review_days,
+                                           "data": ml_model.get_reorder_plan(review_days=review_days, top_n=limit)},
+                                  params=(review_days, limit))
+
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    """Per-endpoint response cache hit/miss/304 counters and the current data version."""
+    return response_cache.stats()
 
 @app.get("/api/ml/available-inputs")
 def get_available_inputs():
@@ -8,7 +8,19 @@ import numpy as np  # type: ignore
 from sklearn.preprocessing import LabelEncoder  # type: ignore
 from sklearn.ensemble import RandomForestRegressor  # type: ignore
 from sklearn.metrics import mean_absolute_error, r2_score  # type: ignore
+from model_registry import CompiledForest, ModelArtifact, ModelRegistry, data_fingerprint  # type: ignore
+from feature_store import RollingFeatureStore  # type: ignore
+from rolling import DEFAULT_WINDOWS, feature_names  # type: ignore
+from ingest import StageLog, build_training_cache, calendar_features  # type: ignore
+from forecast_table import DEFAULT_HORIZON_DAYS, ForecastTable  # type: ignore
+from inventory_store import InventoryStore  # type: ignore
+from latest_view import LatestStateView  # type: ignore
+from risk_ranking import RiskRanking  # type: ignore
+from response_cache import data_version  # type: ignore
+from serialization import Field, build_records, text  # type: ignore
+import datetime
 import os
+import threading
 
 # ==========================================
 # GLOBAL STATE (populated by train_model)
@@ -18,53 +30,73 @@ _le_product = None
 _le_wh = None
 _df = None
 _summary = None
+_feature_store = None
+_model_fingerprint = None
+_latest = None  # LatestStateView: latest row per Product+Warehouse with Dynamic_ROP attached
+_product_codes: dict[str, int] = {}  # label -> encoded value, for O(1) encoding in predictions
+_wh_codes: dict[str, int] = {}
+_forecast = None  # ForecastTable: daily demand per pair over the horizon, built per training run
+_risk = None  # RiskRanking over _latest: pairs by Risk_Gap, kept current by the view's change notifications
+_rolling_features = [name for w in DEFAULT_WINDOWS for name in feature_names(w)]
 _features = [
     'Product_Encoded', 'WH_Encoded', 'Month', 'DayOfWeek',
-    'Rolling_7_Demand', 'Demand_Std_7',
+    *_rolling_features,
     'Promotion_Flag', 'Supplier_Lead_Time_Days'
 ]
 
 CSV_PATH = os.path.join(os.path.dirname(__file__), "inventory_control_tower_master.csv")
+TRAINING_CACHE_DIR = os.path.join(os.path.dirname(__file__), ".cache", "training")
+MODEL_REGISTRY_DIR = os.path.join(os.path.dirname(__file__), ".cache", "models")
 
+_registry = ModelRegistry(MODEL_REGISTRY_DIR)
+_train_lock = threading.Lock()
 
-def train_model(best_k: float = 1.0):
-    """
-    Loads inventory_control_tower_master.csv, engineers features, trains a RandomForest,
-    computes static vs dynamic reorder point comparison, and stores everything
-    in module-level globals for the API to use.
-    """
-    global _model, _le_product, _le_wh, _df, _summary
-
-    # 1. Load & Subsample for memory optimization (Render 512MB limit)
-    df = pd.read_csv(CSV_PATH)
-    if len(df) > 10000:
-        df = df.sample(n=10000, random_state=42).copy()
-        
-    df['Date'] = pd.to_datetime(df['Date'], format='mixed', dayfirst=True)
-    df = df.sort_values(['Product_ID', 'Warehouse_ID', 'Date'])
-
-    # 2. Feature Engineering
-    df['Month'] = df['Date'].dt.month
-    df['DayOfWeek'] = df['Date'].dt.weekday
-    df['Week'] = df['Date'].dt.isocalendar().week.astype(int)
-
-    df['Rolling_7_Demand'] = (
-        df.groupby(['Product_ID', 'Warehouse_ID'])['Units_Sold']
-          .transform(lambda x: x.rolling(7, min_periods=1).mean())
-    )
-    df['Demand_Std_7'] = (
-        df.groupby(['Product_ID', 'Warehouse_ID'])['Units_Sold']
-          .transform(lambda x: x.rolling(7, min_periods=1).std())
-    )
-    df['Demand_Std_7'] = df['Demand_Std_7'].fillna(0)
+N_ESTIMATORS = 15
 
-    # 3. Encoding
-    _le_product = LabelEncoder()
-    _le_wh = LabelEncoder()
-    df['Product_Encoded'] = _le_product.fit_transform(df['Product_ID'])
-    df['WH_Encoded'] = _le_wh.fit_transform(df['Warehouse_ID'])
+# Per-tree bounds once the full history exceeds what a single tree needs to see
+TRAIN_SAMPLE_CAP = 200_000
+MAX_LEAF_NODES = 20_000
 
-    # 4. Train/Test Split (time-series aware)
+FORECAST_HORIZON_DAYS = DEFAULT_HORIZON_DAYS
+FORECAST_CHUNK_ROWS = 250_000  # design-matrix rows scored per forest pass
+
+
+def _load_training_frame(stages: StageLog):
+    """
+    Full history from the memory-mapped CSV snapshot (parsed once per CSV change),
+    sorted and feature-engineered chunk by chunk into the on-disk training cache.
+    Both are rebuilt only when the CSV changes.
+    """
+    store = InventoryStore.open(CSV_PATH)
+    stages.mark("snapshot", rows=len(store))
+    cache = build_training_cache(store, TRAINING_CACHE_DIR, DEFAULT_WINDOWS)
+    stages.mark("training_cache")
+    df = cache.to_frame()
+
+    # Calendar + rolling features come from the cache; the feature store keeps
+    # each pair's window state for live updates.
+    feature_store = RollingFeatureStore(DEFAULT_WINDOWS)
+    feature_store.seed(df)
+
+    # Cache categories are lexically sorted, so codes == LabelEncoder codes
+    df['Product_Encoded'] = df['Product_ID'].cat.codes
+    df['WH_Encoded'] = df['Warehouse_ID'].cat.codes
+    return store, cache, df, feature_store
+
+
+def _training_fingerprint(cache) -> str:
+    """Hash of the columns the model learns from plus its hyperparameters."""
+    columns = ['Date', 'Product_ID', 'Warehouse_ID', 'Units_Sold', 'Promotion_Flag', 'Supplier_Lead_Time_Days']
+    arrays = {name: cache.columns[name] for name in columns}
+    arrays.update({f"{name}.categories": cache.categories[name].astype(str) for name in ['Product_ID', 'Warehouse_ID']})
+    params = {"features": _features, "windows": DEFAULT_WINDOWS, "n_estimators": N_ESTIMATORS,
+              "sample_cap": TRAIN_SAMPLE_CAP, "max_leaf_nodes": MAX_LEAF_NODES}
+    return data_fingerprint(arrays, params)
+
+
+def _fit(df: pd.DataFrame) -> tuple[CompiledForest, dict]:
+    """Trains the forest on a time-ordered split; returns it with its test metrics."""
+    # Train/Test Split (time-series aware)
     split_date = df['Date'].quantile(0.8)
     train = df[df['Date'] <= split_date]
     test = df[df['Date'] > split_date]
@@ -74,68 +106,201 @@ def train_model(best_k: float = 1.0):
     X_test = test[_features]
     y_test = test['Units_Sold']
 
-    # 5. Train (Lightweight for 512MB RAM limit)
-    _model = RandomForestRegressor(n_estimators=15, random_state=42, n_jobs=1)
-    _model.fit(X_train, y_train)
+    # Train (Lightweight for 512MB RAM limit). On the full history each tree
+    # sees a bounded bootstrap sample and leaf count, so model size stays flat.
+    large = len(X_train) > TRAIN_SAMPLE_CAP
+    model = RandomForestRegressor(
+        n_estimators=N_ESTIMATORS, random_state=42, n_jobs=1,
+        max_samples=TRAIN_SAMPLE_CAP if large else None,
+        max_leaf_nodes=MAX_LEAF_NODES if large else None,
+    )
+    model.fit(X_train, y_train)
+    del X_train, y_train, train
+
+    pred = model.predict(X_test)
+    metrics = {
+        "mae": round(float(mean_absolute_error(y_test, pred)), 2),
+        "r2": round(float(r2_score(y_test, pred)), 4),
+        "feature_importance": dict(zip(_features, [round(float(x), 4) for x in model.feature_importances_])),
+        "train_rows": int(len(df) - len(y_test)),
+    }
+    return CompiledForest.from_estimator(model), metrics
 
-    pred = _model.predict(X_test)
-    mae = mean_absolute_error(y_test, pred)
-    r2 = r2_score(y_test, pred)
 
-    # 6. Dynamic Reorder Point Analysis
-    df['Dynamic_ROP'] = df['Reorder_Point'] + best_k * df['Demand_Std_7']
+def _reorder_analysis(df: pd.DataFrame, best_k: float) -> dict:
+    """Static vs dynamic reorder point comparison (only Dynamic_ROP is kept on the frame)."""
+    df['Dynamic_ROP'] = df['Reorder_Point'] + best_k * df['Demand_Std_7'].astype(np.float64)
 
-    df['Static_Understock'] = df['Inventory_Level'] < df['Reorder_Point']
-    df['Dynamic_Understock'] = df['Inventory_Level'] < df['Dynamic_ROP']
+    inventory = df['Inventory_Level'].to_numpy(dtype=np.float64)
+    static_rop = df['Reorder_Point'].to_numpy(dtype=np.float64)
+    dynamic_rop = df['Dynamic_ROP'].to_numpy()
+    unit_cost = df['Unit_Cost'].to_numpy(dtype=np.float64)
+    static_understock = inventory < static_rop
+    dynamic_understock = inventory < dynamic_rop
 
     holding_cost_rate = 0.02
     stockout_penalty = 10
 
-    df['Static_Overstock_Cost'] = np.where(
-        df['Inventory_Level'] > df['Reorder_Point'],
-        (df['Inventory_Level'] - df['Reorder_Point']) * df['Unit_Cost'] * holding_cost_rate,
-        0
+    static_overstock_cost = np.where(
+        inventory > static_rop, (inventory - static_rop) * unit_cost * holding_cost_rate, 0
     )
-    df['Dynamic_Overstock_Cost'] = np.where(
-        df['Inventory_Level'] > df['Dynamic_ROP'],
-        (df['Inventory_Level'] - df['Dynamic_ROP']) * df['Unit_Cost'] * holding_cost_rate,
-        0
+    dynamic_overstock_cost = np.where(
+        inventory > dynamic_rop, (inventory - dynamic_rop) * unit_cost * holding_cost_rate, 0
     )
-    df['Static_Stockout_Cost'] = np.where(
-        df['Inventory_Level'] < df['Reorder_Point'],
-        (df['Reorder_Point'] - df['Inventory_Level']) * stockout_penalty,
-        0
+    static_stockout_cost = np.where(
+        inventory < static_rop, (static_rop - inventory) * stockout_penalty, 0
     )
-    df['Dynamic_Stockout_Cost'] = np.where(
-        df['Inventory_Level'] < df['Dynamic_ROP'],
-        (df['Dynamic_ROP'] - df['Inventory_Level']) * stockout_penalty,
-        0
+    dynamic_stockout_cost = np.where(
+        inventory < dynamic_rop, (dynamic_rop - inventory) * stockout_penalty, 0
     )
 
-    static_total = df['Static_Overstock_Cost'].sum() + df['Static_Stockout_Cost'].sum()
-    dynamic_total = df['Dynamic_Overstock_Cost'].sum() + df['Dynamic_Stockout_Cost'].sum()
-
-    # 7. Feature Importance
-    importances = dict(zip(_features, [round(float(x), 4) for x in _model.feature_importances_]))
-
-    # 8. Store
-    _df = df
-    _summary = {
-        "mae": round(float(mae), 2),
-        "r2": round(float(r2), 4),
-        "static_understock": int(df['Static_Understock'].sum()),
-        "dynamic_understock": int(df['Dynamic_Understock'].sum()),
-        "understock_reduction": int(df['Static_Understock'].sum() - df['Dynamic_Understock'].sum()),
+    static_total = static_overstock_cost.sum() + static_stockout_cost.sum()
+    dynamic_total = dynamic_overstock_cost.sum() + dynamic_stockout_cost.sum()
+    return {
+        "static_understock": int(static_understock.sum()),
+        "dynamic_understock": int(dynamic_understock.sum()),
+        "understock_reduction": int(static_understock.sum() - dynamic_understock.sum()),
         "static_total_cost": round(float(static_total), 2),
         "dynamic_total_cost": round(float(dynamic_total), 2),
         "cost_savings": round(float(static_total - dynamic_total), 2),
         "volatility_factor_k": best_k,
-        "feature_importance": importances,
+    }
+
+
+def _design_matrix(columns: dict, n: int) -> np.ndarray:
+    """Model input rows in `_features` order from per-feature columns (or scalars)."""
+    X = np.empty((n, len(_features)))
+    for j, name in enumerate(_features):
+        X[:, j] = columns[name]
+    return X
+
+
+def _build_forecast(artifact: ModelArtifact, latest: LatestStateView, feature_store,
+                    horizon: int = FORECAST_HORIZON_DAYS, start=None) -> ForecastTable:
+    """
+    Scores every pair in the latest-state view for each of the next `horizon`
+    days (day 0 = `start`, default today) with that day's Month / DayOfWeek,
+    the pair's current rolling features and its latest supplier lead time.
+    """
+    pairs = latest.frame(['Product_ID', 'Warehouse_ID'])
+    products, warehouses = pairs['Product_ID'].to_numpy(), pairs['Warehouse_ID'].to_numpy()
+    product_codes = {str(label): code for code, label in enumerate(artifact.encoders['Product_ID'].classes_)}
+    wh_codes = {str(label): code for code, label in enumerate(artifact.encoders['Warehouse_ID'].classes_)}
+    product_enc = np.array([product_codes.get(str(p), -1) for p in products], dtype=np.float64)
+    wh_enc = np.array([wh_codes.get(str(w), -1) for w in warehouses], dtype=np.float64)
+    rolling, found = feature_store.features_many([(str(p), str(w)) for p, w in zip(products, warehouses)])
+    keep = found & (product_enc >= 0) & (wh_enc >= 0)
+    lead_time = latest.values(np.arange(len(latest)), 'Supplier_Lead_Time_Days').astype(np.float64)
+
+    start = np.datetime64(datetime.date.today() if start is None else start, 'D')
+    month, weekday = calendar_features(start + np.arange(horizon))
+    product_enc, wh_enc, rolling, lead_time = product_enc[keep], wh_enc[keep], rolling[keep], lead_time[keep]
+    demand = np.empty((len(product_enc), horizon), dtype=np.float32)
+    step = max(FORECAST_CHUNK_ROWS // max(horizon, 1), 1)
+    for lo in range(0, len(product_enc), step):
+        hi = min(lo + step, len(product_enc))
+        n = hi - lo
+        columns = {
+            'Product_Encoded': np.repeat(product_enc[lo:hi], horizon),
+            'WH_Encoded': np.repeat(wh_enc[lo:hi], horizon),
+            'Month': np.tile(month, n),
+            'DayOfWeek': np.tile(weekday, n),
+            **{name: np.repeat(rolling[lo:hi, j], horizon) for j, name in enumerate(_rolling_features)},
+            'Promotion_Flag': 0,
+            'Supplier_Lead_Time_Days': np.repeat(lead_time[lo:hi], horizon),
+        }
+        demand[lo:hi] = artifact.forest.predict(_design_matrix(columns, n * horizon)).reshape(n, horizon)
+    return ForecastTable(products[keep], warehouses[keep], start, demand,
+                         lead_time=lead_time, fingerprint=artifact.fingerprint)
+
+
+def _publish(artifact: ModelArtifact, df: pd.DataFrame, feature_store, latest: LatestStateView,
+             analysis: dict, stages: StageLog, cache):
+    """Swaps the serving globals over to `artifact` (the previous model serves until here)."""
+    global _model, _le_product, _le_wh, _df, _summary, _feature_store, _model_fingerprint, _latest
+    global _product_codes, _wh_codes, _forecast, _risk
+    forecast = _build_forecast(artifact, latest, feature_store)
+    stages.mark("forecast", pairs=len(forecast), horizon_days=forecast.horizon)
+    summary = {
+        "mae": artifact.summary["mae"],
+        "r2": artifact.summary["r2"],
+        **analysis,
+        "feature_importance": artifact.summary["feature_importance"],
         "total_records": len(df),
+        "model_fingerprint": artifact.fingerprint,
+        "model_trained_at": datetime.datetime.fromtimestamp(artifact.created).isoformat(timespec='seconds'),
+        "pipeline_stages": list(stages.stages),
+        "training_cache_stages": cache.meta.get("stages", []),
+        "forecast": {"start": str(forecast.start), "horizon_days": forecast.horizon, "pairs": len(forecast)},
     }
+    _feature_store = feature_store
+    if _risk is None or _risk.view is not latest:
+        _risk = RiskRanking(latest)  # later retrains re-rank through attach_dynamic_rop
+    _latest = latest
+    _df = df
+    le_product, le_wh = artifact.encoders['Product_ID'], artifact.encoders['Warehouse_ID']
+    product_codes = {str(label): code for code, label in enumerate(le_product.classes_)}
+    wh_codes = {str(label): code for code, label in enumerate(le_wh.classes_)}
+    _model, _le_product, _le_wh, _product_codes, _wh_codes = artifact.forest, le_product, le_wh, product_codes, wh_codes
+    _forecast = forecast
+    _model_fingerprint = artifact.fingerprint
+    _summary = summary
+    data_version.bump()
+
+
+def train_model(best_k: float = 1.0, force: bool = False, latest: LatestStateView | None = None):
+    """
+    Ingests the full inventory_control_tower_master.csv history (via its binary
+    snapshot and the on-disk training cache), loads the registered model for
+    that data or trains a RandomForest when there is none (or `force`),
+    computes static vs dynamic reorder point comparison, and stores everything
+    in module-level globals for the API to use.
 
-    print(f"✅ ML Model trained | MAE: {mae:.2f} | R²: {r2:.4f} | Records: {len(df)}")
-    return _summary
+    While a new model trains, the most recent registered model keeps serving.
+    `latest` is the caller's live latest-state view (the API passes its own so
+    scans and training update the same view); one is built from the snapshot
+    otherwise.
+    """
+    with _train_lock:
+        stages = StageLog()
+        store, cache, df, feature_store = _load_training_frame(stages)
+        analysis = _reorder_analysis(df, best_k)
+        if latest is None:
+            latest = LatestStateView(store)
+        latest.attach_dynamic_rop(df)
+        fingerprint = _training_fingerprint(cache)
+        stages.mark("load")
+
+        artifact = None if force else _registry.load(fingerprint)
+        if artifact is None and _model is None:
+            previous = _registry.latest()
+            if previous is not None and previous.features == _features:
+                _publish(previous, df, feature_store, latest, analysis, stages, cache)
+                print(f"✅ Serving previous model {previous.fingerprint[:8]} while retraining")
+
+        claimed = False
+        if artifact is None:
+            claimed = _registry.claim(fingerprint)
+            if not claimed and not force:
+                print(f"⏳ Another worker is training model {fingerprint[:8]}; waiting for it")
+                artifact = _registry.wait_for(fingerprint)
+        if artifact is None:
+            try:
+                forest, metrics = _fit(df)
+                stages.mark("train", train_rows=metrics["train_rows"])
+                artifact = _registry.save(forest, {'Product_ID': LabelEncoder().fit(df['Product_ID'].cat.categories),
+                                                   'Warehouse_ID': LabelEncoder().fit(df['Warehouse_ID'].cat.categories)},
+                                          _features, metrics, fingerprint)
+            finally:
+                if claimed:
+                    _registry.release(fingerprint)
+            print(f"✅ ML Model trained | MAE: {metrics['mae']:.2f} | R²: {metrics['r2']:.4f} | Records: {len(df)}")
+        else:
+            print(f"✅ ML Model loaded from registry ({fingerprint[:8]}) | MAE: {artifact.summary['mae']:.2f} | "
+                  f"R²: {artifact.summary['r2']:.4f} | Records: {len(df)}")
+
+        _publish(artifact, df, feature_store, latest, analysis, stages, cache)
+        return _summary
 
 
 def predict_demand(product_id: str, warehouse_id: str, promotion: int = 0, lead_time: int = 14):
@@ -145,70 +310,100 @@ def predict_demand(product_id: str, warehouse_id: str, promotion: int = 0, lead_
     """
     if _model is None or _le_product is None or _le_wh is None or _df is None:
         return {"error": "Model not trained yet. Call train_model() first."}
+    result = predict_demand_batch([{"product_id": product_id, "warehouse_id": warehouse_id,
+                                    "promotion": promotion, "lead_time": lead_time}])[0]
+    return {"error": result["error"]} if "error" in result else result
+
 
-    # Encode inputs (handle unseen Product/WH gracefully)
-    try:
-        product_enc = _le_product.transform([product_id])[0]
-    except ValueError:
-        return {"error": f"Unknown Product_ID: {product_id}. Available: {list(_le_product.classes_[:10])}..."}
-
-    try:
-        wh_enc = _le_wh.transform([warehouse_id])[0]
-    except ValueError:
-        return {"error": f"Unknown Warehouse_ID: {warehouse_id}. Available: {list(_le_wh.classes_)}"}
-
-    # Get latest stats for this Product+WH pair
-    subset = _df[(_df['Product_ID'] == product_id) & (_df['Warehouse_ID'] == warehouse_id)]
-
-    if subset.empty:
-        return {"error": f"Wrong Warehouse: Product {product_id} is not stored in {warehouse_id}."}
-    
-    latest = subset.iloc[-1]
-    rolling_demand = float(latest.get('Rolling_7_Demand', 0))
-    demand_std = float(latest.get('Demand_Std_7', 0))
-
-    # Build feature vector
-    import datetime
+def predict_demand_batch(items: list[dict]) -> list[dict]:
+    """
+    predict_demand for many requests at once (dicts with product_id, warehouse_id
+    and optional promotion / lead_time). Inputs are encoded with dict lookups,
+    rolling features and current stock are gathered per pair from the feature
+    store and the latest-state view, and the forest runs once over the whole
+    batch. Returns one result per item, in order; failed items carry "error".
+    """
+    if _model is None or _latest is None or _feature_store is None:
+        return [{"product_id": item.get("product_id"), "warehouse_id": item.get("warehouse_id"),
+                 "error": "Model not trained yet. Call train_model() first."} for item in items]
+    model, product_codes, wh_codes, latest = _model, _product_codes, _wh_codes, _latest
+
+    results: list[dict] = [{} for _ in items]
+    valid, keys, slots, encoded = [], [], [], []
+    for i, item in enumerate(items):
+        product_id, warehouse_id = item["product_id"], item["warehouse_id"]
+        results[i] = {"product_id": product_id, "warehouse_id": warehouse_id}
+        # Encode inputs (handle unseen Product/WH gracefully)
+        product_enc = product_codes.get(product_id)
+        if product_enc is None:
+            results[i]["error"] = f"Unknown Product_ID: {product_id}. Available: {list(_le_product.classes_[:10])}..."
+            continue
+        wh_enc = wh_codes.get(warehouse_id)
+        if wh_enc is None:
+            results[i]["error"] = f"Unknown Warehouse_ID: {warehouse_id}. Available: {list(_le_wh.classes_)}"
+            continue
+        slot = latest.slot(product_id, warehouse_id)
+        if slot is None:
+            results[i]["error"] = f"Wrong Warehouse: Product {product_id} is not stored in {warehouse_id}."
+            continue
+        valid.append(i)
+        keys.append((product_id, warehouse_id))
+        slots.append(slot)
+        encoded.append((product_enc, wh_enc, item.get("promotion", 0), item.get("lead_time", 14)))
+    if not valid:
+        return results
+
+    # Rolling features come from the live feature store (fresh with recent sales)
+    rolling, found = _feature_store.features_many(keys)
+    encoded = np.array(encoded, dtype=np.float64)
     now = datetime.datetime.now()
-    feature_vector = pd.DataFrame([{
-        'Product_Encoded': product_enc,
-        'WH_Encoded': wh_enc,
+    columns = {
+        'Product_Encoded': encoded[:, 0],
+        'WH_Encoded': encoded[:, 1],
         'Month': now.month,
         'DayOfWeek': now.weekday(),
-        'Rolling_7_Demand': rolling_demand,
-        'Demand_Std_7': demand_std,
-        'Promotion_Flag': promotion,
-        'Supplier_Lead_Time_Days': lead_time,
-    }])
-
-    predicted_demand = float(_model.predict(feature_vector)[0])
-    dynamic_rop = rolling_demand * lead_time + 1.0 * demand_std
+        **{name: rolling[:, j] for j, name in enumerate(_rolling_features)},
+        'Promotion_Flag': encoded[:, 2],
+        'Supplier_Lead_Time_Days': encoded[:, 3],
+    }
+    predicted = model.predict(_design_matrix(columns, len(valid)))
+    lead_time = encoded[:, 3]
+    dynamic_rop = columns['Rolling_7_Demand'] * lead_time + 1.0 * columns['Demand_Std_7']
+    current_inv = latest.values(np.array(slots), 'Inventory_Level').astype(np.float64)
 
     # Risk classification
-    if not subset.empty:
-        current_inv = float(subset.iloc[-1]['Inventory_Level'])
-    else:
-        current_inv = 0
-
-    if current_inv < dynamic_rop:
-        risk = "HIGH"
-        action = "Initiate Emergency Reorder"
-    elif current_inv < dynamic_rop * 1.2:
-        risk = "MODERATE"
-        action = "Monitor Closely, Schedule Reorder"
-    else:
-        risk = "LOW"
-        action = "No Action Needed"
+    high = current_inv < dynamic_rop
+    moderate = ~high & (current_inv < dynamic_rop * 1.2)
+    for k, i in enumerate(valid):
+        if not found[k]:
+            results[i]["error"] = f"No demand history for {keys[k][0]} @ {keys[k][1]}."
+            continue
+        if high[k]:
+            risk, action = "HIGH", "Initiate Emergency Reorder"
+        elif moderate[k]:
+            risk, action = "MODERATE", "Monitor Closely, Schedule Reorder"
+        else:
+            risk, action = "LOW", "No Action Needed"
+        results[i].update({
+            "predicted_daily_demand": round(float(predicted[k]), 2),
+            "dynamic_reorder_point": round(float(dynamic_rop[k]), 2),
+            "current_inventory": round(float(current_inv[k]), 2),
+            "risk_level": risk,
+            "suggested_action": action,
+        })
+    return results
 
-    return {
-        "product_id": product_id,
-        "warehouse_id": warehouse_id,
-        "predicted_daily_demand": round(predicted_demand, 2),
-        "dynamic_reorder_point": round(dynamic_rop, 2),
-        "current_inventory": round(current_inv, 2),
-        "risk_level": risk,
-        "suggested_action": action,
-    }
+
+def record_sale(product_id: str, warehouse_id: str, units: float = 1, date=None):
+    """
+    Feeds units sold (e.g. a scan-out at the station) into the rolling demand
+    features. Returns the pair's updated rolling features.
+    """
+    if _feature_store is None:
+        return None
+    if date is None:
+        date = np.datetime64(datetime.date.today(), 'D')
+    return _feature_store.add_units(product_id, warehouse_id, units, date)
 
 
 def get_risk_rankings(top_n: int = 10):
@@ -216,27 +411,114 @@ def get_risk_rankings(top_n: int = 10):
     Returns the top N Product+Warehouse combinations most at risk of stockout,
     ranked by (Dynamic_ROP - Inventory_Level).
     """
-    if _df is None:
+    return get_risk_changes(top_n)["data"]
+
+
+def _risk_records(view: LatestStateView, slots: list[int]) -> list[dict]:
+    return build_records(view.frame(slots=slots), RISK_RANKING_FIELDS) if slots else []
+
+
+def get_risk_changes(top_n: int = 10, since_version: int | None = None) -> dict:
+    """
+    Top N risk rankings read off the maintained ranking (no sort), with the
+    ranking `version` they reflect. Given the version a client last saw, each
+    record also carries its `previous_rank` then (None: it entered the top N
+    since) and `dropped` lists the pairs that left the top N; `reset` means
+    that version can no longer be compared against (refetch and start over).
+    """
+    risk = _risk
+    if risk is None:
+        return {"data": [], "version": 0}
+    top_n = max(top_n, 0)
+    if since_version is None:
+        slots, version = risk.top(top_n)
+        data = _risk_records(risk.view, slots)
+        for rank, record in enumerate(data, 1):
+            record["rank"] = rank
+        return {"data": data, "version": version}
+
+    diff = risk.changes_since(since_version, top_n)
+    data = _risk_records(risk.view, diff["slots"])
+    for rank, (record, slot) in enumerate(zip(data, diff["slots"]), 1):
+        record["rank"] = rank
+        record["previous_rank"] = diff["previous"].get(slot)
+    dropped = _risk_records(risk.view, diff["dropped"])
+    for record, slot in zip(dropped, diff["dropped"]):
+        record["rank"] = None
+        record["previous_rank"] = diff["previous"][slot]
+    return {"data": data, "version": diff["version"], "since_version": since_version,
+            "reset": diff["reset"], "dropped": dropped}
+
+
+def get_forecast(product_id: str, warehouse_id: str, days: int = 7, start: int = 0):
+    """
+    Precomputed daily demand forecast for one Product + Warehouse over days
+    [start, start + days) of the forecast horizon. No model call.
+    """
+    forecast = _forecast
+    if forecast is None:
+        return {"error": "Model not trained yet. Call train_model() first."}
+    slot = forecast.slot(product_id, warehouse_id)
+    if slot is None:
+        return {"error": f"No forecast for {product_id} @ {warehouse_id}."}
+    dates, demand = forecast.daily(slot, start, days)
+    return {
+        "product_id": product_id,
+        "warehouse_id": warehouse_id,
+        "forecast_start": str(forecast.start),
+        "horizon_days": forecast.horizon,
+        "total_demand": round(float(demand.sum(dtype=np.float64)), 2),
+        "daily": [{"date": str(d), "predicted_demand": round(float(v), 2)} for d, v in zip(dates, demand)],
+    }
+
+
+def get_forecast_rankings(days: int = 7, top_n: int = 10):
+    """Product+Warehouse combos with the highest forecast demand over the forecast's first `days` days."""
+    forecast = _forecast
+    if forecast is None:
         return []
+    slots, totals = forecast.top(days, top_n)
+    return [{
+        "product_id": forecast.products[slot],
+        "warehouse_id": forecast.warehouses[slot],
+        "forecast_demand": round(float(total), 2),
+        "avg_daily_demand": round(float(total) / max(min(days, forecast.horizon), 1), 2),
+    } for slot, total in zip(slots, totals)]
 
-    # Get the latest row per Product+Warehouse
-    latest = _df.sort_values('Date').groupby(['Product_ID', 'Warehouse_ID']).last().reset_index()
-
-    latest['Risk_Gap'] = latest['Dynamic_ROP'] - latest['Inventory_Level']
-    at_risk = latest[latest['Risk_Gap'] > 0].sort_values('Risk_Gap', ascending=False)
-
-    results = []
-    for _, row in at_risk.head(top_n).iterrows():
-        results.append({
-            "product_id": row['Product_ID'],
-            "warehouse_id": row['Warehouse_ID'],
-            "inventory_level": round(float(row['Inventory_Level']), 2),
-            "dynamic_rop": round(float(row['Dynamic_ROP']), 2),
-            "risk_gap": round(float(row['Risk_Gap']), 2),
-            "unit_cost": round(float(row.get('Unit_Cost', 0)), 2),
-        })
 
-    return results
+def get_reorder_plan(review_days: int = 14, top_n: int = 20):
+    """
+    Reorder quantities from the forecast table: stock up to the forecast demand
+    over each pair's lead time plus `review_days`, against current inventory.
+    Flags pairs whose stock runs out (per forecast) before a reorder placed
+    today would arrive. Windows longer than the forecast horizon are extended
+    at the last forecast day's rate and marked `extrapolated`.
+    """
+    forecast, latest = _forecast, _latest
+    if forecast is None or latest is None:
+        return []
+    view_slots = np.array([latest.slot(p, w) for p, w in zip(forecast.products, forecast.warehouses)],
+                          dtype=np.int64)
+    stock = latest.values(view_slots, 'Inventory_Level').astype(np.float64)
+    lead_time = np.ceil(forecast.lead_time).astype(np.int64)
+    lead_demand, _ = forecast.totals_extended(lead_time)
+    order_up_to, extrapolated = forecast.totals_extended(lead_time + review_days)
+    quantity = np.ceil(np.maximum(order_up_to - stock, 0))
+    cover = forecast.days_of_cover(stock)
+
+    needed = np.flatnonzero(quantity > 0)
+    ranked = needed[np.argsort(-quantity[needed], kind='stable')][:top_n]
+    return [{
+        "product_id": forecast.products[i],
+        "warehouse_id": forecast.warehouses[i],
+        "current_inventory": int(stock[i]),
+        "lead_time_days": int(lead_time[i]),
+        "lead_time_demand": round(float(lead_demand[i]), 2),
+        "days_of_cover": int(cover[i]) if cover[i] < forecast.horizon else None,
+        "reorder_quantity": int(quantity[i]),
+        "stockout_before_arrival": bool(lead_demand[i] > stock[i]),  # cover < lead time, past the horizon too
+        "extrapolated": bool(extrapolated[i]),
+    } for i in ranked]
 
 
 def get_available_products():
@@ -249,6 +531,58 @@ def get_available_products():
     }
 
 
+def _daily_rate(f: pd.DataFrame) -> np.ndarray:
+    return f['avg_daily_sold'].to_numpy(np.float64)
+
+
+def _days_of_stock(f: pd.DataFrame) -> np.ndarray:
+    return (f['latest_inventory'].to_numpy(np.float64) / np.maximum(_daily_rate(f), 0.1)).astype(np.int64)
+
+
+def _overstock_ratio(f: pd.DataFrame) -> np.ndarray:
+    return np.round(f['avg_inventory'].to_numpy(np.float64) / np.maximum(_daily_rate(f), 0.1), 0)
+
+
+def _fast_mover_recommendation(f: pd.DataFrame) -> np.ndarray:
+    days = _days_of_stock(f)
+    urgent = "Only " + text(days) + " days of stock left — reorder urgently!"
+    scheduled = text(days) + " days of stock. Schedule next reorder within " + text(np.maximum(1, days - 7)) + " days."
+    return "🔴 High demand (" + text(np.round(_daily_rate(f), 1)) + " units/day). " + np.where(days < 14, urgent, scheduled)
+
+
+def _slow_mover_recommendation(f: pd.DataFrame) -> np.ndarray:
+    return ("🟡 Low demand (" + text(np.round(_daily_rate(f), 1)) + " units/day) with " + text(_overstock_ratio(f))
+            + "× daily stock. Run a promotion or bundle deal to clear inventory and free capital.")
+
+
+RISK_RANKING_FIELDS = {
+    "product_id": 'Product_ID',
+    "warehouse_id": 'Warehouse_ID',
+    "inventory_level": Field('Inventory_Level', decimals=2),
+    "dynamic_rop": Field('Dynamic_ROP', decimals=2),
+    "risk_gap": Field('Risk_Gap', decimals=2),
+    "unit_cost": Field('Unit_Cost', decimals=2),
+}
+FAST_MOVER_FIELDS = {
+    "product_id": 'Product_ID',
+    "total_sold": Field('total_sold', int),
+    "avg_daily_demand": Field('avg_daily_sold', decimals=1),
+    "current_stock": Field('latest_inventory', int),
+    "days_of_stock_left": Field(_days_of_stock),
+    "stockout_events": Field('stockout_count', int),
+    "recommendation": Field(_fast_mover_recommendation),
+}
+SLOW_MOVER_FIELDS = {
+    "product_id": 'Product_ID',
+    "total_sold": Field('total_sold', int),
+    "avg_daily_demand": Field('avg_daily_sold', decimals=1),
+    "current_stock": Field('latest_inventory', int),
+    "overstock_ratio": Field(_overstock_ratio),
+    "unit_cost": Field('unit_cost', decimals=2),
+    "recommendation": Field(_slow_mover_recommendation),
+}
+
+
 def get_selling_insights():
     """
     Analyzes the dataset to identify fast-selling and slow-selling Products
@@ -258,7 +592,7 @@ def get_selling_insights():
         return {"fast_movers": [], "slow_movers": []}
 
     # Aggregate by Product across all warehouses and dates
-    product_stats = _df.groupby('Product_ID').agg(
+    product_stats = _df.groupby('Product_ID', observed=True).agg(
         total_sold=('Units_Sold', 'sum'),
         avg_daily_sold=('Units_Sold', 'mean'),
         latest_inventory=('Inventory_Level', 'last'),
@@ -270,37 +604,7 @@ def get_selling_insights():
 
     # Fast movers: high sales, potentially low inventory
     fast = product_stats.sort_values('total_sold', ascending=False).head(5)
-    fast_movers = []
-    for _, row in fast.iterrows():
-        days_of_stock = int(row['latest_inventory'] / max(row['avg_daily_sold'], 0.1))  # type: ignore
-        fast_movers.append({
-            "product_id": row['Product_ID'],
-            "total_sold": int(row['total_sold']),
-            "avg_daily_demand": round(float(row['avg_daily_sold']), 1),  # type: ignore
-            "current_stock": int(row['latest_inventory']),
-            "days_of_stock_left": days_of_stock,
-            "stockout_events": int(row['stockout_count']),
-            "recommendation": f"🔴 High demand ({round(float(row['avg_daily_sold']), 1)} units/day). "  # type: ignore
-                            + (f"Only {days_of_stock} days of stock left — reorder urgently!"
-                               if days_of_stock < 14
-                               else f"{days_of_stock} days of stock. Schedule next reorder within {max(1, days_of_stock - 7)} days."),
-        })
-
     # Slow movers: low sales, high inventory
     slow = product_stats.sort_values('total_sold', ascending=True).head(5)
-    slow_movers = []
-    for _, row in slow.iterrows():
-        overstock_ratio = round(float(row['avg_inventory'] / max(row['avg_daily_sold'], 0.1)), 0)  # type: ignore
-        slow_movers.append({
-            "product_id": row['Product_ID'],
-            "total_sold": int(row['total_sold']),
-            "avg_daily_demand": round(float(row['avg_daily_sold']), 1),  # type: ignore
-            "current_stock": int(row['latest_inventory']),
-            "overstock_ratio": overstock_ratio,
-            "unit_cost": round(float(row['unit_cost']), 2),  # type: ignore
-            "recommendation": f"🟡 Low demand ({round(float(row['avg_daily_sold']), 1)} units/day) "  # type: ignore
-                            + f"with {overstock_ratio}× daily stock. "
-                            + "Run a promotion or bundle deal to clear inventory and free capital.",
-        })
-
-    return {"fast_movers": fast_movers, "slow_movers": slow_movers}
+    return {"fast_movers": build_records(fast, FAST_MOVER_FIELDS),
+            "slow_movers": build_records(slow, SLOW_MOVER_FIELDS)}
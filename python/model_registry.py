@@ -0,0 +1,214 @@
+"""
+model_registry.py — Persisted, memory-mapped demand models.
+
+A trained RandomForest is flattened into plain node arrays (one concatenated
+node table for every tree) and written through columnar_cache, together with
+the encoders' classes, the feature list, the training metrics and the data
+fingerprint it was trained on. Loading maps the arrays read-only, so every
+uvicorn worker on the host shares one copy of the model through the page cache
+instead of unpickling its own, and a restart with unchanged data skips training.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np  # type: ignore
+from sklearn.preprocessing import LabelEncoder  # type: ignore
+from columnar_cache import ColumnarCache, ColumnarWriter  # type: ignore
+
+REGISTRY_VERSION = 1
+TRAIN_LEASE_SECONDS = 30 * 60  # a training claim older than this is presumed dead
+
+
+def data_fingerprint(arrays: dict[str, np.ndarray], params: dict) -> str:
+    """Content hash of the training columns plus everything else that shapes the model."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps({"version": REGISTRY_VERSION, **params}, sort_keys=True, default=str).encode())
+    for name in sorted(arrays):
+        values = np.ascontiguousarray(arrays[name])
+        h.update(f"{name}:{values.dtype.str}:{len(values)}".encode())
+        h.update(values.view(np.uint8))
+    return h.hexdigest()
+
+
+# ==========================================
+# FLATTENED FOREST
+# ==========================================
+class CompiledForest:
+    """
+    RandomForestRegressor predictions over flat node arrays.
+
+    All trees share one node table; leaves point at themselves, so every tree
+    is walked for `max_depth` vectorized steps and lands on its leaf. Matches
+    sklearn's float32 split comparisons, so predictions are identical.
+    """
+
+    def __init__(self, left, right, feature, threshold, value, roots, max_depth: int):
+        self.left, self.right = left, right
+        self.feature, self.threshold, self.value = feature, threshold, value
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_estimator(cls, model) -> "CompiledForest":
+        parts: dict[str, list] = {"left": [], "right": [], "feature": [], "threshold": [], "value": []}
+        roots, offset, depth = [], 0, 0
+        for est in model.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            nodes = np.arange(offset, offset + n, dtype=np.int32)
+            leaf = tree.children_left < 0
+            parts["left"].append(np.where(leaf, nodes, tree.children_left + offset).astype(np.int32))
+            parts["right"].append(np.where(leaf, nodes, tree.children_right + offset).astype(np.int32))
+            parts["feature"].append(np.where(leaf, 0, tree.feature).astype(np.int16))
+            parts["threshold"].append(tree.threshold.astype(np.float64))
+            parts["value"].append(tree.value[:, 0, 0].astype(np.float64))
+            roots.append(offset)
+            offset += n
+            depth = max(depth, tree.max_depth)
+        arrays = {k: np.concatenate(v) for k, v in parts.items()}
+        return cls(**arrays, roots=roots, max_depth=depth)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.left)
+
+    def predict(self, X) -> np.ndarray:
+        # sklearn casts inputs to float32 before comparing against the thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node].mean(axis=1)
+
+
+# ==========================================
+# REGISTRY
+# ==========================================
+class ModelArtifact:
+    """A loaded model version: forest, encoders and the metadata it was saved with."""
+
+    def __init__(self, forest: CompiledForest, encoders: dict[str, LabelEncoder], features: list[str],
+                 summary: dict, fingerprint: str, created: float):
+        self.forest = forest
+        self.encoders = encoders
+        self.features = features
+        self.summary = summary
+        self.fingerprint = fingerprint
+        self.created = created
+
+
+class ModelRegistry:
+    """
+    One directory per data fingerprint under `directory`, each written atomically.
+    Training is claimed per fingerprint with an exclusive lock file so that only
+    one worker trains while the others keep serving and pick the result up.
+    """
+
+    def __init__(self, directory: str, keep: int = 2):
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, fingerprint: str) -> str:
+        return os.path.join(self.directory, fingerprint)
+
+    def save(self, forest: CompiledForest, encoders: dict[str, LabelEncoder], features: list[str],
+             summary: dict, fingerprint: str) -> ModelArtifact:
+        writer = ColumnarWriter(self._path(fingerprint))
+        writer.append({"left": forest.left, "right": forest.right, "feature": forest.feature,
+                       "threshold": forest.threshold, "value": forest.value})
+        writer.close(
+            categories={name: list(enc.classes_) for name, enc in encoders.items()},
+            meta={"version": REGISTRY_VERSION, "fingerprint": fingerprint, "features": features,
+                  "roots": forest.roots.tolist(), "max_depth": forest.max_depth,
+                  "summary": summary, "created": time.time()},
+        )
+        self._prune(fingerprint)
+        return self.load(fingerprint)
+
+    def load(self, fingerprint: str) -> ModelArtifact | None:
+        """The artifact trained on `fingerprint`, memory-mapped read-only; None if absent."""
+        cache = ColumnarCache.open(self._path(fingerprint), meta_match={"version": REGISTRY_VERSION})
+        if cache is None:
+            return None
+        meta, cols = cache.meta, cache.columns
+        forest = CompiledForest(cols["left"], cols["right"], cols["feature"], cols["threshold"], cols["value"],
+                                meta["roots"], meta["max_depth"])
+        encoders = {}
+        for name, classes in cache.categories.items():
+            encoders[name] = LabelEncoder()
+            encoders[name].classes_ = classes
+        return ModelArtifact(forest, encoders, meta["features"], meta["summary"], meta["fingerprint"], meta["created"])
+
+    def latest(self) -> ModelArtifact | None:
+        """Most recently saved artifact regardless of fingerprint (serves while retraining)."""
+        best = None
+        for fingerprint in self._versions():
+            artifact = self.load(fingerprint)
+            if artifact is not None and (best is None or artifact.created > best.created):
+                best = artifact
+        return best
+
+    def _versions(self) -> list[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [name for name in os.listdir(self.directory)
+                if '.' not in name and os.path.isfile(os.path.join(self.directory, name, "manifest.json"))]
+
+    def _prune(self, current: str) -> None:
+        others = sorted((v for v in self._versions() if v != current),
+                        key=lambda v: os.path.getmtime(os.path.join(self.directory, v, "manifest.json")),
+                        reverse=True)
+        for stale in others[max(self.keep - 1, 0):]:
+            # Workers still mapping these keep their (unlinked) pages until they reload
+            shutil.rmtree(self._path(stale), ignore_errors=True)
+
+    # ------------------------------------------
+    # Cross-worker training claim
+    # ------------------------------------------
+    def _lock_path(self, fingerprint: str) -> str:
+        return self._path(fingerprint) + ".lock"
+
+    def claim(self, fingerprint: str) -> bool:
+        """True if this process should train `fingerprint`; False if another worker is on it."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._lock_path(fingerprint)
+        try:
+            if time.time() - os.path.getmtime(path) > TRAIN_LEASE_SECONDS:
+                os.remove(path)
+        except OSError:
+            pass
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return True
+
+    def release(self, fingerprint: str) -> None:
+        try:
+            os.remove(self._lock_path(fingerprint))
+        except OSError:
+            pass
+
+    def wait_for(self, fingerprint: str, poll: float = 2.0) -> ModelArtifact | None:
+        """
+        Blocks until another worker's artifact for `fingerprint` appears. Returns
+        None if the claim disappears without one (that worker failed).
+        """
+        while True:
+            artifact = self.load(fingerprint)
+            if artifact is not None:
+                return artifact
+            try:
+                claimed_for = time.time() - os.path.getmtime(self._lock_path(fingerprint))
+            except OSError:
+                return self.load(fingerprint)
+            if claimed_for > TRAIN_LEASE_SECONDS:
+                return None
+            time.sleep(poll)
@@ -0,0 +1,117 @@
+"""
+response_cache.py — Data-version keyed response cache for the dashboard's polled endpoints.
+
+Every mutation that can change an aggregate (a scan landing, a model being
+published) bumps one process-wide `data_version`. Cached endpoints serialize
+their payload once per version; between mutations a poll is a dict lookup, and
+a client that sends back the ETag it already holds gets a bodyless 304 without
+the payload being computed or serialized at all.
+
+Bodies are keyed by endpoint plus its declared parameters (never the raw query
+string, so junk parameters cannot add entries). Entries from older versions
+are dropped as soon as the version moves, and at most MAX_ENTRIES are held
+(least recently used go first), so memory stays bounded.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from fastapi import Request  # type: ignore
+from fastapi.responses import Response  # type: ignore
+from serialization import dumps  # type: ignore
+
+
+class DataVersion:
+    """Monotonic counter of data mutations."""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+data_version = DataVersion()
+
+MAX_ENTRIES = 256
+
+
+class ResponseCache:
+    """
+    Serialized JSON bodies per endpoint (+ declared parameters), valid for one
+    data version, in a bounded LRU. ETags combine a per-process token with the version, so they never
+    collide across restarts or between uvicorn workers.
+    """
+
+    def __init__(self, version: DataVersion = data_version, max_entries: int = MAX_ENTRIES):
+        self._version = version
+        self._token = os.urandom(4).hex()
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+        self._entries_version = version.value  # version every held entry was computed at
+        self._stats: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, outcome: str) -> None:
+        with self._lock:
+            counters = self._stats.setdefault(name, {"hits": 0, "misses": 0, "not_modified": 0})
+            counters[outcome] += 1
+
+    def _get(self, key: tuple, version: int) -> bytes | None:
+        with self._lock:
+            if version != self._entries_version:
+                return None
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def _put(self, key: tuple, version: int, body: bytes) -> None:
+        with self._lock:
+            if version != self._entries_version:
+                if version < self._entries_version:
+                    return  # computed before a newer version was cached: already stale
+                self._entries.clear()
+                self._entries_version = version
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def respond(self, request: Request, name: str, compute, params: tuple = ()) -> Response:
+        """
+        Returns the cached response for `name` with `params` (the endpoint's
+        declared parameter values) at the current data version, calling
+        `compute()` for the payload only on a miss. Exceptions from `compute`
+        (e.g. a 503 HTTPException) propagate and are not cached.
+        """
+        version = self._version.value  # read first: a mutation mid-compute just forces a recompute
+        etag = f'W/"{self._token}-{version}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            self._count(name, "not_modified")
+            return Response(status_code=304, headers=headers)
+
+        key = (name, *params)
+        body = self._get(key, version)
+        if body is not None:
+            self._count(name, "hits")
+        else:
+            self._count(name, "misses")
+            body = dumps(compute())
+            self._put(key, version, body)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_endpoint = {name: dict(counters) for name, counters in self._stats.items()}
+            entries = len(self._entries)
+        return {"data_version": self._version.value, "entries": entries, "max_entries": self.max_entries,
+                "endpoints": per_endpoint}
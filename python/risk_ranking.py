@@ -0,0 +1,118 @@
+"""
+risk_ranking.py — Stockout-risk ranking of (Product_ID, Warehouse_ID) pairs, maintained instead of re-sorted.
+
+Pairs with a positive Risk_Gap (Dynamic_ROP - Inventory_Level) sit in an
+indexed heap keyed by the gap, largest first. The LatestStateView tells the
+ranking which pair changed, and that pair alone is moved in O(log n); reading
+the top `limit` walks the heap's first levels in O(limit log limit), so the
+cost of a read does not grow with the catalog.
+
+Every change that touches the ranking gets a version, and a bounded history
+of them (old gap per version) lets a reader ask how the top `limit` moved
+since the version it last saw: the earlier top list is rebuilt from the
+current heap with the changed pairs put back at their old gaps. A reader
+further behind than the history — or across a full re-rank after training —
+is told to reset instead.
+"""
+
+import threading
+import numpy as np  # type: ignore
+from alert_engine import IndexedHeap  # type: ignore
+from event_log import SequencedLog  # type: ignore
+
+HISTORY_CAPACITY = 10_000  # ranking changes remembered for since-version reads
+
+
+class RiskRanking:
+    """
+    Pairs of a LatestStateView with Risk_Gap > 0, largest gap first (ties go
+    to the earlier pair). `version` increases on every change to the ranking.
+    """
+
+    def __init__(self, view, history: int = HISTORY_CAPACITY):
+        self.view = view
+        self._lock = threading.Lock()
+        self._heap = IndexedHeap()
+        self._history = SequencedLog(history)  # {"slot", "old"} per change; {"rebuild"} on a full re-rank
+        self.rebuild()
+        view.add_listener(self._changed)
+
+    @property
+    def version(self) -> int:
+        return self._history.last_seq
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    # ------------------------------------------
+    # Maintenance
+    # ------------------------------------------
+    def rebuild(self) -> None:
+        """Ranks every pair (Dynamic_ROP attached by training): O(n)."""
+        view = self.view
+        with self._lock:
+            slots = np.arange(len(view))
+            gap = view.values(slots, 'Risk_Gap')
+            at_risk = np.flatnonzero(gap > 0)  # NaN (no Dynamic_ROP yet) never ranks
+            self._heap = IndexedHeap([((-gap[s], s), s) for s in at_risk.tolist()])
+            self._history.append({"rebuild": True})
+
+    def _changed(self, slot: int | None) -> None:
+        """View listener: one pair changed (O(log n)), or all of them (None)."""
+        if slot is None:
+            self.rebuild()
+            return
+        with self._lock:
+            gap = self.view.value(slot, 'Risk_Gap')
+            old = self._heap.key(slot)
+            old_gap = None if old is None else -old[0]
+            if gap > 0:
+                if gap == old_gap:
+                    return
+                self._heap.set(slot, (-gap, slot))
+            elif old is None:
+                return  # was not ranked and still isn't
+            else:
+                self._heap.remove(slot)
+            self._history.append({"slot": slot, "old": old_gap})
+
+    # ------------------------------------------
+    # Reads
+    # ------------------------------------------
+    def top(self, limit: int) -> tuple[list[int], int]:
+        """View slots of the `limit` largest gaps, in rank order, and the version they reflect."""
+        with self._lock:
+            return self._heap.smallest(limit), self.version
+
+    def changes_since(self, since: int, limit: int) -> dict:
+        """
+        The current top `limit` plus how it differs from the top `limit` at
+        version `since`: {"version", "slots", "previous": {slot: rank},
+        "dropped": [slots ranked then, not now], "reset": bool}. Ranks are
+        1-based; with `reset` (history lost, re-ranked, or a future version)
+        there is nothing to compare against and `previous` / `dropped` are empty.
+        """
+        with self._lock:
+            version = self.version
+            entries, truncated = self._history.since(since)
+            reset = truncated or since > version or any("rebuild" in e for e in entries)
+            if reset:
+                return {"version": version, "slots": self._heap.smallest(limit), "previous": {},
+                        "dropped": [], "reset": True}
+            old: dict[int, float | None] = {}
+            for entry in entries:
+                old.setdefault(entry["slot"], entry["old"])  # the gap before the first change after `since`
+            # Unchanged pairs kept their keys, so those in the old top `limit` are within the
+            # current top `limit + changed`; changed pairs compete at their old gaps.
+            candidates = [(self._heap.key(s), s) for s in self._heap.smallest(limit + len(old)) if s not in old]
+            candidates += [((-gap, s), s) for s, gap in old.items() if gap is not None]
+            previous = [s for _, s in sorted(candidates)[:limit]]
+            current = self._heap.smallest(limit)
+        listed = set(current)
+        return {
+            "version": version,
+            "slots": current,
+            "previous": {s: rank for rank, s in enumerate(previous, 1)},
+            "dropped": [s for s in previous if s not in listed],
+            "reset": False,
+        }
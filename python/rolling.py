@@ -0,0 +1,109 @@
+"""
+rolling.py — Vectorized grouped rolling-window statistics.
+Computes `groupby(keys)[col].rolling(w, min_periods=1).mean()/.std()` for any
+number of windows in one sorted pass using prefix sums, instead of dispatching
+a Python lambda per group per window.
+"""
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+DEFAULT_WINDOWS = (7, 14, 30, 90)
+
+
+def feature_names(window: int) -> tuple[str, str]:
+    """Column names for a window's (mean, std) — matches the original 7-day names."""
+    return f"Rolling_{window}_Demand", f"Demand_Std_{window}"
+
+
+def group_starts(groups: np.ndarray) -> np.ndarray:
+    """For each row, the index of the first row of its (contiguous) group."""
+    n = len(groups)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    is_start = np.empty(n, dtype=bool)
+    is_start[0] = True
+    np.not_equal(groups[1:], groups[:-1], out=is_start[1:])
+    starts = np.flatnonzero(is_start)
+    return np.repeat(starts, np.diff(np.append(starts, n)))
+
+
+class GroupedRolling:
+    """
+    Prefix sums over group-contiguous values, shared by every window length.
+
+    Integer-valued inputs (Units_Sold) use exact int64 prefix sums. Anything else
+    is centred on its group mean first so the sum-of-squares variance stays
+    accurate for long histories.
+    """
+
+    def __init__(self, values: np.ndarray, groups: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        self._n = len(values)
+        self._starts = group_starts(groups)
+        self._pos = np.arange(self._n)
+        self._exact = bool(self._n) and bool(np.all(values == np.round(values))) and np.abs(values).max() < 2 ** 20
+
+        if self._exact:
+            ints = values.astype(np.int64)
+            self._offset = np.zeros(self._n)
+            self._csum = np.concatenate(([0], np.cumsum(ints)))
+            self._csum_sq = np.concatenate(([0], np.cumsum(ints * ints)))
+        else:
+            counts = np.bincount(self._starts, minlength=self._n)
+            sums = np.bincount(self._starts, weights=values, minlength=self._n)
+            self._offset = np.divide(sums, counts, out=np.zeros(self._n), where=counts > 0)[self._starts]
+            centred = values - self._offset
+            self._csum = np.concatenate(([0.0], np.cumsum(centred)))
+            self._csum_sq = np.concatenate(([0.0], np.cumsum(centred * centred)))
+
+    def _window(self, window: int):
+        lo = np.maximum(self._starts, self._pos - window + 1)
+        count = self._pos + 1 - lo
+        total = self._csum[self._pos + 1] - self._csum[lo]
+        total_sq = self._csum_sq[self._pos + 1] - self._csum_sq[lo]
+        return count, total, total_sq
+
+    def mean(self, window: int, min_periods: int = 1) -> np.ndarray:
+        count, total, _ = self._window(window)
+        out = total / count + self._offset
+        out[count < min_periods] = np.nan
+        return out
+
+    def std(self, window: int, min_periods: int = 1, ddof: int = 1) -> np.ndarray:
+        count, total, total_sq = self._window(window)
+        dof = count - ddof
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if self._exact:
+                # n*S2 - S1^2 is an exact integer; only the final division rounds
+                var = (count * total_sq - total * total) / (count * dof)
+            else:
+                var = (total_sq - total * total / count) / dof
+        var = np.where(var > 0, var, 0.0)
+        out = np.sqrt(var)
+        out[(dof <= 0) | (count < min_periods)] = np.nan
+        return out
+
+
+def grouped_rolling_mean(values, groups, window: int, min_periods: int = 1) -> np.ndarray:
+    return GroupedRolling(values, groups).mean(window, min_periods)
+
+
+def grouped_rolling_std(values, groups, window: int, min_periods: int = 1, ddof: int = 1) -> np.ndarray:
+    return GroupedRolling(values, groups).std(window, min_periods, ddof)
+
+
+def rolling_demand_features(df: pd.DataFrame, keys: list[str], value_col: str = 'Units_Sold',
+                            windows=DEFAULT_WINDOWS) -> dict[str, np.ndarray]:
+    """
+    Rolling mean/std of `value_col` per group for each window, with std NaN -> 0
+    as the model expects. `df` must already be sorted by keys then date.
+    """
+    groups = df.groupby(keys, sort=False, observed=True).ngroup().to_numpy()
+    roller = GroupedRolling(df[value_col].to_numpy(), groups)
+    features = {}
+    for window in windows:
+        mean_name, std_name = feature_names(window)
+        features[mean_name] = roller.mean(window)
+        features[std_name] = np.nan_to_num(roller.std(window), nan=0.0)
+    return features
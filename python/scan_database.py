@@ -0,0 +1,166 @@
+"""
+scan_database.py — The vision engine's part database (database.json), persisted off the frame path.
+
+Changes are applied in memory only; a writer thread wakes once a change has
+sat for the debounce interval, appends the latest value of every part that
+changed since the last flush to an append-only log (journal.AppendOnlyLog, so
+the fsync happens on its flusher thread), and periodically folds the log into
+an atomically replaced database.json. Opening the database loads database.json
+and replays whatever the log still holds, so a restart resumes where the
+engine stopped. Nothing is written when nothing changed.
+"""
+
+import json
+import os
+import threading
+import time
+from journal import AppendOnlyLog, atomic_write, read_records  # type: ignore
+
+DEBOUNCE_SECONDS = 0.5
+COMPACT_INTERVAL = 60.0
+COMPACT_THRESHOLD = 500  # log records before an early compaction
+
+
+class ScanDatabase:
+    """
+    {part_id: record} with debounced, journaled persistence. `path=None` keeps
+    it in memory only (benchmarks). Records are whole values, so replaying a
+    log segment that was already compacted is harmless.
+    """
+
+    def __init__(self, path: str | None, debounce: float = DEBOUNCE_SECONDS,
+                 compact_interval: float = COMPACT_INTERVAL, compact_threshold: int = COMPACT_THRESHOLD):
+        self.path = path
+        self.journal_path = os.path.splitext(path)[0] + "_journal.log" if path else None
+        self.segment_path = self.journal_path + ".compacting" if path else None
+        self.debounce = debounce
+        self.compact_interval = compact_interval
+        self.compact_threshold = compact_threshold
+        self._data: dict[str, dict] = {}
+        self._dirty: dict[str, dict] = {}  # part -> latest value not yet logged
+        self._dirty_since = 0.0
+        self._cond = threading.Condition()
+        self._compact_lock = threading.Lock()
+        self._closed = False
+        self._log: AppendOnlyLog | None = None
+        self._thread: threading.Thread | None = None
+        self.last_compaction = 0.0
+        self.flushes = 0
+        self.compactions = 0
+
+    def __contains__(self, part_id: str) -> bool:
+        return part_id in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, part_id: str, default=None):
+        return self._data.get(part_id, default)
+
+    # ------------------------------------------
+    # Startup / shutdown
+    # ------------------------------------------
+    def open(self) -> int:
+        """Loads database.json, replays leftover log records and starts the writer. Returns parts loaded."""
+        if self.path is None:
+            return 0
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠️ Could not read {self.path} ({e}); starting from the log only")
+        for rec in read_records(self.segment_path) + read_records(self.journal_path):
+            self._data[rec['part']] = rec['record']
+        self._log = AppendOnlyLog(self.journal_path)
+        self.last_compaction = time.time()
+        self._thread = threading.Thread(target=self._write_loop, name="scan-database", daemon=True)
+        self._thread.start()
+        return len(self._data)
+
+    def close(self) -> None:
+        """Flushes pending changes and compacts, so database.json is complete on exit."""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._thread = None
+        self._flush()
+        self.compact()
+        self._log.close()
+        self._log = None
+        for path in (self.journal_path, self.segment_path):
+            if os.path.exists(path) and not os.path.getsize(path):
+                os.remove(path)
+
+    # ------------------------------------------
+    # Mutations (hot path: memory only)
+    # ------------------------------------------
+    def put(self, part_id: str, record: dict) -> bool:
+        """Sets a part's record; False (and nothing scheduled) when it is unchanged."""
+        with self._cond:
+            if self._data.get(part_id) == record:
+                return False
+            self._data[part_id] = record
+            if self._log is not None:
+                if not self._dirty:
+                    self._dirty_since = time.monotonic()
+                self._dirty[part_id] = record
+                self._cond.notify()
+            return True
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._cond:
+            return dict(self._data)
+
+    # ------------------------------------------
+    # Writer thread
+    # ------------------------------------------
+    def _write_loop(self) -> None:
+        while True:
+            with self._cond:
+                if not self._dirty and not self._closed:
+                    self._cond.wait(timeout=self.compact_interval)  # idle wakeups only check compaction
+                if self._closed:
+                    return
+                # Debounce: let changes accumulate until the oldest has waited its interval
+                wait = self._dirty_since + self.debounce - time.monotonic() if self._dirty else 0
+                if wait > 0:
+                    self._cond.wait(timeout=wait)
+                    continue
+            self._flush()
+            due = time.time() - self.last_compaction >= self.compact_interval
+            if len(self._log) and (due or len(self._log) >= self.compact_threshold):
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"⚠️ Database compaction failed: {e}")
+
+    def _flush(self) -> None:
+        with self._cond:
+            dirty, self._dirty = self._dirty, {}
+        for part_id, record in dirty.items():
+            self._log.append({"part": part_id, "record": record}, wait=False)
+        if dirty:
+            self.flushes += 1
+
+    def compact(self) -> None:
+        """Writes the full database to database.json (atomic replace) and drops the folded log."""
+        with self._compact_lock:
+            if self._log is None:
+                return
+            with self._cond:
+                if not os.path.exists(self.segment_path):
+                    self._log.rotate(self.segment_path)
+                data = dict(self._data)
+
+            def write(tmp_path: str) -> None:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=4)
+
+            atomic_write(self.path, write)
+            os.remove(self.segment_path)
+            self.last_compaction = time.time()
+            self.compactions += 1
@@ -0,0 +1,193 @@
+"""
+scan_publisher.py — Outbound HTTP for the vision engine, off the capture / decode path.
+
+One background thread owns a keep-alive `requests.Session` (a small connection
+pool), so the API sees a couple of long-lived connections instead of a new one
+per scan and per frame. Scans are queued and sent in batches to the bulk
+ingest endpoint; a batch that fails (network error or 5xx) stays queued and is
+retried with exponential backoff and jitter, while one the API refuses (4xx)
+is removed and counted as rejected, not sent. Preview frames are never queued:
+only the newest one is kept, and it is dropped if it got too old waiting (API
+slow or down).
+"""
+
+import collections
+import itertools
+import random
+import threading
+import time
+import uuid
+import requests  # type: ignore
+from requests.adapters import HTTPAdapter  # type: ignore
+
+API_URL = "http://127.0.0.1:8000"
+SCAN_BATCH_PATH = "/api/scan-items"
+FRAME_PATH = "/api/video-frame"
+
+BATCH_WINDOW = 0.05        # seconds a first scan waits for the rest of its burst
+MAX_BATCH = 200            # scans per request
+MAX_PENDING_SCANS = 10_000  # oldest scans are dropped beyond this (API down for long)
+FRAME_MAX_AGE = 0.5        # seconds; older preview frames are not worth sending
+SCAN_TIMEOUT = 2.0
+FRAME_TIMEOUT = 0.3
+RETRY_BASE = 0.25
+RETRY_MAX = 8.0
+
+
+class ScanPublisher(threading.Thread):
+    """
+    `post_scan` / `post_frame` only enqueue and return immediately; all network
+    I/O happens on this thread. Disabled publishers (benchmarks) discard
+    everything.
+    """
+
+    def __init__(self, base_url: str = API_URL, enabled: bool = True):
+        super().__init__(name="scan-publisher", daemon=True)
+        self.base_url = base_url.rstrip('/')
+        self.enabled = enabled
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._scans: collections.deque[dict] = collections.deque()
+        self._frame: bytes | None = None
+        self._frame_at = 0.0
+        self._wake = threading.Condition()
+        self._closed = False
+        # Scan ids let the API skip scans it already logged when a batch is retried
+        self._ids = (f"{uuid.uuid4().hex[:12]}-{n}" for n in itertools.count())
+
+        self._failures = 0
+        self._retry_at = 0.0
+        self.scans_sent = 0        # acknowledged by the API
+        self.scans_rejected = 0    # refused with a 4xx (not retried)
+        self.scans_dropped = 0     # evicted from a full queue before being sent
+        self.batches_sent = 0
+        self.batches_rejected = 0
+        self.retries = 0
+        self.frames_sent = 0
+        self.frames_replaced = 0
+        self.frames_stale = 0
+
+    # ------------------------------------------
+    # Producer side (any thread)
+    # ------------------------------------------
+    def post_scan(self, payload: dict) -> None:
+        with self._wake:
+            if len(self._scans) >= MAX_PENDING_SCANS:
+                self._scans.popleft()
+                self.scans_dropped += 1
+            self._scans.append({**payload, "scan_id": next(self._ids)})
+            self._wake.notify()
+
+    def post_frame(self, jpeg: bytes) -> None:
+        with self._wake:
+            if self._frame is not None:
+                self.frames_replaced += 1
+            self._frame, self._frame_at = jpeg, time.monotonic()
+            self._wake.notify()
+
+    def close(self) -> None:
+        """Stops the thread after one last attempt to flush queued scans."""
+        with self._wake:
+            self._closed = True
+            self._wake.notify()
+
+    # ------------------------------------------
+    # Publisher thread
+    # ------------------------------------------
+    def run(self) -> None:
+        try:
+            while True:
+                with self._wake:
+                    while not (self._scans or self._frame is not None or self._closed):
+                        self._wake.wait()
+                    if self._scans and not self._closed:
+                        # Let a burst of scans (several codes in one frame / several cameras) gather
+                        deadline = time.monotonic() + BATCH_WINDOW
+                        while len(self._scans) < MAX_BATCH and not self._closed:
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                break
+                            self._wake.wait(remaining)
+                    wait = self._retry_at - time.monotonic()
+                    if wait > 0 and not self._closed:
+                        self._wake.wait(wait)  # backing off; new frames keep replacing the old one
+                        continue
+                    batch = list(itertools.islice(self._scans, MAX_BATCH))
+                    frame, frame_at, self._frame = self._frame, self._frame_at, None
+                    closed = self._closed
+
+                if batch:
+                    self._send_scans(batch)
+                if frame is not None:
+                    if time.monotonic() - frame_at > FRAME_MAX_AGE:
+                        self.frames_stale += 1
+                    else:
+                        self._send_frame(frame)
+                if closed:
+                    return
+        finally:
+            self._session.close()
+
+    def _send_scans(self, batch: list[dict]) -> None:
+        status = None  # disabled: discarded, neither sent nor rejected
+        if self.enabled:
+            try:
+                status = self._session.post(self.base_url + SCAN_BATCH_PATH, json={"items": batch},
+                                            timeout=SCAN_TIMEOUT).status_code
+            except requests.RequestException:
+                self._backoff()
+                return
+            if status >= 500:
+                self._backoff()
+                return
+        self._failures = 0
+        batch_ids = {scan["scan_id"] for scan in batch}
+        removed = 0
+        with self._wake:
+            # The batch was the queue's prefix; some of it may have been dropped meanwhile,
+            # and only what is still queued counts (dropped scans were counted already)
+            while self._scans and self._scans[0]["scan_id"] in batch_ids:
+                self._scans.popleft()
+                removed += 1
+        if status is None:
+            return
+        if status < 400:
+            self.scans_sent += removed
+            self.batches_sent += 1
+        else:
+            self.scans_rejected += removed  # a 4xx batch would fail again: not retried
+            self.batches_rejected += 1
+
+    def _send_frame(self, jpeg: bytes) -> None:
+        if not self.enabled:
+            return
+        try:
+            self._session.post(self.base_url + FRAME_PATH, data=jpeg, headers={"Content-Type": "image/jpeg"},
+                               timeout=FRAME_TIMEOUT)
+            self.frames_sent += 1
+            self._failures = 0
+        except requests.RequestException:
+            self._backoff()
+
+    def _backoff(self) -> None:
+        self._failures += 1
+        self.retries += 1
+        delay = min(RETRY_MAX, RETRY_BASE * 2 ** (self._failures - 1))
+        self._retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+
+    def stats(self) -> dict:
+        return {
+            "scans_sent": self.scans_sent,
+            "scans_pending": len(self._scans),
+            "scans_rejected": self.scans_rejected,
+            "scans_dropped": self.scans_dropped,
+            "batches_sent": self.batches_sent,
+            "batches_rejected": self.batches_rejected,
+            "retries": self.retries,
+            "frames_sent": self.frames_sent,
+            "frames_replaced": self.frames_replaced,
+            "frames_stale": self.frames_stale,
+        }
@@ -0,0 +1,204 @@
+"""
+serialization.py — JSON encoding for API responses without per-row Python objects.
+
+`dumps` is the single entry point for response bodies, encoded with orjson (a
+required dependency, pinned in requirements.txt): it serialises NumPy arrays and
+scalars natively and is several times faster than the stdlib. Tabular results
+are passed as `Records` — a set of columns — and encoded column-wise: each
+column is rendered to JSON fragments with one vectorized pass (categoricals once
+per distinct value), and rows are stitched from the fragments, so no row dict,
+Series or boxed scalar is created. `Records.ndjson` streams the same rows one
+object per line for results too large for a single body.
+"""
+
+import datetime
+import json
+import math
+import numpy as np  # type: ignore
+import orjson  # type: ignore
+import pandas as pd  # type: ignore
+from fastapi.responses import Response  # type: ignore
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_CHUNK_ROWS = 5_000
+
+
+# ==========================================
+# VALUES
+# ==========================================
+def _default(obj):
+    """Types orjson does not handle natively."""
+    if isinstance(obj, np.generic):
+        value = obj.item()
+        return None if isinstance(value, float) and not math.isfinite(value) else value
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (pd.Timestamp, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, Records):
+        return obj.to_list()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _dumps(obj) -> bytes:
+    return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+
+def dumps(obj) -> bytes:
+    """
+    JSON bytes for a response payload. Top-level (and nested) dicts may hold
+    `Records` values, which are spliced in from their column-wise encoding.
+    """
+    if isinstance(obj, Records):
+        return obj.to_json()
+    if isinstance(obj, dict) and any(isinstance(v, (Records, dict)) for v in obj.values()):
+        parts = [_dumps(str(k)) + b':' + dumps(v) for k, v in obj.items()]
+        return b'{' + b','.join(parts) + b'}'
+    return _dumps(obj)
+
+
+def json_response(payload, status_code: int = 200, headers: dict | None = None) -> Response:
+    """A Response whose body is `dumps(payload)` (FastAPI's jsonable_encoder is bypassed)."""
+    return Response(content=dumps(payload), status_code=status_code, headers=headers, media_type="application/json")
+
+
+# ==========================================
+# FIELD SPECS (DataFrame slice -> list of dicts)
+# ==========================================
+_CASTS = {int: np.int64, float: np.float64, str: object, bool: bool}
+
+
+class Field:
+    """
+    One output key of `build_records`: `source` is a column name or a callable
+    taking the frame and returning a column (or a scalar, repeated for every
+    row). `cast` is int / float / str / bool (int truncates like int());
+    `decimals` rounds like round().
+    """
+
+    __slots__ = ("source", "cast", "decimals")
+
+    def __init__(self, source, cast=None, decimals: int | None = None):
+        self.source = source
+        self.cast = float if decimals is not None and cast is None else cast
+        self.decimals = decimals
+
+    def values(self, frame: pd.DataFrame, n: int) -> list:
+        column = self.source(frame) if callable(self.source) else frame[self.source]
+        if np.ndim(column) == 0:
+            return [column] * n
+        values = column.to_numpy() if isinstance(column, (pd.Series, pd.Index)) else np.asarray(column)
+        if self.cast is str:
+            return [str(v) for v in values.tolist()]
+        if self.cast is not None:
+            values = values.astype(_CASTS[self.cast])
+        if self.decimals is not None:
+            values = np.round(values, self.decimals)
+        return values.tolist()
+
+
+def text(values) -> np.ndarray:
+    """A column as an object array of str, so string fields are built with + over whole columns."""
+    return np.asarray(values).astype(str).astype(object)
+
+
+def build_records(frame: pd.DataFrame, spec: dict) -> list[dict]:
+    """
+    Rows of `frame` as dicts shaped by `spec` ({output key: Field or column
+    name}). Every field is converted column-wise (one cast / round / tolist
+    per column) and rows are only zipped at the end — no iterrows, no per-cell
+    int() / float() / round().
+    """
+    n = len(frame)
+    if n == 0:
+        return []
+    keys = list(spec)
+    columns = [(f if isinstance(f, Field) else Field(f)).values(frame, n) for f in spec.values()]
+    return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
+# ==========================================
+# COLUMNS
+# ==========================================
+def _number_fragments(values: np.ndarray) -> np.ndarray:
+    """Ints / floats (float32 widened, so values print as they always have; NaN -> null)."""
+    if values.dtype.kind == 'f':
+        values = values.astype(np.float64)
+    if not len(values):
+        return np.empty(0, dtype=object)
+    # Numbers contain no commas: one native array encode, then split
+    return np.array(orjson.dumps(values, option=orjson.OPT_SERIALIZE_NUMPY)[1:-1].decode().split(','),
+                    dtype=object)
+
+
+def column_fragments(values) -> np.ndarray:
+    """JSON text of every value in a column, as an object array of str."""
+    if isinstance(values, pd.Categorical):
+        # Encode only the labels this slice uses (a page of a wide category set)
+        used, inverse = np.unique(values.codes, return_inverse=True)
+        labels = values.categories.to_numpy()
+        text = np.array([_dumps(labels[c]).decode() if c >= 0 else 'null' for c in used.tolist()], dtype=object)
+        return text[inverse]
+    values = np.asarray(values)
+    kind = values.dtype.kind
+    if kind == 'b':
+        return np.where(values, 'true', 'false').astype(object)
+    if kind in 'iuf':
+        return _number_fragments(values)
+    if kind == 'M':
+        days = values.astype('datetime64[D]')
+        uniques, inverse = np.unique(days, return_inverse=True)
+        text = np.array([f'"{d}"' if not np.isnat(d) else 'null' for d in uniques], dtype=object)
+        return text[inverse]
+    # Strings / objects: encode each distinct value once
+    uniques, inverse = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+    text = np.array([_dumps(v).decode() if v is not None else 'null' for v in uniques.tolist()], dtype=object)
+    return text[inverse]
+
+
+class Records:
+    """
+    A list of JSON objects held as columns: {field: array-like} with equal
+    lengths (or a DataFrame). Encoded without building per-row dicts.
+    """
+
+    def __init__(self, columns, fields: list[str] | None = None):
+        if isinstance(columns, pd.DataFrame):
+            columns = {name: (columns[name].array if isinstance(columns[name].dtype, pd.CategoricalDtype)
+                              else columns[name].to_numpy()) for name in columns.columns}
+        self.columns = {name: columns[name] for name in (fields or list(columns))}
+        self.length = len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def _join(self, start: int, stop: int, row_end: str) -> str:
+        """
+        Rows [start, stop) as JSON objects each followed by `row_end`. Keys and
+        per-column fragments are laid out in one (rows x 2*fields) grid of str
+        references and joined once, so no per-row string is ever built.
+        """
+        n = max(min(stop, self.length) - start, 0)
+        if not self.columns:
+            return ('{}' + row_end) * n
+        grid = np.empty((n, 2 * len(self.columns) + 1), dtype=object)
+        for i, (name, values) in enumerate(self.columns.items()):
+            grid[:, 2 * i] = ('{' if i == 0 else ',') + json.dumps(str(name)) + ':'
+            grid[:, 2 * i + 1] = column_fragments(values[start:start + n])
+        grid[:, -1] = '}' + row_end
+        return ''.join(grid.ravel().tolist())
+
+    def to_json(self) -> bytes:
+        return ('[' + self._join(0, self.length, ',')[:-1] + ']').encode() if self.length else b'[]'
+
+    def ndjson(self, chunk_rows: int = NDJSON_CHUNK_ROWS):
+        """Yields the rows as newline-delimited JSON, `chunk_rows` rows per chunk."""
+        for start in range(0, self.length, chunk_rows):
+            yield self._join(start, start + chunk_rows, '\n').encode()
+
+    def to_list(self) -> list[dict]:
+        """Plain dicts (for callers that need Python objects, not bytes)."""
+        return json.loads(self.to_json())
@@ -0,0 +1,107 @@
+"""
+test_alert_engine.py — AlertEngine over a real LatestStateView: alerts raise
+past the threshold, do not flap while the value moves inside the hysteresis
+band, and clear only once it is past the band.
+"""
+
+import random
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+from alert_engine import LOW_STOCK, OVERSTOCK, AlertEngine, IndexedHeap  # type: ignore
+from inventory_store import InventoryStore  # type: ignore
+from latest_view import LatestStateView  # type: ignore
+
+ROP = 100.0
+
+
+@pytest.fixture
+def view() -> LatestStateView:
+    # P1 / P2 have one row each; P2's Units_Sold = 2 puts its overstock limit (ratio 50) at level 100
+    store = InventoryStore.from_frame(pd.DataFrame({
+        'Date': ['01-01-2024', '01-01-2024'],
+        'SKU_ID': ['SKU_1', 'SKU_2'],
+        'Product_ID': ['P1', 'P2'],
+        'Warehouse_ID': ['WH_1', 'WH_1'],
+        'Units_Sold': [10, 2],
+        'Inventory_Level': [120, 60],
+        'Reorder_Point': [100, 100],
+        'Unit_Cost': [1.0, 1.0],
+    }))
+    view = LatestStateView(store)
+    view.attach_dynamic_rop(pd.DataFrame({'Product_ID': ['P1', 'P2'], 'Warehouse_ID': ['WH_1', 'WH_1'],
+                                          'Dynamic_ROP': [ROP, 10.0]}))
+    return view
+
+
+def _engine(view):
+    transitions = []
+    engine = AlertEngine(view, hysteresis=0.05,
+                         on_transition=lambda slot, alert, active: transitions.append((alert, active)))
+    return engine, transitions
+
+
+def _set_level(view: LatestStateView, product_id: str, level: int) -> None:
+    row = view.latest_row(product_id, 'WH_1')
+    view._store.set_value(row, 'Inventory_Level', level)
+    view.refresh(row)
+
+
+def test_low_stock_does_not_flap_inside_band(view):
+    engine, transitions = _engine(view)
+    slot = view.slot('P1', 'WH_1')
+    assert engine.ready and not engine.active(LOW_STOCK, slot)
+
+    _set_level(view, 'P1', 99)                  # below ROP: raises
+    assert transitions == [(LOW_STOCK, True)]
+    for level in (101, 104, 99, 103, 100):      # inside [ROP, ROP * 1.05): stays raised
+        _set_level(view, 'P1', level)
+    assert transitions == [(LOW_STOCK, True)]
+    assert engine.active(LOW_STOCK, slot)
+
+    _set_level(view, 'P1', 106)                 # past the band: clears
+    assert transitions == [(LOW_STOCK, True), (LOW_STOCK, False)]
+    for level in (104, 101, 100):               # back inside the band from above: stays clear
+        _set_level(view, 'P1', level)
+    assert transitions == [(LOW_STOCK, True), (LOW_STOCK, False)]
+
+    _set_level(view, 'P1', 99)
+    assert transitions[-1] == (LOW_STOCK, True)
+    assert engine.top(LOW_STOCK, 5) == [slot]
+
+
+def test_overstock_does_not_flap_inside_band(view):
+    engine, transitions = _engine(view)
+    _set_level(view, 'P2', 101)                 # ratio 50.5 > 50: raises
+    for level in (99, 96, 100, 97):             # ratio in (47.5, 50]: stays raised
+        _set_level(view, 'P2', level)
+    assert transitions == [(OVERSTOCK, True)]
+    _set_level(view, 'P2', 95)                  # ratio 47.5: clears
+    _set_level(view, 'P2', 99)                  # under the raise threshold: stays clear
+    assert transitions == [(OVERSTOCK, True), (OVERSTOCK, False)]
+    assert engine.count(OVERSTOCK) == 0
+
+
+def test_configure_keeps_hysteresis_state(view):
+    engine, _ = _engine(view)
+    _set_level(view, 'P1', 99)
+    _set_level(view, 'P1', 104)                 # held by hysteresis
+    engine.configure(hysteresis=0.02)           # band now ends at 102: clears on rebuild
+    assert not engine.active(LOW_STOCK, view.slot('P1', 'WH_1'))
+    with pytest.raises(ValueError):
+        engine.configure(overstock_ratio=0)
+    assert engine.thresholds()["overstock_ratio"] == 50.0
+
+
+def test_indexed_heap_smallest_matches_sort():
+    rng = random.Random(7)
+    heap, keys = IndexedHeap(), {}
+    for _ in range(5_000):
+        item = rng.randrange(200)
+        if rng.random() < 0.3:
+            heap.remove(item)
+            keys.pop(item, None)
+        else:
+            keys[item] = (rng.random(), item)
+            heap.set(item, keys[item])
+        k = rng.randrange(15)
+        assert heap.smallest(k) == [item for _, item in sorted(keys.values())][:k]
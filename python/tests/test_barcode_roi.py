@@ -0,0 +1,91 @@
+"""
+test_barcode_roi.py — ROI decoding against the full-frame decoder on recorded
+frames: demo_scan.mp4 (which carries no printed codes) with EAN-13 labels
+composited in as they pass the camera. The ROI path must find every code the
+full-frame path finds, faster; and PassStats must not lock in a biased order.
+"""
+
+import os
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("pyzbar.pyzbar")
+import barcode_roi  # type: ignore  # noqa: E402
+from barcode_roi import PassStats, compare  # type: ignore  # noqa: E402
+
+VIDEO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "demo_scan.mp4")
+
+_L = ["0001101", "0011001", "0010011", "0111101", "0100011", "0110001", "0101111", "0111011", "0110111", "0001011"]
+_R = ["".join("1" if b == "0" else "0" for b in code) for code in _L]
+_G = [code[::-1] for code in _R]
+_PARITY = ["LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG", "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL"]
+
+
+def ean13(digits12: str) -> str:
+    """The 13-digit code (check digit added)."""
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits12))
+    return digits12 + str((10 - total % 10) % 10)
+
+
+def ean13_label(code: str, module: int = 2, height: int = 70, ink: int = 20, paper: int = 235) -> np.ndarray:
+    """Grayscale label: bars for `code` with a 10-module quiet zone."""
+    left = "".join((_L if p == "L" else _G)[int(d)] for p, d in zip(_PARITY[int(code[0])], code[1:7]))
+    right = "".join(_R[int(d)] for d in code[7:])
+    modules = "0" * 10 + "101" + left + "01010" + right + "101" + "0" * 10
+    row = np.array([ink if m == "1" else paper for m in modules], dtype=np.uint8).repeat(module)
+    return np.tile(row, (height, 1))
+
+
+def recorded_frames(codes: list[str], span: int = 24) -> list[np.ndarray]:
+    """demo_scan.mp4 in grayscale, code i sliding across frames [i*span*2, i*span*2 + span)."""
+    cap = cv2.VideoCapture(VIDEO)
+    frames = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    cap.release()
+    for i, code in enumerate(codes):
+        label = ean13_label(code, ink=20 + 40 * (i % 3))  # some labels washed out
+        first = i * span * 2
+        for k, gray in enumerate(frames[first:first + span]):
+            x = 40 + k * (gray.shape[1] - label.shape[1] - 80) // span
+            y = 60 + 90 * (i % 3)
+            gray[y:y + label.shape[0], x:x + label.shape[1]] = label
+    return frames
+
+
+def test_roi_recall_and_throughput_on_recorded_frames():
+    codes = [ean13(f"59012341234{i}") for i in range(4)]
+    result = compare(recorded_frames(codes))
+    assert {data for data, _ in result["baseline"]} == set(codes)  # the recording is decodable
+    assert result["recall"] == 1.0
+    assert result["found"] >= result["baseline"]
+    assert result["speedup"] > 1.5  # measured ~3x; loose bound for noisy machines
+
+
+def test_pass_order_uses_unconditional_hit_rates():
+    stats = PassStats(("a", "b"))
+    # "a" leads and hits 50% of the time at 1 ms; "b" only sees a's misses (hard inputs, 10%)
+    # but hits 90% whenever it leads on an exploration frame, also at 1 ms
+    for frame in range(barcode_roi.WARMUP_FRAMES):
+        if stats.order_for(frame)[0] == "a":
+            stats.merge({"a": [10, 5, 0.010, 10, 5], "b": [5, 0, 0.005, 0, 0]})
+        else:
+            stats.merge({"b": [10, 9, 0.010, 10, 9], "a": [1, 0, 0.001, 0, 0]})
+    assert stats.order == ("b", "a")
+
+
+def test_warmup_ends_on_frames_even_if_a_pass_rarely_runs():
+    stats = PassStats(("a", "b", "c"))
+    for frame in range(barcode_roi.WARMUP_FRAMES):
+        lead = stats.order_for(frame)[0]
+        rates = {"a": 1, "b": 2, "c": 8}  # "c" only runs when it leads, a few times in the warm-up
+        stats.merge({lead: [10, rates[lead], 0.010, 10, rates[lead]]})
+    assert stats.frames == barcode_roi.WARMUP_FRAMES
+    assert stats.order == ("c", "b", "a")
+    # exploration rotates the lead so every pass keeps getting unbiased samples
+    leads = {stats.order_for(f)[0] for f in range(0, barcode_roi.EXPLORE_FRAMES * 3, barcode_roi.EXPLORE_FRAMES)}
+    assert leads == {"a", "b", "c"}
@@ -0,0 +1,136 @@
+"""
+test_change_feed.py — The coalesced /api/events stream against replaying every
+published event one by one (what a client polling full state ends up with).
+"""
+
+import asyncio
+import numpy as np  # type: ignore
+import orjson  # type: ignore
+from event_log import SSE_KEEPALIVE  # type: ignore
+import change_feed  # type: ignore
+from change_feed import ChangeFeed, coalesce  # type: ignore
+
+PAIRS = [(f"P{i}", f"W{i % 2}") for i in range(5)]
+
+
+def _parse(message: bytes) -> tuple[str | None, dict | None]:
+    if message == SSE_KEEPALIVE:
+        return None, None
+    fields = dict(line.split(": ", 1) for line in message.decode().strip().split("\n"))
+    assert int(fields["id"]) == orjson.loads(fields["data"])["seq"]
+    return fields.get("event"), orjson.loads(fields["data"])
+
+
+def _apply(state: dict, changes: list[dict]) -> None:
+    for change in changes:
+        if change["type"] == "inventory":
+            pair = (change["product_id"], change["warehouse_id"])
+            state["levels"][pair] = change["level"]
+            state["deltas"][pair] = state["deltas"].get(pair, 0) + change["delta"]
+        else:
+            state["scans"].append(change["scan_seq"])
+
+
+def _new_state() -> dict:
+    return {"levels": {}, "deltas": {}, "scans": []}
+
+
+async def _read(feed: ChangeFeed, until: int, since: int = 0, **kwargs) -> list[tuple[str, dict]]:
+    messages = []
+    stream = feed.stream(since, **kwargs)
+    async for message in stream:
+        event, data = _parse(message)
+        messages.append((event, data))
+        if data is not None and data["seq"] >= until:
+            break
+    await stream.aclose()
+    return messages
+
+
+def test_coalesced_stream_matches_replaying_every_event():
+    feed, published = ChangeFeed(capacity=10_000), []
+    rng = np.random.default_rng(23)
+    levels = {pair: 100 for pair in PAIRS}
+
+    async def publish():
+        for n in range(400):
+            if rng.random() < 0.1:
+                event = {"type": "scan", "scan_seq": n}
+            else:
+                pair = PAIRS[int(rng.integers(len(PAIRS)))]
+                delta = int(rng.integers(-5, 6))
+                event = {"type": "inventory", "product_id": pair[0], "warehouse_id": pair[1],
+                         "level": levels[pair] + delta, "previous_level": levels[pair], "delta": delta}
+                levels[pair] += delta
+            kind = event.pop("type")
+            published.append({"type": kind, "seq": feed.publish(kind, **event), **event})
+            if n % 7 == 0:
+                await asyncio.sleep(0.001)
+
+    async def run():
+        reader = asyncio.create_task(_read(feed, until=400, batch_window=0.005))
+        await publish()
+        return await reader
+
+    messages = asyncio.run(run())
+    got, expected = _new_state(), _new_state()
+    _apply(expected, published)
+    for event, data in messages:
+        assert event == "changes"
+        for change in data["changes"]:
+            if change["type"] == "inventory":  # coalesced runs stay self-consistent
+                assert change["level"] == change["previous_level"] + change["delta"]
+        _apply(got, data["changes"])
+    assert got == expected
+    assert len(messages) < len(published)  # bursts were batched
+
+
+def test_coalesce_keeps_scans_in_order_and_orders_by_last_seq():
+    events = [
+        {"type": "inventory", "seq": 1, "product_id": "P1", "warehouse_id": "W1", "level": 5,
+         "previous_level": 3, "delta": 2},
+        {"type": "scan", "seq": 2, "scan_seq": 1},
+        {"type": "model", "seq": 3, "mae": 1.0},
+        {"type": "inventory", "seq": 4, "product_id": "P1", "warehouse_id": "W1", "level": 9,
+         "previous_level": 5, "delta": 4},
+        {"type": "scan", "seq": 5, "scan_seq": 2},
+        {"type": "model", "seq": 6, "mae": 0.5},
+    ]
+    out = coalesce(events)
+    assert [e["seq"] for e in out] == [2, 4, 5, 6]
+    assert out[1]["level"] == 9 and out[1]["previous_level"] == 3 and out[1]["delta"] == 6
+
+
+def test_lagging_client_is_told_to_resync():
+    feed = ChangeFeed(capacity=8)
+    for n in range(20):
+        feed.publish("scan", scan_seq=n)
+
+    async def run():
+        reader = asyncio.create_task(_read(feed, until=21, batch_window=0))
+        await asyncio.sleep(0.01)
+        feed.publish("scan", scan_seq=20)
+        return await reader
+
+    messages = asyncio.run(run())
+    assert messages[0] == ("resync", {"seq": 20})  # no partial history
+    assert messages[1][0] == "changes" and [c["scan_seq"] for c in messages[1][1]["changes"]] == [20]
+
+
+def test_type_filter_and_keep_alive(monkeypatch):
+    monkeypatch.setattr(change_feed, "KEEPALIVE_SECONDS", 0.01)
+    feed = ChangeFeed()
+    feed.publish("scan", scan_seq=0)
+    feed.publish("model", mae=1.0)
+
+    async def run():
+        reader = asyncio.create_task(_read(feed, until=3, types={"model"}, batch_window=0))
+        await asyncio.sleep(0.05)
+        feed.publish("model", mae=0.5)
+        return await reader
+
+    messages = asyncio.run(run())
+    event, data = messages[0]
+    assert event == "changes" and data["seq"] == 2 and [c["type"] for c in data["changes"]] == ["model"]
+    assert (None, None) in messages  # idle connection kept alive
+    assert messages[-1][1]["seq"] == 3 and messages[-1][1]["changes"][0]["mae"] == 0.5
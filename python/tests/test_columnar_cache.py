@@ -0,0 +1,96 @@
+"""
+test_columnar_cache.py — The binary snapshot against parsing the CSV: a store
+mapped from the snapshot holds what a fresh parse holds, the snapshot is
+rebuilt only when the CSV changes, and a half-written or mismatched cache is
+never used.
+"""
+
+import json
+import os
+import shutil
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+from columnar_cache import MANIFEST, ColumnarCache, ColumnarWriter, source_fingerprint  # type: ignore
+from inventory_store import InventoryStore  # type: ignore
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "inventory_control_tower_master.csv")
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "inventory.csv"
+    shutil.copyfile(CSV_PATH, path)
+    return str(path)
+
+
+def test_chunks_round_trip(tmp_path):
+    directory = str(tmp_path / "cache")
+    rng = np.random.default_rng(0)
+    chunks = [{"a": rng.integers(0, 100, n).astype(np.int16), "b": rng.random(n)} for n in (5, 0, 11)]
+    writer = ColumnarWriter(directory)
+    for chunk in chunks:
+        writer.append(chunk)
+    writer.append({"a": np.array([7], dtype=np.int64), "b": np.array([0.5], dtype=np.float32)})  # cast to first dtype
+    writer.close(categories={"a": ["x", "y"]}, meta={"k": 1})
+
+    cache = ColumnarCache(directory)
+    assert cache.rows == 17 and cache.meta == {"k": 1}
+    assert cache.columns["a"].dtype == np.int16 and cache.columns["b"].dtype == np.float64
+    np.testing.assert_array_equal(cache.columns["a"], np.concatenate([c["a"] for c in chunks] + [[7]]))
+    np.testing.assert_array_equal(cache.columns["b"], np.concatenate([c["b"] for c in chunks] + [[0.5]]))
+    assert cache.categories["a"].tolist() == ["x", "y"]
+
+
+def test_unusable_caches_are_ignored(tmp_path):
+    directory = str(tmp_path / "cache")
+    writer = ColumnarWriter(directory)
+    writer.append({"a": np.arange(3)})
+    writer.abort()
+    assert ColumnarCache.open(directory) is None and os.listdir(tmp_path) == []
+
+    writer = ColumnarWriter(directory)
+    writer.append({"a": np.arange(3)})
+    with pytest.raises(ValueError):
+        writer.append({"a": np.arange(2), "b": np.arange(3)})
+    writer.close(meta={"version": 1})
+    assert ColumnarCache.open(directory, meta_match={"version": 2}) is None
+    with open(os.path.join(directory, MANIFEST), "w") as f:
+        f.write('{"rows": 3, "colu')  # torn manifest
+    assert ColumnarCache.open(directory) is None
+
+
+def test_snapshot_store_matches_parse(csv_path):
+    parsed = InventoryStore.from_csv(csv_path)
+    snapshot_dir = csv_path + ".snapshot"
+    InventoryStore.open(csv_path, snapshot_dir=snapshot_dir)
+    mapped = InventoryStore.open(csv_path, snapshot_dir=snapshot_dir)
+    assert mapped.source == source_fingerprint(csv_path)
+    assert mapped.columns == parsed.columns
+    for name in parsed.columns:
+        np.testing.assert_array_equal(mapped.codes(name), parsed.codes(name), err_msg=name)
+        if parsed.is_categorical(name):
+            np.testing.assert_array_equal(mapped.categories(name), parsed.categories(name))
+    assert mapped.records() == parsed.records()
+
+
+def test_snapshot_follows_the_csv(csv_path):
+    snapshot_dir = csv_path + ".snapshot"
+    store = InventoryStore.open(csv_path, snapshot_dir=snapshot_dir)
+    manifest = os.path.join(snapshot_dir, MANIFEST)
+    written = os.stat(manifest).st_mtime_ns
+    InventoryStore.open(csv_path, snapshot_dir=snapshot_dir)
+    assert os.stat(manifest).st_mtime_ns == written  # mapped, not rebuilt
+
+    # The journal re-keys the snapshot to a CSV it rewrote (with new levels)
+    levels = np.array(store.codes('Inventory_Level'), copy=True)
+    levels[:3] = [1, 2, 3]
+    store.to_csv(csv_path, overrides={'Inventory_Level': levels})
+    store.write_snapshot(snapshot_dir, source_fingerprint(csv_path), overrides={'Inventory_Level': levels})
+    with open(manifest, encoding='utf-8') as f:
+        assert json.load(f)["meta"]["source"] == source_fingerprint(csv_path)
+    written = os.stat(manifest).st_mtime_ns
+    reopened = InventoryStore.open(csv_path, snapshot_dir=snapshot_dir)
+    assert os.stat(manifest).st_mtime_ns == written
+    np.testing.assert_array_equal(reopened.codes('Inventory_Level'), levels)
+    np.testing.assert_array_equal(InventoryStore.from_csv(csv_path).codes('Inventory_Level'), levels)
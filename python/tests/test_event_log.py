@@ -0,0 +1,105 @@
+"""
+test_event_log.py — SequencedLog against the full list the scan log used to
+return on every poll, and SSE resumption after a Last-Event-ID.
+"""
+
+import asyncio
+import threading
+import pytest  # type: ignore
+from starlette.requests import Request  # type: ignore
+from event_log import SSE_KEEPALIVE, SequencedLog, sse_message  # type: ignore
+import main  # type: ignore
+
+
+def _request(last_event_id: str | None = None) -> Request:
+    headers = [] if last_event_id is None else [(b"last-event-id", last_event_id.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+
+
+def test_since_matches_list_baseline():
+    log, everything = SequencedLog(capacity=8), []  # `everything`: the old unbounded list, oldest first
+    for i in range(30):
+        assert log.append({"i": i}) == i + 1
+        everything.append({"i": i, "seq": i + 1})
+        for seen in range(0, i + 2):
+            entries, truncated = log.since(seen)
+            kept = everything[-8:]
+            expected = [e for e in kept if e["seq"] > seen]
+            assert entries == expected
+            # The reader missed entries only if some after `seen` were overwritten.
+            assert truncated == (seen < kept[0]["seq"] - 1)
+        assert log.latest() == everything[::-1][:8]
+        assert log.latest(3) == everything[::-1][:3]
+    assert len(log) == 8 and log.total == log.last_seq == 30
+
+
+def test_since_limit_returns_the_oldest_first():
+    log = SequencedLog(capacity=5)
+    for i in range(12):
+        log.append({"i": i})
+    entries, truncated = log.since(0, limit=2)
+    assert [e["seq"] for e in entries] == [8, 9] and truncated
+    entries, truncated = log.since(9, limit=10)
+    assert [e["seq"] for e in entries] == [10, 11, 12] and not truncated
+    assert log.since(12) == ([], False)  # an idle poll is empty
+
+
+def test_wait_wakes_on_append_from_another_thread():
+    log = SequencedLog(capacity=4)
+
+    async def run():
+        timer = threading.Timer(0.05, log.append, args=({"x": 1},))
+        timer.start()
+        try:
+            assert await log.wait(0, timeout=5.0)
+        finally:
+            timer.join()
+        assert await log.wait(0, timeout=0.01)  # already past seq 0: no wait
+        assert not await log.wait(1, timeout=0.05)
+        assert not log._waiters
+
+    asyncio.run(run())
+
+
+async def _events(response, n: int) -> list[bytes]:
+    out = []
+    async for chunk in response.body_iterator:
+        out.append(chunk)
+        if len(out) == n:
+            break
+    await response.body_iterator.aclose()
+    return out
+
+
+@pytest.mark.parametrize("last_event_id", ["3", None])
+def test_sse_resumes_after_last_event_id(last_event_id):
+    log = SequencedLog(capacity=10)
+    for i in range(5):
+        log.append({"i": i})
+    start = int(last_event_id) if last_event_id else log.last_seq
+    assert main._resume_seq(_request(last_event_id), None, log.last_seq) == start
+
+    async def run():
+        response = main._sse_log(log, _request(last_event_id), None)
+        asyncio.get_running_loop().call_later(0.05, log.append, {"i": 5})
+        return await _events(response, 6 - start)
+
+    expected = [sse_message(main.dumps(e), event_id=e["seq"]) for e in log.since(start)[0]]
+    got = asyncio.run(run())
+    expected.append(sse_message(main.dumps(log.since(5)[0][0]), event_id=6))
+    assert got == expected  # every entry after the last id, once, in order
+
+
+def test_since_overrides_last_event_id_and_idle_streams_keep_alive(monkeypatch):
+    log = SequencedLog(capacity=10)
+    for i in range(4):
+        log.append({"i": i})
+    assert main._resume_seq(_request("1"), 3, log.last_seq) == 3
+    assert main._resume_seq(_request("garbage"), None, log.last_seq) == 4
+    monkeypatch.setattr(main, "SSE_KEEPALIVE_SECONDS", 0.01)
+
+    async def run():
+        return await _events(main._sse_log(log, _request("1"), 3), 2)
+
+    got = asyncio.run(run())
+    assert got == [sse_message(main.dumps(log.since(3)[0][0]), event_id=4), SSE_KEEPALIVE]
@@ -0,0 +1,74 @@
+"""
+test_feature_store.py — RollingFeatureStore updated incrementally (seed, then
+append / add_units) must end up where a full recompute over the extended
+history does.
+"""
+
+import os
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+from feature_store import RollingFeatureStore  # type: ignore
+from rolling import DEFAULT_WINDOWS, feature_names, rolling_demand_features  # type: ignore
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "inventory_control_tower_master.csv")
+KEYS = ['Product_ID', 'Warehouse_ID']
+
+
+@pytest.fixture(scope="module")
+def history() -> pd.DataFrame:
+    df = pd.read_csv(CSV_PATH, usecols=['Date', *KEYS, 'Units_Sold'])
+    df['Date'] = pd.to_datetime(df['Date'], dayfirst=True)
+    return df.sort_values([*KEYS, 'Date'], kind='stable').reset_index(drop=True)
+
+
+def _recomputed(df: pd.DataFrame) -> dict[tuple[str, str], dict[str, float]]:
+    """Each pair's features on its last row, from the vectorized kernels over the whole frame."""
+    features = rolling_demand_features(df, KEYS)
+    last = df.groupby(KEYS, sort=False).tail(1).index.to_numpy()
+    names = [name for w in DEFAULT_WINDOWS for name in feature_names(w)]
+    return {(df.at[i, 'Product_ID'], df.at[i, 'Warehouse_ID']): {n: features[n][i] for n in names}
+            for i in last}
+
+
+def _assert_matches(store: RollingFeatureStore, expected: dict) -> None:
+    assert len(store) == len(expected)
+    for (product, warehouse), want in expected.items():
+        got = store.features(product, warehouse)
+        for name, value in want.items():
+            assert got[name] == pytest.approx(value, rel=1e-9, abs=1e-9), (product, warehouse, name)
+
+
+def test_appends_match_full_recompute(history):
+    # Seed on the first 60% of every pair's days, then feed the rest one day at a time.
+    position = history.groupby(KEYS, sort=False).cumcount()
+    size = history.groupby(KEYS, sort=False)['Units_Sold'].transform('size')
+    seeded = position < (size * 0.6).astype(int)
+    store = RollingFeatureStore()
+    store.seed(history[seeded])
+    for row in history[~seeded].itertuples(index=False):
+        store.add_units(row.Product_ID, row.Warehouse_ID, row.Units_Sold, np.datetime64(row.Date, 'D'))
+    _assert_matches(store, _recomputed(history))
+
+
+def test_same_day_units_fold_into_latest(history):
+    store = RollingFeatureStore()
+    store.seed(history)
+    merged = history.copy()
+    rng = np.random.default_rng(7)
+    last = merged.groupby(KEYS, sort=False).tail(1).index.to_numpy()
+    for i in rng.choice(last, size=min(50, len(last)), replace=False):
+        product, warehouse, date = merged.at[i, 'Product_ID'], merged.at[i, 'Warehouse_ID'], merged.at[i, 'Date']
+        for units in (3, 5):
+            store.add_units(product, warehouse, units, np.datetime64(date, 'D'))
+            merged.at[i, 'Units_Sold'] += units
+    # A new day after the bumped one pushes rather than folds.
+    i = last[0]
+    next_day = merged.at[i, 'Date'] + pd.Timedelta(days=1)
+    store.add_units(merged.at[i, 'Product_ID'], merged.at[i, 'Warehouse_ID'], 11, np.datetime64(next_day, 'D'))
+    merged = pd.concat([merged, pd.DataFrame({'Date': [next_day], 'Product_ID': [merged.at[i, 'Product_ID']],
+                                              'Warehouse_ID': [merged.at[i, 'Warehouse_ID']],
+                                              'Units_Sold': [11]})], ignore_index=True)
+    merged = merged.sort_values([*KEYS, 'Date'], kind='stable').reset_index(drop=True)
+    _assert_matches(store, _recomputed(merged))
@@ -0,0 +1,72 @@
+"""
+test_forecast_table.py — ForecastTable range queries against direct sums of
+the demand matrix, and the reorder plan for lead times past the horizon.
+"""
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+import ml_model  # type: ignore
+from forecast_table import ForecastTable  # type: ignore
+from inventory_store import InventoryStore  # type: ignore
+from latest_view import LatestStateView  # type: ignore
+
+HORIZON = 30
+
+
+@pytest.fixture
+def table() -> ForecastTable:
+    rng = np.random.default_rng(3)
+    demand = rng.uniform(0, 20, size=(3, HORIZON)).astype(np.float32)
+    return ForecastTable(np.array(['P1', 'P2', 'P3']), np.array(['WH_1'] * 3), np.datetime64('2024-01-01'),
+                         demand, lead_time=np.array([5.0, 25.0, 10.0]))
+
+
+def test_ranges_match_direct_sums(table):
+    demand = table.demand.astype(np.float64)
+    np.testing.assert_allclose(table.totals(7), demand[:, :7].sum(axis=1), rtol=1e-6)
+    np.testing.assert_allclose(table.totals(5, first=10), demand[:, 10:15].sum(axis=1), rtol=1e-6)
+    np.testing.assert_allclose(table.totals(np.array([1, 2, 3])),
+                               [demand[0, :1].sum(), demand[1, :2].sum(), demand[2, :3].sum()], rtol=1e-6)
+    dates, daily = table.daily(table.slot('P2', 'WH_1'), first=3, days=4)
+    assert list(dates) == list(np.datetime64('2024-01-04') + np.arange(4))
+    np.testing.assert_array_equal(daily, table.demand[1, 3:7])
+
+    slots, totals = table.top(7, 2)
+    expected = np.argsort(-demand[:, :7].sum(axis=1), kind='stable')[:2]
+    np.testing.assert_array_equal(slots, expected)
+
+
+def test_days_of_cover(table):
+    cumulative = np.cumsum(table.demand.astype(np.float64), axis=1)
+    stock = cumulative[:, 9] - 1e-3  # runs out on day 9
+    np.testing.assert_array_equal(table.days_of_cover(stock), [9, 9, 9])
+    assert list(table.days_of_cover(np.full(3, 1e9))) == [HORIZON] * 3
+
+
+def test_totals_extended_past_horizon(table):
+    totals, extrapolated = table.totals_extended(np.array([10, 39, HORIZON]))
+    demand = table.demand.astype(np.float64)
+    expected = [demand[0, :10].sum(), demand[1].sum() + 9 * demand[1, -1], demand[2].sum()]
+    np.testing.assert_allclose(totals, expected, rtol=1e-6)
+    assert list(extrapolated) == [False, True, False]
+
+
+def test_reorder_plan_with_25_day_lead_time(table, monkeypatch):
+    store = InventoryStore.from_frame(pd.DataFrame({
+        'Date': ['01-01-2024'] * 3, 'SKU_ID': ['S1', 'S2', 'S3'], 'Product_ID': ['P1', 'P2', 'P3'],
+        'Warehouse_ID': ['WH_1'] * 3, 'Units_Sold': [1, 1, 1], 'Inventory_Level': [0, 0, 0],
+        'Reorder_Point': [1, 1, 1], 'Unit_Cost': [1.0, 1.0, 1.0],
+    }))
+    monkeypatch.setattr(ml_model, "_forecast", table)
+    monkeypatch.setattr(ml_model, "_latest", LatestStateView(store))
+
+    plan = {row["product_id"]: row for row in ml_model.get_reorder_plan(review_days=14, top_n=10)}
+    demand = table.demand.astype(np.float64)
+    p2 = plan['P2']  # 25 + 14 = 39 days: 9 past the 30-day horizon, at the last day's rate
+    assert p2["lead_time_days"] == 25 and p2["extrapolated"]
+    assert p2["reorder_quantity"] == pytest.approx(demand[1].sum() + 9 * demand[1, -1], abs=1)
+    assert p2["stockout_before_arrival"]
+    p1 = plan['P1']  # 5 + 14 = 19 days: inside the horizon
+    assert not p1["extrapolated"]
+    assert p1["reorder_quantity"] == pytest.approx(demand[0, :19].sum(), abs=1)
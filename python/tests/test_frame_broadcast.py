@@ -0,0 +1,59 @@
+"""
+test_frame_broadcast.py — FrameBroadcaster against the polling MJPEG generator
+it replaced: same multipart bytes, but each frame sent once per viewer, one
+shared buffer for all viewers, and slow viewers skipping to the newest frame.
+"""
+
+import asyncio
+import pytest  # type: ignore
+from frame_broadcast import FrameBroadcaster  # type: ignore
+
+
+def _legacy_part(jpeg: bytes) -> bytes:
+    """One chunk of the old frame_generator()."""
+    return b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + jpeg + b"\r\n"
+
+
+async def _next(stream, timeout: float = 1.0) -> bytes:
+    return await asyncio.wait_for(stream.__anext__(), timeout)
+
+
+def test_fan_out_sends_each_frame_once():
+    async def run():
+        hub = FrameBroadcaster()
+        viewers = [hub.stream() for _ in range(3)]
+        await hub.publish(b"jpeg-1")
+        first = [await _next(v) for v in viewers]
+        assert first[0] == _legacy_part(b"jpeg-1")
+        assert all(part is first[0] for part in first)  # one buffer, no per-viewer copy
+
+        # Idle feed: nothing new, nothing sent (the old generator resent every 50 ms)
+        with pytest.raises(asyncio.TimeoutError):
+            await _next(viewers[0], timeout=0.1)
+        viewers[0] = hub.stream()  # the timed-out generator is gone; reconnect
+        assert await _next(viewers[0]) == _legacy_part(b"jpeg-1")  # a new viewer gets the current frame
+
+        await hub.publish(b"jpeg-2")
+        assert [await _next(v) for v in viewers] == [_legacy_part(b"jpeg-2")] * 3
+        assert hub.stats()["subscribers"] == 3
+        for v in viewers:
+            await v.aclose()
+        assert hub.stats()["subscribers"] == 0 and hub.published == 2
+    asyncio.run(run())
+
+
+def test_slow_viewer_skips_to_newest():
+    async def run():
+        hub = FrameBroadcaster()
+        fast, slow = hub.stream(), hub.stream()
+        await hub.publish(b"f1")
+        assert await _next(fast) == await _next(slow) == _legacy_part(b"f1")
+        for i in range(2, 6):
+            await hub.publish(f"f{i}".encode())
+            assert await _next(fast) == _legacy_part(f"f{i}".encode())
+        assert await _next(slow) == _legacy_part(b"f5")  # f2..f4 were replaced, never queued
+        viewers = {v["id"]: v for v in hub.stats()["viewers"]}
+        assert [(v["delivered"], v["skipped"]) for v in viewers.values()] == [(5, 0), (2, 3)]
+        await fast.aclose()
+        await slow.aclose()
+    asyncio.run(run())
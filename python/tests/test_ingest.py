@@ -0,0 +1,70 @@
+"""
+test_ingest.py — The chunked training cache against the in-memory pandas
+pipeline it replaced (read_csv, sort, groupby().rolling()): same rows in the
+same order and the same features, with chunk boundaries cutting through pairs.
+"""
+
+import os
+import shutil
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+from columnar_cache import MANIFEST  # type: ignore
+from ingest import build_training_cache  # type: ignore
+from inventory_store import InventoryStore  # type: ignore
+from rolling import DEFAULT_WINDOWS, feature_names  # type: ignore
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "inventory_control_tower_master.csv")
+KEYS = ['Product_ID', 'Warehouse_ID']
+
+
+@pytest.fixture(scope="module")
+def expected() -> pd.DataFrame:
+    df = pd.read_csv(CSV_PATH)
+    df['Date'] = pd.to_datetime(df['Date'], format='mixed', dayfirst=True)
+    df = df.sort_values([*KEYS, 'Date'], kind='stable').reset_index(drop=True)
+    df['Month'] = df['Date'].dt.month
+    df['DayOfWeek'] = df['Date'].dt.weekday
+    for w in DEFAULT_WINDOWS:
+        mean_name, std_name = feature_names(w)
+        rolled = df.groupby(KEYS, sort=False)['Units_Sold'].rolling(w, min_periods=1)
+        df[mean_name] = rolled.mean().to_numpy()
+        df[std_name] = rolled.std().fillna(0).to_numpy()
+    return df
+
+
+@pytest.fixture
+def store(tmp_path) -> InventoryStore:
+    path = tmp_path / "inventory.csv"
+    shutil.copyfile(CSV_PATH, path)
+    return InventoryStore.open(str(path), snapshot_dir=str(tmp_path / "snapshot"), chunksize=1_500)
+
+
+@pytest.mark.parametrize("chunksize", [777, 4_096, 100_000])
+def test_cache_matches_pandas_pipeline(store, expected, tmp_path, chunksize):
+    cache = build_training_cache(store, str(tmp_path / f"training-{chunksize}"), chunksize=chunksize)
+    df = cache.to_frame()
+    assert len(df) == len(expected)
+    for name in KEYS:
+        np.testing.assert_array_equal(df[name].astype(str).to_numpy(), expected[name].to_numpy())
+    np.testing.assert_array_equal(df['Date'].to_numpy(), expected['Date'].to_numpy().astype('datetime64[D]'))
+    for name in ['Units_Sold', 'Inventory_Level', 'Promotion_Flag', 'Supplier_Lead_Time_Days',
+                 'Month', 'DayOfWeek']:
+        np.testing.assert_array_equal(df[name].to_numpy(), expected[name].to_numpy(), err_msg=name)
+    for w in DEFAULT_WINDOWS:
+        for name in feature_names(w):
+            # Stored as float32
+            np.testing.assert_allclose(df[name].to_numpy(), expected[name].to_numpy(), rtol=1e-6, atol=1e-5,
+                                       err_msg=name)
+
+
+def test_cache_is_reused_until_the_source_changes(store, tmp_path):
+    directory = str(tmp_path / "training")
+    build_training_cache(store, directory)
+    manifest = os.path.join(directory, MANIFEST)
+    built_at = os.stat(manifest).st_mtime_ns
+    build_training_cache(store, directory)
+    assert os.stat(manifest).st_mtime_ns == built_at  # mapped, not rebuilt
+    other = build_training_cache(store, directory, windows=(7, 14))
+    assert other.meta["windows"] == [7, 14] and 'Rolling_30_Demand' not in other.columns
@@ -0,0 +1,62 @@
+"""
+test_inventory_index.py — InventoryIndex against the linear scan the scan
+endpoints used to do: same first match, same rows per key and per
+(Product_ID, Warehouse_ID) pair, and unaffected by inventory updates.
+"""
+
+import os
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+from inventory_store import InventoryStore  # type: ignore
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "inventory_control_tower_master.csv")
+FIELDS = ('Product_ID', 'SKU_ID', 'Product_Name')
+
+
+@pytest.fixture(scope="module")
+def store() -> InventoryStore:
+    return InventoryStore.from_csv(CSV_PATH)
+
+
+def _scan_first(store: InventoryStore, value: str):
+    """The old /api/inventory/scan loop: first row whose Product_ID, SKU_ID or Product_Name matches."""
+    key = value.strip().lower()
+    columns = [store.column(f) for f in FIELDS if f in store]
+    for i in range(len(store)):
+        if any(str(col[i]).strip().lower() == key for col in columns):
+            return i
+    return None
+
+
+def _queries(store: InventoryStore) -> list[str]:
+    products = store.categories('Product_ID').tolist()
+    skus = store.categories('SKU_ID').tolist()
+    return ([p.upper() for p in products] + [f"  {s.lower()} " for s in skus]
+            + ['missing', 'BAN-WH_3-SKU_5'])
+
+
+def test_first_matches_linear_scan(store):
+    for value in _queries(store):
+        assert store.index.first(value) == _scan_first(store, value), value
+
+
+def test_rows_and_pairs_match_scan(store):
+    products = np.array([str(v).lower() for v in store.column('Product_ID')])
+    warehouses = np.array([str(v).lower() for v in store.column('Warehouse_ID')])
+    for value in _queries(store):
+        key = value.strip().lower()
+        np.testing.assert_array_equal(store.index.rows('Product_ID', value), np.flatnonzero(products == key))
+        for warehouse in ('WH_1', 'wh_3 '):
+            expected = np.flatnonzero((products == key) & (warehouses == warehouse.strip().lower()))
+            np.testing.assert_array_equal(store.index.pair_rows(value, warehouse), expected)
+
+
+def test_inventory_updates_keep_index_valid():
+    store = InventoryStore.from_csv(CSV_PATH, max_rows=500)
+    value = str(store.value(123, 'Product_ID'))
+    before = store.index.rows('Product_ID', value).copy()
+    for row in before:
+        store.set_value(int(row), 'Inventory_Level', 0)
+    np.testing.assert_array_equal(store.index.rows('Product_ID', value), before)
+    assert store.index.first(value) == _scan_first(store, value)
@@ -0,0 +1,110 @@
+"""
+test_inventory_store.py — InventoryStore against the list-of-dicts loader it
+replaced: same records from the CSV, strict numeric parsing, a memory-mapped
+snapshot that round-trips, and index lookups that agree with a row scan.
+"""
+
+import csv
+import os
+import shutil
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+from columnar_cache import ColumnarCache  # type: ignore
+from inventory_store import InventoryStore  # type: ignore
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "inventory_control_tower_master.csv")
+
+
+def _dict_rows(path: str) -> list[dict]:
+    """The old main.load_data(): DictReader plus a per-cell int/float guess."""
+    rows = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            for key in row:
+                try:
+                    row[key] = float(row[key]) if '.' in row[key] else int(row[key])
+                except (ValueError, TypeError):
+                    pass
+            rows.append(row)
+    return rows
+
+
+@pytest.fixture(scope="module")
+def baseline() -> list[dict]:
+    return _dict_rows(CSV_PATH)
+
+
+@pytest.fixture(scope="module")
+def store() -> InventoryStore:
+    return InventoryStore.from_csv(CSV_PATH, chunksize=3_000)  # several chunks, shared encoders
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "inventory.csv"
+    shutil.copyfile(CSV_PATH, path)
+    return str(path)
+
+
+def test_records_match_dict_loader(store, baseline):
+    assert len(store) == len(baseline)
+    assert store.columns == list(baseline[0])
+    for got, want in zip(store.records(), baseline):
+        for name, value in want.items():
+            if isinstance(value, float):
+                assert got[name] == pytest.approx(value, rel=1e-6), name
+            else:
+                assert got[name] == value, name
+
+
+@pytest.mark.parametrize("column, value", [
+    ('Units_Sold', 'twelve'),   # not a number
+    ('Units_Sold', '2.5'),      # would be truncated to 2
+    ('Units_Sold', ''),         # blank integer cell
+    ('Promotion_Flag', '300'),  # out of int8 range
+    ('Unit_Cost', '9.77$'),
+])
+def test_malformed_numbers_are_rejected(csv_path, column, value):
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    df.loc[4_321, column] = value
+    df.to_csv(csv_path, index=False)
+    with pytest.raises(ValueError, match=rf"{column} .*row 4321"):
+        InventoryStore.from_csv(csv_path)
+
+
+def test_blank_float_is_missing_not_zero():
+    store = InventoryStore.from_frame(pd.DataFrame({'Unit_Cost': ['1.5', None], 'Units_Sold': ['3', '4']}))
+    assert store.value(0, 'Unit_Cost') == 1.5
+    assert np.isnan(store.value(1, 'Unit_Cost'))
+
+
+def test_snapshot_round_trip(csv_path, store):
+    snapshot_dir = csv_path + ".snapshot"
+    built = InventoryStore.open(csv_path, snapshot_dir=snapshot_dir)   # parses, writes the snapshot
+    mapped = InventoryStore.open(csv_path, snapshot_dir=snapshot_dir)  # maps it
+    assert isinstance(mapped.codes('Inventory_Level'), np.memmap)
+    for name in store.columns:
+        np.testing.assert_array_equal(mapped.column(name), store.column(name))
+        np.testing.assert_array_equal(built.column(name), store.column(name))
+    assert mapped.records(rows=[0, 9_999]) == store.records(rows=[0, 9_999])
+
+    # Copy-on-write: in-place updates stay in the process, never in the snapshot
+    mapped.set_value(0, 'Inventory_Level', 123_456)
+    assert ColumnarCache(snapshot_dir).columns['Inventory_Level'][0] == store.codes('Inventory_Level')[0]
+
+    # A changed CSV is re-parsed rather than served from the stale snapshot
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    df.loc[0, 'Inventory_Level'] = '7'
+    df.to_csv(csv_path, index=False)
+    os.utime(csv_path, ns=(1, 1))
+    assert InventoryStore.open(csv_path, snapshot_dir=snapshot_dir).value(0, 'Inventory_Level') == 7
+
+
+def test_index_lookups_match_row_scan(store, baseline):
+    for value in ('ban-wh_3-sku_5', ' SKU_5 ', 'missing'):
+        key = value.strip().lower()
+        for field in ('Product_ID', 'SKU_ID'):
+            expected = [i for i, r in enumerate(baseline) if str(r[field]).strip().lower() == key]
+            assert store.index.rows(field, value).tolist() == expected
@@ -0,0 +1,75 @@
+"""
+test_latest_view.py — LatestStateView against sort_values('Date').groupby().last()
+over the full history, and its O(1) maintenance on scans and training.
+"""
+
+import os
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+from inventory_store import InventoryStore  # type: ignore
+from latest_view import VIEW_COLUMNS, LatestStateView  # type: ignore
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "inventory_control_tower_master.csv")
+KEYS = ['Product_ID', 'Warehouse_ID']
+
+
+def _groupby_last(store: InventoryStore) -> pd.DataFrame:
+    """What the endpoints used to compute per request."""
+    df = store.to_frame([*KEYS, *VIEW_COLUMNS]).astype({k: str for k in [*KEYS, 'SKU_ID']})
+    df = df.sort_values('Date', kind='stable')
+    return df.groupby(KEYS, sort=True).last().reset_index()
+
+
+def _assert_same(view: LatestStateView, expected: pd.DataFrame) -> None:
+    got = view.frame([*KEYS, *VIEW_COLUMNS]).astype({k: str for k in [*KEYS, 'SKU_ID']})
+    got = got.sort_values(KEYS).reset_index(drop=True)
+    assert len(got) == len(expected)
+    for name in [*KEYS, *VIEW_COLUMNS]:
+        np.testing.assert_array_equal(got[name].to_numpy(), expected[name].to_numpy(), err_msg=name)
+
+
+@pytest.fixture
+def store() -> InventoryStore:
+    return InventoryStore.from_csv(CSV_PATH)
+
+
+def test_matches_groupby_last(store):
+    _assert_same(LatestStateView(store), _groupby_last(store))
+
+
+def test_same_day_ties_go_to_the_later_row():
+    store = InventoryStore.from_frame(pd.DataFrame({
+        'Date': ['02-01-2024', '01-01-2024', '02-01-2024', '05-01-2024'],
+        'SKU_ID': ['S1', 'S1', 'S1', 'S2'], 'Product_ID': ['P1', 'P1', 'P1', 'P2'],
+        'Warehouse_ID': ['W1', 'W1', 'W1', 'W1'], 'Units_Sold': [1, 2, 3, 4],
+        'Inventory_Level': [10, 20, 30, 40], 'Reorder_Point': [5, 5, 5, 5], 'Unit_Cost': [1.0, 1.0, 1.0, 2.0],
+        'Supplier_Lead_Time_Days': [3, 3, 3, 4]}))
+    view = LatestStateView(store)
+    assert view.latest_row('P1', 'W1') == 2
+    _assert_same(view, _groupby_last(store))
+
+
+def test_scans_and_training_stay_consistent(store):
+    view = LatestStateView(store)
+    changed = []
+    view.add_listener(changed.append)
+    rng = np.random.default_rng(5)
+    for slot in rng.choice(len(view), size=20, replace=False).tolist():
+        row = int(view.rows[slot])
+        store.set_value(row, 'Inventory_Level', int(rng.integers(0, 500)))
+        assert view.refresh(row)
+    older = next(r for r in range(len(store)) if r not in set(view.rows.tolist()))
+    assert not view.refresh(older)  # not a latest row: nothing to update
+    assert len(changed) == 20
+    _assert_same(view, _groupby_last(store))
+
+    rop = view.frame(KEYS)
+    rop['Dynamic_ROP'] = rng.uniform(0, 600, len(rop))
+    view.attach_dynamic_rop(rop)
+    assert changed[-1] is None and view.has_dynamic_rop
+    frame = view.frame()
+    np.testing.assert_allclose(frame['Risk_Gap'], frame['Dynamic_ROP'] - frame['Inventory_Level'])
+    np.testing.assert_allclose(frame['Overstock_Ratio'],
+                               frame['Inventory_Level'] / np.maximum(frame['Units_Sold'], 1))
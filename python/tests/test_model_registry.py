@@ -0,0 +1,87 @@
+"""
+test_model_registry.py — CompiledForest against sklearn's RandomForestRegressor
+on the training frame, and ModelRegistry save / load / claim round trips.
+"""
+
+import os
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+from sklearn.ensemble import RandomForestRegressor  # type: ignore
+from sklearn.preprocessing import LabelEncoder  # type: ignore
+import ml_model  # type: ignore
+from model_registry import CompiledForest, ModelRegistry, data_fingerprint  # type: ignore
+from rolling import rolling_demand_features  # type: ignore
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "inventory_control_tower_master.csv")
+KEYS = ['Product_ID', 'Warehouse_ID']
+
+
+@pytest.fixture(scope="module")
+def frame() -> pd.DataFrame:
+    """The training frame: ml_model's feature columns over the sorted CSV."""
+    df = pd.read_csv(CSV_PATH)
+    df['Date'] = pd.to_datetime(df['Date'], dayfirst=True)
+    df = df.sort_values([*KEYS, 'Date'], kind='stable').reset_index(drop=True)
+    df['Month'] = df['Date'].dt.month
+    df['DayOfWeek'] = df['Date'].dt.weekday
+    for name, values in rolling_demand_features(df, KEYS).items():
+        df[name] = values
+    df['Product_Encoded'] = LabelEncoder().fit_transform(df['Product_ID'])
+    df['WH_Encoded'] = LabelEncoder().fit_transform(df['Warehouse_ID'])
+    return df
+
+
+@pytest.fixture(scope="module")
+def forests(frame):
+    X, y = frame[ml_model._features], frame['Units_Sold']
+    full = RandomForestRegressor(n_estimators=ml_model.N_ESTIMATORS, random_state=42, n_jobs=1).fit(X, y)
+    bounded = RandomForestRegressor(n_estimators=5, random_state=7, n_jobs=1, max_samples=2_000,
+                                    max_leaf_nodes=200).fit(X, y)
+    return full, bounded
+
+
+def test_compiled_forest_matches_sklearn(frame, forests):
+    X = frame[ml_model._features]
+    for model in forests:
+        compiled = CompiledForest.from_estimator(model)
+        np.testing.assert_allclose(compiled.predict(X), model.predict(X), rtol=1e-12, atol=1e-12)
+        # Off-grid inputs land on the same side of every float32 threshold as in sklearn
+        jittered = X.astype(np.float64) + np.random.default_rng(1).normal(0, 0.5, X.shape)
+        np.testing.assert_allclose(compiled.predict(jittered), model.predict(jittered), rtol=1e-12, atol=1e-12)
+
+
+def test_registry_round_trip(tmp_path, frame, forests):
+    registry = ModelRegistry(str(tmp_path / "models"), keep=2)
+    encoders = {'Product_ID': LabelEncoder().fit(frame['Product_ID']),
+                'Warehouse_ID': LabelEncoder().fit(frame['Warehouse_ID'])}
+    X = frame[ml_model._features]
+    artifacts = []
+    for i, model in enumerate(forests):
+        fingerprint = data_fingerprint({'Units_Sold': frame['Units_Sold'].to_numpy()}, {"model": i})
+        assert registry.load(fingerprint) is None
+        assert registry.claim(fingerprint) and not registry.claim(fingerprint)
+        saved = registry.save(CompiledForest.from_estimator(model), encoders, ml_model._features,
+                              {"mae": 1.0 + i}, fingerprint)
+        registry.release(fingerprint)
+        loaded = registry.load(fingerprint)
+        assert isinstance(loaded.forest.left, np.memmap)
+        np.testing.assert_array_equal(loaded.forest.predict(X), saved.forest.predict(X))
+        np.testing.assert_allclose(loaded.forest.predict(X), model.predict(X), rtol=1e-12, atol=1e-12)
+        assert loaded.encoders['Product_ID'].transform(['BAN-WH_3-SKU_5']).tolist() == \
+            encoders['Product_ID'].transform(['BAN-WH_3-SKU_5']).tolist()
+        assert loaded.features == ml_model._features and loaded.summary == {"mae": 1.0 + i}
+        artifacts.append(loaded)
+    assert registry.latest().fingerprint == artifacts[-1].fingerprint
+    assert artifacts[0].fingerprint != artifacts[1].fingerprint
+
+
+def test_fingerprint_tracks_data_and_params(frame):
+    units = frame['Units_Sold'].to_numpy()
+    base = data_fingerprint({'Units_Sold': units}, {"n": 1})
+    assert data_fingerprint({'Units_Sold': units.copy()}, {"n": 1}) == base
+    changed = units.copy()
+    changed[0] += 1
+    assert data_fingerprint({'Units_Sold': changed}, {"n": 1}) != base
+    assert data_fingerprint({'Units_Sold': units}, {"n": 2}) != base
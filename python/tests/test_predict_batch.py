@@ -0,0 +1,88 @@
+"""
+test_predict_batch.py — predict_demand_batch against the per-request
+predict_demand it vectorized (LabelEncoder.transform, one-row DataFrame, one
+forest call per item), on a model trained from a copy of the CSV.
+"""
+
+import datetime
+import os
+import shutil
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+import ml_model  # type: ignore
+from model_registry import ModelRegistry  # type: ignore
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "inventory_control_tower_master.csv")
+SERVING_GLOBALS = ['_model', '_le_product', '_le_wh', '_df', '_summary', '_feature_store', '_model_fingerprint',
+                   '_latest', '_product_codes', '_wh_codes', '_forecast', '_risk']
+
+
+@pytest.fixture(scope="module")
+def trained(tmp_path_factory):
+    """ml_model trained in a scratch directory; the module globals are restored afterwards."""
+    root = tmp_path_factory.mktemp("ml")
+    csv_path = str(root / "inventory.csv")
+    shutil.copyfile(CSV_PATH, csv_path)
+    patch = pytest.MonkeyPatch()
+    for name in SERVING_GLOBALS:
+        patch.setattr(ml_model, name, getattr(ml_model, name))
+    patch.setattr(ml_model, "CSV_PATH", csv_path)
+    patch.setattr(ml_model, "TRAINING_CACHE_DIR", str(root / "training"))
+    patch.setattr(ml_model, "_registry", ModelRegistry(str(root / "models")))
+    ml_model.train_model()
+    yield ml_model
+    patch.undo()
+
+
+def _single(m, product_id: str, warehouse_id: str, promotion: int = 0, lead_time: int = 14) -> dict:
+    """The per-request predict_demand before batching."""
+    try:
+        product_enc = m._le_product.transform([product_id])[0]
+    except ValueError:
+        return {"error": "product"}
+    try:
+        wh_enc = m._le_wh.transform([warehouse_id])[0]
+    except ValueError:
+        return {"error": "warehouse"}
+    slot = m._latest.slot(product_id, warehouse_id)
+    if slot is None:
+        return {"error": "pair"}
+    rolling = m._feature_store.features(product_id, warehouse_id)
+    now = datetime.datetime.now()
+    vector = pd.DataFrame([{'Product_Encoded': product_enc, 'WH_Encoded': wh_enc, 'Month': now.month,
+                            'DayOfWeek': now.weekday(), **rolling, 'Promotion_Flag': promotion,
+                            'Supplier_Lead_Time_Days': lead_time}])[m._features]
+    predicted = float(m._model.predict(vector)[0])
+    dynamic_rop = rolling['Rolling_7_Demand'] * lead_time + 1.0 * rolling['Demand_Std_7']
+    current = float(m._latest.value(slot, 'Inventory_Level'))
+    risk = "HIGH" if current < dynamic_rop else "MODERATE" if current < dynamic_rop * 1.2 else "LOW"
+    return {"product_id": product_id, "warehouse_id": warehouse_id,
+            "predicted_daily_demand": round(predicted, 2), "dynamic_reorder_point": round(dynamic_rop, 2),
+            "current_inventory": round(current, 2), "risk_level": risk}
+
+
+def test_batch_matches_single_predictions(trained):
+    pairs = trained._latest.frame(['Product_ID', 'Warehouse_ID'])
+    items = [{"product_id": p, "warehouse_id": w, "promotion": i % 2, "lead_time": 7 + i % 20}
+             for i, (p, w) in enumerate(zip(pairs['Product_ID'], pairs['Warehouse_ID']))]
+    results = trained.predict_demand_batch(items)
+    assert len(results) == len(items)
+    for item, result in zip(items, results):
+        expected = _single(trained, item["product_id"], item["warehouse_id"], item["promotion"], item["lead_time"])
+        assert {k: result[k] for k in expected} == expected
+        assert result["suggested_action"]
+
+
+def test_bad_items_fail_alone(trained):
+    product, warehouse = trained._latest.frame(['Product_ID', 'Warehouse_ID']).iloc[0]
+    other_warehouse = next(w for w in trained._le_wh.classes_ if trained._latest.slot(product, w) is None)
+    items = [{"product_id": "NOPE", "warehouse_id": warehouse},
+             {"product_id": product, "warehouse_id": "WH_NOPE"},
+             {"product_id": product, "warehouse_id": other_warehouse},
+             {"product_id": product, "warehouse_id": warehouse}]
+    results = trained.predict_demand_batch(items)
+    assert [r["error"].split(":")[0] for r in results[:3]] == \
+        ["Unknown Product_ID", "Unknown Warehouse_ID", "Wrong Warehouse"]
+    assert "error" not in results[3]
+    assert results[3] == trained.predict_demand(product, warehouse)
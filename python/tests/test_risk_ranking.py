@@ -0,0 +1,88 @@
+"""
+test_risk_ranking.py — RiskRanking against sort_values('Risk_Gap', ascending=False)
+over the pairs at risk, including changes_since against the ranking recomputed
+at the earlier version.
+"""
+
+import os
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+from inventory_store import InventoryStore  # type: ignore
+from latest_view import LatestStateView  # type: ignore
+from risk_ranking import RiskRanking  # type: ignore
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "inventory_control_tower_master.csv")
+KEYS = ['Product_ID', 'Warehouse_ID']
+LIMIT = 10
+
+
+def _sorted_top(view: LatestStateView, limit: int) -> list[int]:
+    """What the endpoint used to compute per request (ties keep the earlier pair)."""
+    frame = view.frame(['Risk_Gap'])
+    at_risk = frame[frame['Risk_Gap'] > 0].sort_values('Risk_Gap', ascending=False, kind='stable')
+    return at_risk.index[:limit].tolist()
+
+
+def _attach_rop(view: LatestStateView, rng) -> None:
+    rop = view.frame(KEYS)
+    rop['Dynamic_ROP'] = rng.integers(0, 600, len(rop)).astype(float)  # integral: plenty of ties
+    view.attach_dynamic_rop(rop)
+
+
+def _scan(store: InventoryStore, view: LatestStateView, slot: int, level: int) -> None:
+    row = int(view.rows[slot])
+    store.set_value(row, 'Inventory_Level', level)
+    view.refresh(row)
+
+
+@pytest.fixture
+def store() -> InventoryStore:
+    return InventoryStore.from_csv(CSV_PATH)
+
+
+def test_top_and_changes_since_match_resorting(store):
+    view = LatestStateView(store)
+    rng = np.random.default_rng(25)
+    ranking = RiskRanking(view)
+    _attach_rop(view, rng)
+    snapshots = {ranking.version: _sorted_top(view, LIMIT)}
+    hot = _sorted_top(view, 3 * LIMIT)  # scans mostly hit pairs near the top, so the ranking moves
+    for step in range(300):
+        slot = int(rng.choice(hot)) if rng.random() < 0.7 else int(rng.integers(len(view)))
+        _scan(store, view, slot, int(rng.integers(0, 600)))
+        expected = _sorted_top(view, LIMIT)
+        slots, version = ranking.top(LIMIT)
+        assert slots == expected
+        assert len(ranking) == int((view.frame(['Risk_Gap'])['Risk_Gap'] > 0).sum())
+        snapshots[version] = expected
+
+        if step % 10 == 9:
+            for since in rng.choice(list(snapshots), size=5).tolist():
+                delta = ranking.changes_since(since, LIMIT)
+                then = snapshots[since]
+                assert not delta["reset"] and delta["version"] == version and delta["slots"] == expected
+                assert delta["previous"] == {s: rank for rank, s in enumerate(then, 1)}
+                assert delta["dropped"] == [s for s in then if s not in expected]
+    assert len(snapshots) > 100  # most scans moved the ranking
+
+
+def test_changes_since_resets(store):
+    view = LatestStateView(store)
+    rng = np.random.default_rng(7)
+    ranking = RiskRanking(view, history=16)
+    before_training = ranking.version
+    _attach_rop(view, rng)
+    after_training = ranking.version
+    assert ranking.changes_since(before_training, LIMIT)["reset"]  # re-ranked since
+    assert ranking.changes_since(after_training + 1, LIMIT)["reset"]  # a version from the future
+    current = ranking.changes_since(after_training, LIMIT)
+    assert not current["reset"] and current["dropped"] == []
+    assert current["previous"] == {s: rank for rank, s in enumerate(current["slots"], 1)}
+
+    top = _sorted_top(view, 1)[0]
+    for level in range(20):
+        _scan(store, view, top, level % 2)  # alternates the gap: one change per scan
+    delta = ranking.changes_since(after_training, LIMIT)  # 20 changes ago, history holds 16
+    assert delta["reset"] and delta["previous"] == {} and delta["dropped"] == []
+    assert delta["slots"] == _sorted_top(view, LIMIT)
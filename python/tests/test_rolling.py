@@ -0,0 +1,61 @@
+"""
+test_rolling.py — GroupedRolling must match pandas' groupby().rolling() on the
+real 10k-row inventory CSV, for the exact (integer) and centred (float) paths.
+"""
+
+import os
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+from rolling import DEFAULT_WINDOWS, GroupedRolling, feature_names, rolling_demand_features  # type: ignore
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "inventory_control_tower_master.csv")
+KEYS = ['Product_ID', 'Warehouse_ID']
+
+
+@pytest.fixture(scope="module")
+def history() -> pd.DataFrame:
+    df = pd.read_csv(CSV_PATH, usecols=['Date', *KEYS, 'Units_Sold', 'Unit_Cost'])
+    df['Date'] = pd.to_datetime(df['Date'], dayfirst=True)
+    return df.sort_values([*KEYS, 'Date'], kind='stable').reset_index(drop=True)
+
+
+def _pandas(df: pd.DataFrame, column: str, window: int, stat: str) -> np.ndarray:
+    rolled = df.groupby(KEYS, sort=False)[column].rolling(window, min_periods=1)
+    return getattr(rolled, stat)().to_numpy()  # groups are contiguous, so row order is kept
+
+
+@pytest.mark.parametrize("column", ['Units_Sold', 'Unit_Cost'])
+@pytest.mark.parametrize("window", DEFAULT_WINDOWS)
+def test_matches_pandas(history, column, window):
+    groups = history.groupby(KEYS, sort=False).ngroup().to_numpy()
+    roller = GroupedRolling(history[column].to_numpy(), groups)
+    np.testing.assert_allclose(roller.mean(window), _pandas(history, column, window, 'mean'),
+                               rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(roller.std(window), _pandas(history, column, window, 'std'),
+                               rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def test_demand_features_fill_std(history):
+    features = rolling_demand_features(history, KEYS)
+    for window in DEFAULT_WINDOWS:
+        mean_name, std_name = feature_names(window)
+        np.testing.assert_allclose(features[mean_name], _pandas(history, 'Units_Sold', window, 'mean'),
+                                   rtol=1e-9, atol=1e-9)
+        expected_std = np.nan_to_num(_pandas(history, 'Units_Sold', window, 'std'), nan=0.0)
+        np.testing.assert_allclose(features[std_name], expected_std, rtol=1e-9, atol=1e-9)
+
+
+def test_short_groups_and_offsets():
+    # Singleton groups, groups shorter than the window, and large float values whose
+    # uncentred sum of squares would lose the variance.
+    groups = np.array([0, 1, 1, 2, 2, 2, 2, 2, 3])
+    values = 1e7 + np.array([0.5, 1.25, 1.75, 3.1, 2.9, 3.3, 2.7, 3.0, 9.9])
+    frame = pd.DataFrame({'g': groups, 'v': values})
+    roller = GroupedRolling(values, groups)
+    for window in (1, 2, 3, 90):
+        rolled = frame.groupby('g', sort=False)['v'].rolling(window, min_periods=1)
+        np.testing.assert_allclose(roller.mean(window), rolled.mean().to_numpy(), rtol=1e-12)
+        np.testing.assert_allclose(roller.std(window), rolled.std().to_numpy(), rtol=1e-6, atol=1e-9,
+                                   equal_nan=True)
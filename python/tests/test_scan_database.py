@@ -0,0 +1,99 @@
+"""
+test_scan_database.py — ScanDatabase against the write-the-whole-file-per-change
+persistence it replaced: after a clean close, or a crash at any point of a
+flush or compaction, reopening gives the same parts as the in-memory dict.
+"""
+
+import json
+import os
+import time
+import pytest  # type: ignore
+from journal import read_records  # type: ignore
+from scan_database import ScanDatabase  # type: ignore
+
+
+def _record(i: int, count: int = 1) -> dict:
+    return {"name": f"Part {i}", "count": count, "last_seen": 1_700_000_000 + i}
+
+
+def _crash(db: ScanDatabase) -> None:
+    """Stops the writer without the final flush / compaction close() would do."""
+    with db._cond:
+        db._closed = True
+        db._cond.notify_all()
+    db._thread.join()
+    db._log.close()
+
+
+def _reopen(path: str) -> dict:
+    db = ScanDatabase(path, debounce=1e9, compact_interval=1e9)
+    db.open()
+    try:
+        return db.snapshot()
+    finally:
+        _crash(db)
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    path = str(tmp_path / "database.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"old": _record(0)}, f, indent=4)
+    return path
+
+
+def test_close_writes_what_a_full_rewrite_would(path):
+    db = ScanDatabase(path, debounce=0.01)
+    assert db.open() == 1
+    expected = {"old": _record(0)}
+    for i in range(1, 40):
+        db.put(f"P{i % 7}", _record(i, count=i))
+        expected[f"P{i % 7}"] = _record(i, count=i)
+    assert not db.put("P1", expected["P1"])  # unchanged: nothing scheduled
+    db.close()
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == expected == db.snapshot()
+    assert not os.path.exists(db.journal_path) and not os.path.exists(db.segment_path)
+
+
+def test_changes_are_debounced_into_one_record_per_part(path):
+    db = ScanDatabase(path, debounce=0.2, compact_interval=1e9)
+    db.open()
+    for count in range(50):
+        db.put("P1", _record(1, count))
+    deadline = time.monotonic() + 5
+    while db.flushes == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    _crash(db)
+    assert db.flushes == 1
+    assert [r["record"]["count"] for r in read_records(db.journal_path)] == [49]
+
+
+def test_replay_after_crash_before_compaction(path):
+    db = ScanDatabase(path, debounce=1e9, compact_interval=1e9)
+    db.open()
+    for i in range(10):
+        db.put(f"P{i}", _record(i))
+    db._flush()
+    _crash(db)  # logged, never compacted
+    assert _reopen(path) == db.snapshot()
+
+
+def test_replay_after_crash_mid_compaction(path, monkeypatch):
+    db = ScanDatabase(path, debounce=1e9, compact_interval=1e9)
+    db.open()
+    for i in range(10):
+        db.put(f"P{i}", _record(i))
+    db._flush()
+
+    def crash(_path):
+        raise OSError("simulated crash")
+    monkeypatch.setattr(os, "remove", crash)
+    with pytest.raises(OSError):
+        db.compact()  # database.json replaced, folded segment still on disk
+    monkeypatch.undo()
+    db.put("P3", _record(3, count=2))  # and a later change, only in the fresh log
+    db._flush()
+    _crash(db)
+    assert os.path.exists(db.segment_path)
+    assert _reopen(path) == db.snapshot()
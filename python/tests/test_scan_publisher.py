@@ -0,0 +1,81 @@
+"""
+test_scan_publisher.py — ScanPublisher accounting: only acknowledged scans count
+as sent, 4xx batches are rejected (not retried), 5xx batches stay queued, and
+scans evicted from a full queue are never counted twice.
+"""
+
+import pytest  # type: ignore
+
+pytest.importorskip("requests")
+
+import requests  # type: ignore  # noqa: E402
+import scan_publisher  # type: ignore  # noqa: E402
+from scan_publisher import ScanPublisher  # type: ignore  # noqa: E402
+
+
+class FakeSession:
+    """Answers each POST with the next queued status code (or raises ConnectionError)."""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.posted: list[int] = []
+
+    def post(self, url, json=None, **kwargs):
+        self.posted.append(len(json["items"]))
+        status = self.statuses.pop(0)
+        if status is None:
+            raise requests.ConnectionError("down")
+        return type("Response", (), {"status_code": status})()
+
+
+def _publisher(*statuses) -> ScanPublisher:
+    publisher = ScanPublisher("http://api.test")
+    publisher._session = FakeSession(*statuses)
+    return publisher
+
+
+def _send_queue(publisher: ScanPublisher) -> None:
+    publisher._send_scans(list(publisher._scans)[:scan_publisher.MAX_BATCH])
+
+
+def test_acknowledged_batch_counts_as_sent():
+    publisher = _publisher(200)
+    for i in range(3):
+        publisher.post_scan({"barcode": str(i)})
+    _send_queue(publisher)
+    stats = publisher.stats()
+    assert (stats["scans_sent"], stats["scans_rejected"], stats["scans_pending"]) == (3, 0, 0)
+
+
+def test_rejected_batch_is_not_sent_or_retried():
+    publisher = _publisher(422)
+    for i in range(4):
+        publisher.post_scan({"barcode": str(i)})
+    _send_queue(publisher)
+    stats = publisher.stats()
+    assert (stats["scans_sent"], stats["scans_rejected"], stats["scans_pending"]) == (0, 4, 0)
+    assert stats["batches_rejected"] == 1 and stats["retries"] == 0
+
+
+@pytest.mark.parametrize("failure", [503, None])
+def test_failed_batch_stays_queued(failure):
+    publisher = _publisher(failure, 200)
+    publisher.post_scan({"barcode": "a"})
+    _send_queue(publisher)
+    assert publisher.stats()["scans_pending"] == 1 and publisher.retries == 1
+    _send_queue(publisher)
+    assert publisher.stats()["scans_sent"] == 1 and publisher.stats()["scans_pending"] == 0
+
+
+def test_scans_dropped_in_flight_are_not_counted_as_sent(monkeypatch):
+    monkeypatch.setattr(scan_publisher, "MAX_PENDING_SCANS", 5)
+    publisher = _publisher(200)
+    for i in range(5):
+        publisher.post_scan({"barcode": str(i)})
+    batch = list(publisher._scans)
+    for i in range(2):  # the queue overflows while the batch is on the wire
+        publisher.post_scan({"barcode": f"late-{i}"})
+    publisher._send_scans(batch)
+    stats = publisher.stats()
+    assert stats["scans_dropped"] == 2
+    assert stats["scans_sent"] == 3 and stats["scans_pending"] == 2
@@ -0,0 +1,46 @@
+"""
+test_text_index.py — TextSearchIndex against a substring scan over the same
+seven fields: same matching rows, the right count, and best matches first.
+"""
+
+import os
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+from inventory_store import InventoryStore  # type: ignore
+from text_index import SEARCH_FIELDS  # type: ignore
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "inventory_control_tower_master.csv")
+QUERIES = ['sku_5', 'SKU_12', 'wh_3', 'bangalore', 'a', 'highway', 'ban-wh_3-sku_5', 'sup_', 'zzz', ' east ']
+
+
+@pytest.fixture(scope="module")
+def store() -> InventoryStore:
+    return InventoryStore.from_csv(CSV_PATH)
+
+
+def _scan(store: InventoryStore, query: str) -> set[int]:
+    """The old search loop, restricted to the indexed fields."""
+    query = query.strip().lower()
+    columns = [store.column(f) for f in SEARCH_FIELDS]
+    return {i for i in range(len(store)) if any(query in str(col[i]).lower() for col in columns)}
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_matches_substring_scan(store, query):
+    expected = _scan(store, query)
+    everything, count, _, has_more = store.search_index.search(query, limit=len(store))
+    assert set(everything.tolist()) == expected and len(everything) == len(expected)
+    assert count == len(expected) and not has_more
+
+    rows, count, _, has_more = store.search_index.search(query, limit=100)
+    assert set(rows.tolist()) <= expected and len(rows) == min(100, len(expected))
+    assert count == len(expected)  # all matches, not just the rows returned
+    assert has_more == (len(expected) > 100)
+
+
+def test_exact_values_rank_first(store):
+    rows, _, _, _ = store.search_index.search('SKU_5', limit=20)
+    assert all(str(store.value(int(r), 'SKU_ID')).lower() == 'sku_5' for r in rows)
+    exact = np.flatnonzero(store.column('SKU_ID') == 'SKU_5')[:20]
+    np.testing.assert_array_equal(rows, exact)  # ties keep row order
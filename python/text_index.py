@@ -0,0 +1,164 @@
+"""
+text_index.py — N-gram inverted index for substring search over the inventory store.
+
+The searchable columns are categorical, so the index is built over their distinct
+values ("terms"), not over rows: every 1-, 2- and 3-character substring of a
+term's lowercase text maps to the ids of the terms containing it. A query is
+answered by intersecting the posting lists of its trigrams (rarest first) and
+verifying the survivors, ranking the matching terms, and only then expanding
+terms to row positions — stopping as soon as the result cap is filled.
+"""
+
+import numpy as np  # type: ignore
+
+SEARCH_FIELDS = ('Product_ID', 'SKU_ID', 'City', 'Region', 'Warehouse_ID', 'Supplier_ID', 'On_Route_To')
+GRAM = 3
+SEGMENT_LIMIT = 8  # appended-row segments per field before they are merged
+
+
+def grams(text: str, n: int = GRAM) -> set[str]:
+    """Every substring of `text` with length 1..n."""
+    return {text[i:i + k] for k in range(1, n + 1) for i in range(len(text) - k + 1)}
+
+
+def _rows_by_code(codes: np.ndarray, n_codes: int, start: int) -> tuple[np.ndarray, np.ndarray]:
+    """(row positions grouped by code, group bounds): rows of code c are order[bounds[c]:bounds[c + 1]]."""
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(n_codes + 1))
+    return order + start, bounds
+
+
+class TextSearchIndex:
+    """
+    Case-insensitive substring search over SEARCH_FIELDS of an InventoryStore.
+
+    Terms and row postings only grow: new category labels and appended rows are
+    folded in by `extend` without rebuilding. Text columns are categorical and
+    never change in place, so in-place updates of numeric columns (scans) leave
+    the index valid.
+    """
+
+    def __init__(self, store, fields: tuple[str, ...] = SEARCH_FIELDS):
+        self._store = store
+        self.fields = tuple(f for f in fields if f in store and store.is_categorical(f))
+        self._term_text: list[str] = []
+        self._term_field: list[int] = []
+        self._term_code: list[int] = []
+        self._postings: dict[str, list[int]] = {}
+        self._indexed_codes = {field: 0 for field in self.fields}
+        self._segments: dict[str, list[tuple[int, np.ndarray, np.ndarray]]] = {field: [] for field in self.fields}
+        self._indexed_rows = 0
+        self.extend()
+
+    def __len__(self) -> int:
+        return self._indexed_rows
+
+    @property
+    def n_terms(self) -> int:
+        return len(self._term_text)
+
+    # ------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------
+    def extend(self) -> None:
+        """Indexes category labels and rows added to the store since the last call."""
+        for f, field in enumerate(self.fields):
+            labels = self._store.categories(field)
+            for code in range(self._indexed_codes[field], len(labels)):
+                self._add_term(str(labels[code]).lower(), f, code)
+            self._indexed_codes[field] = len(labels)
+
+        start, end = self._indexed_rows, len(self._store)
+        if start >= end:
+            return
+        for field in self.fields:
+            segments = self._segments[field]
+            n_codes = self._indexed_codes[field]
+            if len(segments) >= SEGMENT_LIMIT:
+                segments.clear()
+                segments.append((0, *_rows_by_code(self._store.codes(field)[:end], n_codes, 0)))
+            else:
+                segments.append((start, *_rows_by_code(self._store.codes(field)[start:end], n_codes, start)))
+        self._indexed_rows = end
+
+    def _add_term(self, text: str, field: int, code: int) -> None:
+        term = len(self._term_text)
+        self._term_text.append(text)
+        self._term_field.append(field)
+        self._term_code.append(code)
+        for gram in grams(text):
+            self._postings.setdefault(gram, []).append(term)  # ids ascend, so lists stay sorted
+
+    # ------------------------------------------
+    # Queries
+    # ------------------------------------------
+    def _candidates(self, query: str) -> list[int]:
+        if len(query) <= GRAM:
+            return self._postings.get(query, [])
+        lists = sorted((self._postings.get(query[i:i + GRAM], []) for i in range(len(query) - GRAM + 1)), key=len)
+        if not lists[0]:
+            return []
+        survivors = set(lists[0])
+        for postings in lists[1:]:
+            survivors.intersection_update(postings)
+            if not survivors:
+                return []
+        # Trigram co-occurrence doesn't imply adjacency: verify the substring
+        return [t for t in survivors if query in self._term_text[t]]
+
+    def _rank(self, query: str, term: int) -> tuple:
+        text = self._term_text[term]
+        if text == query:
+            tier = 0
+        elif text.startswith(query):
+            tier = 1
+        else:
+            at = text.find(query)
+            tier = 2 if not text[at - 1].isalnum() else 3  # match starts a word ("sku_5" in "ban-wh_3-sku_5")
+        return tier, self._term_field[term], len(text), text
+
+    def term_rows(self, term: int) -> np.ndarray:
+        field, code = self.fields[self._term_field[term]], self._term_code[term]
+        parts = [order[bounds[code]:bounds[code + 1]] for _, order, bounds in self._segments[field]
+                 if code + 1 < len(bounds)]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts) if parts else np.empty(0, dtype=np.intp)
+
+    def count_rows(self, terms: list[int]) -> int:
+        """Distinct rows matched by any of `terms`: one vectorized pass per field hit, no posting expansion."""
+        hit = np.zeros(self._indexed_rows, dtype=bool)
+        by_field: dict[int, list[int]] = {}
+        for term in terms:
+            by_field.setdefault(self._term_field[term], []).append(self._term_code[term])
+        for f, codes in by_field.items():
+            field = self.fields[f]
+            code_hit = np.zeros(self._indexed_codes[field], dtype=bool)
+            code_hit[codes] = True
+            hit |= code_hit[self._store.codes(field)[:self._indexed_rows]]
+        return int(np.count_nonzero(hit))
+
+    def search(self, query: str, limit: int = 100) -> tuple[np.ndarray, int, int, bool]:
+        """
+        Row positions matching `query` (case-insensitive substring of any indexed
+        field), best first: exact value, then prefix, then word-start, then any
+        substring; ties by field order, shorter value, then row order. Returns
+        (rows, matching row count, matching value count, has_more) — expansion
+        stops once `limit` rows are collected, and `has_more` says whether
+        matching rows were left out; the row count covers all of them.
+        """
+        query = query.strip().lower()
+        if not query:
+            return np.empty(0, dtype=np.intp), 0, 0, False
+        terms = sorted(self._candidates(query), key=lambda t: self._rank(query, t))
+        collected = np.empty(0, dtype=np.intp)
+        for i, term in enumerate(terms):
+            rows = self.term_rows(term)
+            pos = 0
+            while pos < len(rows) and len(collected) < limit:
+                # A row can match through several fields; it keeps its best-ranked hit
+                block = rows[pos:pos + limit - len(collected)]
+                pos += len(block)
+                collected = np.concatenate([collected, block[~np.isin(block, collected)]])
+            if len(collected) >= limit and (pos < len(rows) or i + 1 < len(terms)):
+                total = self.count_rows(terms)
+                return collected, total, len(terms), total > len(collected)
+        return collected, len(collected), len(terms), False
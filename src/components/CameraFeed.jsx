@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { fetchEngineStatus } from '../data/api';
+import { fetchEngineStatus, subscribeEvents } from '../data/api';
 
 const VIDEO_FEED_URL = 'http://localhost:8000/api/video-feed';
 
@@ -8,7 +8,7 @@ export default function CameraFeed() {
   const [totalScans, setTotalScans] = useState(0);
 
   useEffect(() => {
-    const poll = () => {
+    const load = () => {
       fetchEngineStatus()
         .then((res) => {
           setEngineOnline(res.online);
@@ -16,9 +16,19 @@ export default function CameraFeed() {
         })
         .catch(() => setEngineOnline(false));
     };
-    poll();
-    const interval = setInterval(poll, 3000);
-    return () => clearInterval(interval);
+    load();
+    // Online / offline transitions and new scans are pushed; no polling
+    return subscribeEvents(['scan', 'engine'], (changes) => {
+      changes.forEach((c) => {
+        if (c.type === 'engine') {
+          setEngineOnline(c.online);
+          setTotalScans(c.total_scans);
+        } else {
+          setEngineOnline(true);
+          setTotalScans((n) => Math.max(n, c.scan_seq));
+        }
+      });
+    }, load);
   }, []);
 
   return (
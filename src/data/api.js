@@ -12,10 +12,23 @@ export async function fetchReturns() {
   return res.json();
 }
 
+const MAX_PAGE = 1000;
+
+// The API serves at most MAX_PAGE rows per page (and rejects larger limits with 422);
+// follows next_cursor until `limit` rows are in
 export async function fetchInventory(limit = 50) {
-  const res = await fetch(`${API_BASE}/api/inventory?limit=${limit}`);
-  if (!res.ok) throw new Error(`Inventory fetch failed: ${res.status}`);
-  return res.json();
+  const data = [];
+  let cursor = null;
+  let page;
+  do {
+    const from = cursor == null ? '' : `&cursor=${cursor}`;
+    const res = await fetch(`${API_BASE}/api/inventory?limit=${Math.min(MAX_PAGE, limit - data.length)}${from}`);
+    if (!res.ok) throw new Error(`Inventory fetch failed: ${res.status}`);
+    page = await res.json();
+    data.push(...page.data);
+    cursor = page.next_cursor;
+  } while (cursor != null && data.length < limit);
+  return { ...page, data, count: data.length };
 }
 
 export async function fetchWarehouseStats() {
@@ -40,6 +53,25 @@ export async function fetchScanLog() {
   return res.json();
 }
 
+// Pushes each new scan-log entry (newest last) to onEntry; returns a close function.
+// The browser reconnects on its own and resumes after the last entry it saw.
+export function subscribeScanLog(since, onEntry) {
+  const source = new EventSource(`${API_BASE}/api/scan-log/stream?since=${since}`);
+  source.onmessage = (e) => onEntry(JSON.parse(e.data));
+  return () => source.close();
+}
+
+// One SSE connection for live dashboard changes: onChanges gets each coalesced batch
+// (an array of {type, ...} diffs), onResync fires when events were missed and state
+// should be refetched. Returns a close function.
+export function subscribeEvents(types, onChanges, onResync = () => {}) {
+  const query = types && types.length ? `?types=${types.join(',')}` : '';
+  const source = new EventSource(`${API_BASE}/api/events${query}`);
+  source.addEventListener('changes', (e) => onChanges(JSON.parse(e.data).changes));
+  source.addEventListener('resync', () => onResync());
+  return () => source.close();
+}
+
 export async function fetchEngineStatus() {
   const res = await fetch(`${API_BASE}/api/engine-status`);
   if (!res.ok) throw new Error(`Engine status fetch failed: ${res.status}`);
@@ -74,8 +106,9 @@ export async function predictDemand(data) {
   return res.json();
 }
 
-export async function fetchTopRisk(limit = 10) {
-  const res = await fetch(`${API_BASE}/api/ml/top-risk?limit=${limit}`);
+export async function fetchTopRisk(limit = 10, sinceVersion = null) {
+  const since = sinceVersion == null ? '' : `&since_version=${sinceVersion}`;
+  const res = await fetch(`${API_BASE}/api/ml/top-risk?limit=${limit}${since}`);
   if (!res.ok) throw new Error(`Top risk fetch failed: ${res.status}`);
   return res.json();
 }
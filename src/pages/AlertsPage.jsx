@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { fetchAlerts, fetchReturns } from '../data/api';
+import { fetchAlerts, fetchReturns, subscribeEvents } from '../data/api';
 import { delayWarnings, fleetTrucks } from '../data/mockFleet';
 
 export default function AlertsPage() {
@@ -8,8 +8,8 @@ export default function AlertsPage() {
   const [filter, setFilter] = useState('all');
 
   useEffect(() => {
-    fetchAlerts().then((res) => setStockAlerts(res.alerts || [])).catch(() => {});
-    fetchReturns().then((res) => {
+    const loadAlerts = () => fetchAlerts().then((res) => setStockAlerts(res.alerts || [])).catch(() => {});
+    const loadReturns = () => fetchReturns().then((res) => {
       const returns = (res.data || []).map((r, i) => ({
         id: `return-${i}`,
         type: 'return',
@@ -21,6 +21,13 @@ export default function AlertsPage() {
       }));
       setReturnAlerts(returns);
     }).catch(() => {});
+    loadAlerts();
+    loadReturns();
+    // Refetch only when the server reports a relevant change
+    return subscribeEvents(['alert', 'alert_config', 'return', 'model'], (changes) => {
+      if (changes.some((c) => c.type !== 'return')) loadAlerts();
+      if (changes.some((c) => c.type === 'return')) loadReturns();
+    }, () => { loadAlerts(); loadReturns(); });
   }, []);
 
   const fleetAlerts = delayWarnings.map((w) => {
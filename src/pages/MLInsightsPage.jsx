@@ -1,9 +1,10 @@
-import { useState, useEffect } from 'react';
-import { fetchMLSummary, predictDemand, fetchTopRisk, fetchAvailableInputs, fetchSellingInsights } from '../data/api';
+import { useState, useEffect, useRef } from 'react';
+import { fetchMLSummary, predictDemand, fetchTopRisk, fetchAvailableInputs, fetchSellingInsights, subscribeEvents } from '../data/api';
 
 export default function MLInsightsPage() {
   const [summary, setSummary] = useState(null);
   const [topRisk, setTopRisk] = useState([]);
+  const riskVersion = useRef(null);
   const [inputs, setInputs] = useState({ products: [], warehouses: [] });
   const [prediction, setPrediction] = useState(null);
   const [predLoading, setPredLoading] = useState(false);
@@ -12,11 +13,29 @@ export default function MLInsightsPage() {
 
   useEffect(() => {
     fetchMLSummary().then(setSummary).catch(() => {});
-    fetchTopRisk(10).then((r) => setTopRisk(r.data || [])).catch(() => {});
     fetchAvailableInputs().then(setInputs).catch(() => {});
     fetchSellingInsights().then(setSellingInsights).catch(() => {});
   }, []);
 
+  // Top risk: refetched on stock / model changes, with rank movement since the last version shown
+  useEffect(() => {
+    const loadTopRisk = (incremental) => fetchTopRisk(10, incremental ? riskVersion.current : null).then((r) => {
+      if (incremental && r.version === riskVersion.current) return;
+      riskVersion.current = r.version;
+      setTopRisk(r.data || []);
+    }).catch(() => {});
+    loadTopRisk(false);
+    return subscribeEvents(['inventory', 'model'], () => loadTopRisk(true), () => loadTopRisk(false));
+  }, []);
+
+  const rankMove = (item) => {
+    if (item.previous_rank === undefined) return null;
+    if (item.previous_rank === null) return <span className="text-danger-500 ml-1">new</span>;
+    const moved = item.previous_rank - item.rank;
+    if (!moved) return null;
+    return <span className={`${moved > 0 ? 'text-danger-500' : 'text-brand-600'} ml-1`}>{moved > 0 ? '▲' : '▼'}{Math.abs(moved)}</span>;
+  };
+
   useEffect(() => {
     if (inputs.products.length && !form.product_id) {
       setForm((f) => ({ ...f, product_id: inputs.products[0], warehouse_id: inputs.warehouses[0] }));
@@ -142,9 +161,9 @@ export default function MLInsightsPage() {
               <span>Product ID</span><span>Warehouse</span><span className="text-right">Inventory</span><span className="text-right">ROP</span><span className="text-right">Gap</span>
             </div>
             {topRisk.length === 0 && <div className="text-sm text-surface-400 text-center py-8">No at-risk Products 🎉</div>}
-            {topRisk.map((item, i) => (
-              <div key={i} className="grid grid-cols-5 gap-2 px-3 py-2.5 text-xs rounded hover:bg-surface-50 transition-colors border-b border-surface-100">
-                <span className="text-info-600 font-medium">{item.product_id}</span>
+            {topRisk.map((item) => (
+              <div key={`${item.product_id}-${item.warehouse_id}`} className="grid grid-cols-5 gap-2 px-3 py-2.5 text-xs rounded hover:bg-surface-50 transition-colors border-b border-surface-100">
+                <span className="text-info-600 font-medium">{item.product_id}{rankMove(item)}</span>
                 <span className="text-surface-600">{item.warehouse_id}</span>
                 <span className="text-right text-surface-800 font-medium">{item.inventory_level}</span>
                 <span className="text-right text-brand-600 font-medium">{item.dynamic_rop}</span>
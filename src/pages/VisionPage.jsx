@@ -1,5 +1,7 @@
 import { useState, useEffect, useRef } from 'react';
-import { fetchEngineStatus, fetchScanLog } from '../data/api';
+import { fetchEngineStatus, fetchScanLog, subscribeScanLog } from '../data/api';
+
+const SCAN_LOG_SIZE = 100;
 
 async function sendFrame(blob) {
   const form = new FormData();
@@ -19,12 +21,26 @@ export default function VisionPage() {
 
   useEffect(() => {
     fetchEngineStatus().then(setEngineStatus).catch(() => {});
-    fetchScanLog().then((r) => setScanLog(r.log || [])).catch(() => {});
     const poll = setInterval(() => {
       fetchEngineStatus().then(setEngineStatus).catch(() => {});
-      fetchScanLog().then((r) => setScanLog(r.log || [])).catch(() => {});
     }, 3000);
-    return () => clearInterval(poll);
+    // Scan log: one snapshot, then new entries pushed over SSE (nothing sent while idle)
+    let unsubscribe = () => {};
+    let cancelled = false;
+    fetchScanLog()
+      .then((r) => {
+        if (cancelled) return;
+        setScanLog(r.log || []);
+        unsubscribe = subscribeScanLog(r.seq || 0, (entry) => {
+          setScanLog((log) => (log.some((e) => e.seq === entry.seq) ? log : [entry, ...log].slice(0, SCAN_LOG_SIZE)));
+        });
+      })
+      .catch(() => {});
+    return () => {
+      cancelled = true;
+      clearInterval(poll);
+      unsubscribe();
+    };
   }, []);
 
   const startCamera = async () => {